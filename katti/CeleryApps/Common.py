@@ -1,9 +1,17 @@
 import datetime
 import pickle
+import time
+import uuid
+import redis
+from bson import ObjectId
 from pymongo import UpdateOne
 from katti.CeleryApps.KattiApp import katti_app
 from katti.DataBaseStuff.MongoengineDocuments.Scanner.LongTermRetry import LongTermRetryTask
 from katti.KattiUtils.Configs.ConfigKeys import LONG_TERM_TASK_RESTART
+from katti.DataBaseStuff.MongoengineDocuments.StatisticDocuments.ScannerTaskStatistics import ScannerLatencyHistogram
+from katti.KattiUtils.LatencyHistogram import LatencyHistogram
+from katti.RedisCacheLayer.RedisMongoCache import set_up_connection
+from katti.RedisCacheLayer.Keys.Scanner import latency_histogram_key, latency_histogram_index_key
 
 
 @katti_app.task(bind=True)
@@ -14,4 +22,33 @@ def restart_long_term_tasks(self):
         bulk.append(UpdateOne({'_id': task.id},{'$set': {'last_changed': datetime.datetime.utcnow(), 'status': 'restarted'},
                                '$push': {'children': str(x.task_id)}}))
     if len(bulk) > 0:
-        LongTermRetryTask._get_collection().bulk_write(bulk)
\ No newline at end of file
+        LongTermRetryTask._get_collection().bulk_write(bulk)
+
+
+@katti_app.task(bind=True)
+def flush_latency_histograms(self):
+    """Moves the per scanner and minute latency histograms of finished minutes from Redis to the time series collection."""
+    redis_connection = set_up_connection()
+    current_minute = int(time.time()) // 60 * 60
+    docs = []
+    for member in redis_connection.smembers(latency_histogram_index_key):
+        member = member.decode()
+        scanner_id, minute = member.rsplit(':', 1)
+        if int(minute) >= current_minute:
+            continue
+        # Late increments recreate the key and the index entry, they are flushed with the next run.
+        redis_connection.srem(latency_histogram_index_key, member)
+        flushing_key = f'{latency_histogram_key(member)}{uuid.uuid4()}'
+        try:
+            redis_connection.rename(latency_histogram_key(member), flushing_key)
+        except redis.ResponseError:
+            continue
+        pipe = redis_connection.pipeline(transaction=False)
+        pipe.hgetall(flushing_key)
+        pipe.delete(flushing_key)
+        raw_hash = pipe.execute()[0]
+        docs.append(ScannerLatencyHistogram(scanner_id=ObjectId(scanner_id),
+                                            minute=datetime.datetime.utcfromtimestamp(int(minute)),
+                                            phases=LatencyHistogram.son_from_redis_hash(raw_hash)).to_mongo())
+    if len(docs) > 0:
+        ScannerLatencyHistogram._get_collection().insert_many(docs)
@@ -1,14 +1,16 @@
+import asyncio
 import datetime
 import logging
 import pickle
 import uuid
 from random import randint
 from typing import Type
+import aiohttp
 import celery
 from katti.DataBaseStuff.MongoengineDocuments.Scanner.LongTermRetry import LongTermRetryTask
 from katti.KattiUtils.Configs.ConfigKeys import SCANNING_TASK_COUNTDOWN_SCANNER_STOP, SCANNING_TASKS_COUNTDOWN_DEFAULT
 from katti.KattiUtils.Exceptions.ScannerExceptions import LongTermRetryException
-from katti.Scanner.DNS.PTRScanner import IPsForPTR, PTRScanner
+from katti.Scanner.DNS.PTRScanner import IPsForPTR, PTRScanner, CIDRsForPTR
 from katti.Scanner.DNS.SpamHaus import SpamHaus, IPsForSpamhaus
 from katti.DataBaseStuff.MongoengineDocuments.Scanner.BaseMongoEngineDocument import ErrorParking
 from katti.KattiUtils.Configs.pydanticStuff import PydanticConfig
@@ -54,6 +56,8 @@ class ExecutionInformation:
     logger: logging.Logger
     results: list
     request_obj: BaseScanningRequestForScannerObject
+    # Result documents of the chunk, turned into complete results after the result buffer flush
+    pending_results: list = Field(default_factory=list)
 
     @property
     def ignore_result(self) -> bool:
@@ -67,24 +71,79 @@ def get_task_id(task):
     return task_id
 
 
+def _collect_ooi_result(execution_information: ExecutionInformation, scanner: BaseScanner, next_ooi_obj, start):
+    if scanner.scanning_result and not execution_information.ignore_result:
+        execution_information.pending_results.append(scanner.scanning_result)
+    if not execution_information.ignore_result:
+        execution_information.pending_results.extend(scanner.sub_scan_results)
+    scanner.latency.record('ooi', (datetime.datetime.utcnow() - start).total_seconds())
+
+
+def _complete_pending_results(execution_information: ExecutionInformation):
+    """Sub documents (e.g. DNS records) are written with the result buffer flush, so this has to run after it."""
+    pending, execution_information.pending_results = execution_information.pending_results, []
+    execution_information.results.extend(result.get_complete_result() for result in pending)
+
+
+async def async_worker(execution_information: ExecutionInformation, response: ScanningTaskResponse, worker: BaseScanner, in_flight: dict):
+    while next_ooi_obj := execution_information.request_obj.next_ooi_obj:
+        in_flight[id(worker)] = next_ooi_obj
+        start = datetime.datetime.utcnow()
+        try:
+            await worker.async_scan(execution_information.request_obj, next_ooi=next_ooi_obj)
+        except OfflineModeNoResult:
+            response.offline_mode_no_results.append(worker.offline_get_failed_ooi_s)
+        except Exception:
+            execution_information.scanner.retry_args.update(worker.retry_args)
+            raise
+        del in_flight[id(worker)]
+        _collect_ooi_result(execution_information, worker, next_ooi_obj, start)
+
+
+async def async_while_loop(execution_information: ExecutionInformation, response: ScanningTaskResponse):
+    """Scans the OOIs with max_concurrent_oois workers on one event loop. On failure the OOIs in flight are put back
+    into the request, so a retry scans them again."""
+    scanner = execution_information.scanner
+    in_flight = {}
+    async with aiohttp.ClientSession() as session:
+        scanner.http_session = session
+        workers = [asyncio.create_task(async_worker(execution_information, response, scanner.spawn_worker(), in_flight))
+                   for _ in range(min(scanner.scanner_document.max_concurrent_oois, execution_information.request_obj.ooi_count))]
+        if len(workers) == 0:
+            return
+        done, pending = await asyncio.wait(workers, return_when=asyncio.FIRST_EXCEPTION)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        execution_information.request_obj.oois.extend(in_flight.values())
+        for task in done:
+            if task.exception():
+                raise task.exception()
+
+
 def while_loop(execution_information: ExecutionInformation):
     response = ScanningTaskResponse(scanner_id=execution_information.scanner.scanner_document.id,
                                     endpoint=execution_information.task.name)
-    next_ooi_obj = execution_information.request_obj.next_ooi_obj
+    execution_information.scanner.prepare_chunk(execution_information.request_obj)
+    next_ooi_obj = None
     try:
-        while next_ooi_obj:
-            single_stats = ScannerTaskStats.SingleScannerStats(ooi=str(next_ooi_obj.ooi))
-            start = datetime.datetime.utcnow()
-            try:
-                execution_information.scanner.scan(execution_information.request_obj, next_ooi=next_ooi_obj)
-            except OfflineModeNoResult:
-                response.offline_mode_no_results.append(execution_information.scanner.offline_get_failed_ooi_s)
-            if execution_information.scanner.scanning_result and not execution_information.ignore_result:
-                execution_information.results.append(
-                    execution_information.scanner.scanning_result.get_complete_result())
-            single_stats.duration_micro_secs = (datetime.datetime.utcnow() - start).microseconds
-            execution_information.statistics.single_scan_ooi_stats.append(single_stats)
-            next_ooi_obj = execution_information.request_obj.next_ooi_obj
+        try:
+            if execution_information.scanner.async_scanner:
+                asyncio.run(async_while_loop(execution_information, response))
+            else:
+                next_ooi_obj = execution_information.request_obj.next_ooi_obj
+                while next_ooi_obj:
+                    start = datetime.datetime.utcnow()
+                    try:
+                        execution_information.scanner.scan(execution_information.request_obj, next_ooi=next_ooi_obj)
+                    except OfflineModeNoResult:
+                        response.offline_mode_no_results.append(execution_information.scanner.offline_get_failed_ooi_s)
+                    _collect_ooi_result(execution_information, execution_information.scanner, next_ooi_obj, start)
+                    next_ooi_obj = execution_information.request_obj.next_ooi_obj
+        finally:
+            execution_information.scanner.flush_result_buffer()
+            _complete_pending_results(execution_information)
+            execution_information.statistics.latency = execution_information.scanner.push_latency_histogram()
     except RetryException:
         try:
             handle_retry_exception(execution_information, last_ooi_objc=next_ooi_obj,
@@ -118,7 +177,8 @@ def while_loop(execution_information: ExecutionInformation):
 
 
 def handle_long_term_retry_exception(execution_information: ExecutionInformation, last_ooi_objc, retry_args: dict = {}):
-    execution_information.request_obj.oois.append(last_ooi_objc)
+    if last_ooi_objc:
+        execution_information.request_obj.oois.append(last_ooi_objc)
     execution_information.statistics.oois_left_over = len(execution_information.request_obj.oois)
     execution_information.statistics.stop_and_save()
     retries = execution_information.task.request.retries + 1
@@ -144,7 +204,8 @@ def handle_long_term_retry_exception(execution_information: ExecutionInformation
 
 
 def handle_retry_exception(execution_information: ExecutionInformation, last_ooi_objc, retry_args: dict = {}):
-    execution_information.request_obj.oois.append(last_ooi_objc)
+    if last_ooi_objc:
+        execution_information.request_obj.oois.append(last_ooi_objc)
     execution_information.statistics.oois_left_over = len(execution_information.request_obj.oois)
     execution_information.statistics.stop_and_save()
     execution_information.task.retry(args=(execution_information.request_obj, execution_information.results),
@@ -287,6 +348,12 @@ def ptr_scan(self, scanning_request: IPsForPTR, results: list | None = None, **k
                                    results=results)
 
 
+@katti_app.task(bind=True, base=BaseTaskWithRetry)
+def ptr_sweep_scan(self, scanning_request: CIDRsForPTR, results: list | None = None, **kwargs):
+    return set_up_and_execute_task(task=self, scanning_request=scanning_request, scanner_cls=PTRScanner,
+                                   results=results)
+
+
 @katti_app.task(bind=True, base=BaseTaskWithRetry)
 def test_scan_run(self, scanning_request: TestRequest, results: list | None = None, **kwargs):
     return set_up_and_execute_task(task=self, scanning_request=scanning_request, scanner_cls=TestScanner,
@@ -9,10 +9,11 @@ from katti.DataBaseStuff.MongoengineDocuments.ScannerExecutionInformation import
 
 @dataclass
 class Input:
-    """ipv4,ipv6,ips,domain,url,object_id,sha_256"""
+    """ipv4,ipv6,ips,cidrs,domain,url,object_id,sha_256"""
     ipv4: set = Field(default_factory=set)
     ipv6: set = Field(default_factory=set)
     ips: set = Field(default_factory=set)
+    cidrs: set = Field(default_factory=set)
     domains: set = Field(default_factory=set)
     urls: set = Field(default_factory=set)
     object_ids: set = Field(default_factory=set)
@@ -36,6 +37,8 @@ class Input:
                         self._add_ip(ip)
                 else:
                     self._add_ip(ooi)
+            case 'cidrs':
+                self._add(self.cidrs, ooi)
             case 'url':
                 self._add(self.urls, ooi)
             case 'domain':
@@ -75,6 +78,8 @@ class Input:
                 return list(self.ipv6)
             case 'ips':
                 return list(self.ips)
+            case 'cidrs':
+                return list(self.cidrs)
             case 'urls':
                 return list(self.urls)
             case 'domains':
@@ -0,0 +1,101 @@
+from mongoengine import get_db
+
+
+def _result_classes(scanner_classes) -> dict:
+    result_classes = {}
+    for scanner_cls in scanner_classes:
+        try:
+            result_cls = scanner_cls.get_result_class()
+        except NotImplementedError:
+            continue
+        if result_cls:
+            result_classes.setdefault(result_cls._get_collection_name(), result_cls)
+    return result_classes
+
+
+def _has_collscan(plan: dict) -> bool:
+    if plan.get('stage') == 'COLLSCAN':
+        return True
+    children = plan.get('inputStages', []) + ([plan['inputStage']] if 'inputStage' in plan else [])
+    return any(_has_collscan(child) for child in children)
+
+
+def ensure_result_indexes(scanner_classes) -> list[str]:
+    """Creates the indexes declared in meta['indexes'] of every result class. The documents have
+    auto_create_index disabled, so this has to run on setup and after a new index was declared."""
+    collections = []
+    for collection_name, result_cls in _result_classes(scanner_classes).items():
+        result_cls.ensure_indexes()
+        collections.append(collection_name)
+    return collections
+
+
+def migrate_dns_record_ids(batch_size: int = 1000) -> int:
+    """Moves DNS records saved with random IDs to their content addressed ID (DNSRecord.id_from_hash) and rewrites
+    the references in dns_request. Records with the same hash are merged into one. Has to run before the unique
+    index on hash_answer_string is created. Returns the number of moved records."""
+    from katti.DataBaseStuff.MongoengineDocuments.Scanner.DNSServerConfig import DNSRecord, DNSRequest
+    records = DNSRecord._get_collection()
+    requests = DNSRequest._get_collection()
+    moved = 0
+    for record in records.find({'hash_answer_string': {'$exists': True}}, batch_size=batch_size):
+        new_id = DNSRecord.id_from_hash(record['hash_answer_string'])
+        old_id = record.pop('_id')
+        if old_id == new_id:
+            continue
+        update = {'$addToSet': {'katti_meta_data': {'$each': record.pop('katti_meta_data', None) or []}}}
+        if 'katti_create' in record:
+            update['$min'] = {'katti_create': record.pop('katti_create')}
+        if 'katti_last' in record:
+            update['$max'] = {'katti_last': record.pop('katti_last')}
+        if len(record) > 0:
+            update['$setOnInsert'] = record
+        records.update_one({'_id': new_id}, update, upsert=True)
+        for field in ('records', 'authority_records'):
+            requests.update_many({f'queries.{field}': old_id},
+                                 {'$set': {f'queries.$[].{field}.$[record]': new_id}},
+                                 array_filters=[{'record': old_id}])
+        records.delete_one({'_id': old_id})
+        moved += 1
+    return moved
+
+
+def ensure_time_series_collection(document_cls):
+    """Creates the collection of document_cls as time series collection (document_cls.time_series) if it is missing."""
+    db = document_cls._get_db()
+    if not document_cls._get_collection_name() in db.list_collection_names():
+        db.create_collection(document_cls._get_collection_name(), timeseries=document_cls.time_series)
+
+
+def explain_freshness_queries(scanner_classes) -> list[dict]:
+    """Explains the freshness lookup (filter on the declared index fields, newest first) for every result collection.
+    The newest document of the collection is used as sample values."""
+    report = []
+    for collection_name, result_cls in _result_classes(scanner_classes).items():
+        collection = result_cls._get_collection()
+        sample = collection.find_one(sort=[('_id', -1)])
+        if not sample:
+            continue
+        for index_spec in result_cls._meta.get('index_specs', []):
+            fields = [field for field, _ in index_spec['fields'] if not field in ('_id', '_cls')]
+            if not 'ooi' in fields:
+                continue
+            query = {field: sample.get(field) for field in fields}
+            if '_cls' in sample:
+                query['_cls'] = sample['_cls']
+            query['_id'] = {'$gte': sample['_id']}
+            plan = collection.find(query).sort('_id', -1).limit(1).explain()
+            report.append({'collection': collection_name,
+                           'query_shape': sorted(query.keys()),
+                           'collscan': _has_collscan(plan['queryPlanner']['winningPlan'])})
+    return report
+
+
+def profiled_collscans(db_name: str = 'Katti') -> list[dict]:
+    """Query shapes that ended in a COLLSCAN according to system.profile. Needs profiling level >= 1."""
+    shapes = {}
+    for entry in get_db(db_name)['system.profile'].find({'planSummary': 'COLLSCAN'}, {'ns': 1, 'command': 1}):
+        query_filter = entry.get('command', {}).get('filter', {})
+        shape = (entry['ns'], tuple(sorted(query_filter.keys())))
+        shapes[shape] = shapes.get(shape, 0) + 1
+    return [{'ns': ns, 'query_shape': list(fields), 'count': count} for (ns, fields), count in shapes.items()]
@@ -1,5 +1,6 @@
 from mongoengine import StringField, ListField
 from katti.DataBaseStuff.MongoengineDocuments.BaseDocuments import AbstractNormalDocument
+from katti.RedisCacheLayer.L1Cache import get_l1_namespace, broadcast_l1_invalidation
 
 
 class MalwareFamilyMapping(AbstractNormalDocument):
@@ -7,11 +8,21 @@ class MalwareFamilyMapping(AbstractNormalDocument):
     name = StringField(required=True)
     variants = ListField()
 
+    def save(self, *args, **kwargs):
+        from katti.RedisCacheLayer.RedisMongoCache import set_up_connection
+        x = super().save(*args, **kwargs)
+        broadcast_l1_invalidation(set_up_connection(), namespace='malware_family')
+        return x
+
     @staticmethod
     def get_family_mapping(name_from_source: str):
+        family_cache = get_l1_namespace('malware_family')
+        name = family_cache.get(name_from_source)
+        if name:
+            return name
         try:
-            name = MalwareFamilyMapping.objects.only('name').get(__raw__={'variants': name_from_source})
+            name = MalwareFamilyMapping.objects.only('name').get(__raw__={'variants': name_from_source}).name
         except Exception:
-            return name_from_source
-        else:
-            return name.name
+            name = name_from_source
+        family_cache[name_from_source] = name
+        return name
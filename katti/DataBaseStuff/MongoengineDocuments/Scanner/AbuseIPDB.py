@@ -30,7 +30,8 @@ class AbuseIPDBReport(BaseScanningResults):
 
 
 class AbsueIPDBRequest(BaseScanningRequests):
-    meta = {'collection': 'abuse_ipdb_requests'}
+    meta = {'collection': 'abuse_ipdb_requests',
+            'indexes': [{'fields': ['ooi', '-id']}]}
     ip_addr = EmbeddedDocumentField(IP)
     isPublic = BooleanField()
     isWhitelisted = BooleanField()
@@ -28,6 +28,12 @@ class BaseScannerDocument(AbstractNormalDocument):
     active = BooleanField(default=True)
     time_valid_response = IntField(default=24 * 60 * 60)
     max_wait_time_for_cache = IntField(default=5)
+    result_buffer_size = IntField(default=50, min_value=1)
+    max_concurrent_oois = IntField(default=10, min_value=1)
+    stale_while_revalidate = IntField(default=0, min_value=0)
+    rate_per_second = IntField(default=0, min_value=0)
+    rate_per_minute = IntField(default=0, min_value=0)
+    rate_per_day = IntField(default=0, min_value=0)
     name = StringField(required=True, unique=True)
     fast_api_daily_quota = IntField(default=0)
     default_scanner = BooleanField(default=False)
@@ -7,6 +7,9 @@ from katti.DataBaseStuff.MongoengineDocuments.Scanner.BaseMongoEngineDocument im
 
 class DNSBL(BaseScannerDocument):
     dns_resolver_ip = StringField()
+    # Shared by all DNSBL scanners of a worker process that use the same resolver.
+    max_in_flight = IntField(default=100, min_value=1)
+    max_concurrent_oois = IntField(default=100, min_value=1)
 
 
 class PTRConfig(DNSBL):
@@ -28,6 +31,7 @@ class SpamHausDB(DNSBL):
 
 
 class SpamHausRequest(BaseScanningRequests):
+    meta = {'indexes': [{'fields': ['ooi', '-id']}]}
     error_reason = StringField()
     results = ListField(default=None)
     unknown_mapping = ListField(default=None)
@@ -62,7 +66,8 @@ class SinkDBResult(EmbeddedDocument):
 
 class SinkDBRequest(BaseScanningRequests):
     meta = {'collection': 'sink_db_results',
-            'indexes': [{'fields': ['hash_answer_string']}]}
+            'indexes': [{'fields': ['hash_answer_string']},
+                        {'fields': ['ooi', '-id']}]}
 
     results = EmbeddedDocumentField(SinkDBResult)
     error_reason = StringField()
@@ -1,13 +1,15 @@
-import copy
 import datetime
 import hashlib
 import json
+from bson import ObjectId
+from pymongo import UpdateOne
 from mongoengine import StringField, ListField, EmbeddedDocument, IntField, \
     LazyReferenceField, DateTimeField, EmbeddedDocumentListField, \
     DynamicEmbeddedDocument, DynamicField, ObjectIdField, BooleanField
 from katti.DataBaseStuff.MongoengineDocuments.Scanner.BaseMongoEngineDocument import BaseScannerDocument,\
     BaseScanningRequests, BaseScanningResults
 from katti.Scanner.DNS.rdata_parser_functions import *
+from katti.Scanner.DNS.EvaluationMatchers import CompiledEvaluation, PTRHintMatcher, get_compiled_evaluation
 
 
 class Evaluation(DynamicEmbeddedDocument):
@@ -23,20 +25,38 @@ class DNSConfig(BaseScannerDocument):
     evaluation = EmbeddedDocumentListField(Evaluation)
 
     any_backup_records = ListField(default=[])
+    resolver_backend = StringField(default='dnspython', choices=['dnspython', 'dig'])
+    max_in_flight_per_name_server = IntField(default=50, min_value=1)
+    hedge_queries = BooleanField(default=False)
+    # 0: p95 latency of the name server
+    hedge_delay_ms = IntField(default=0, min_value=0)
+    # Freshness of results from the record TTLs instead of time_valid_response, clamped to floor and ceiling.
+    ttl_cache = BooleanField(default=False)
+    ttl_cache_floor = IntField(default=60, min_value=0)
+    ttl_cache_ceiling = IntField(default=24 * 60 * 60, min_value=0)
+    # RFC 8020: names below a NXDOMAIN name do not exist either.
+    nxdomain_cut = BooleanField(default=True)
 
 
 class DNSRecord(BaseScanningResults):
     meta = {'collection': 'dns_records',
-            'indexes': [{'fields': ['hash_answer_string']}]}
+            'indexes': [{'fields': ['hash_answer_string'], 'unique': True, 'sparse': True}]}
     hash_answer_string = StringField()
     dns_ttl = IntField()
     record_type = StringField()
 
+    @staticmethod
+    def id_from_hash(hash_answer_string: str) -> ObjectId:
+        """Content addressed ID: the first 12 bytes of the md5 hash. Records saved with random IDs are moved by
+        IndexManagement.migrate_dns_record_ids."""
+        return ObjectId(bytes.fromhex(hash_answer_string)[:12])
+
 #    a_geo_data = EmbeddedDocumentListField()
 
 
 class DNSRequest(BaseScanningRequests):
-    meta = {'collection': 'dns_request'}
+    meta = {'collection': 'dns_request',
+            'indexes': [{'fields': ['ooi', 'scanner', 'dig_type', '-id']}]}
 
     class DNSQuery(EmbeddedDocument):
         additional_num = IntField()
@@ -54,6 +74,9 @@ class DNSRequest(BaseScanningRequests):
         evaluation = ListField(default=None)
         nameserver_ip = StringField()
         status = StringField()
+        min_dns_ttl = IntField(default=None)
+        answer_source = StringField(default=None)
+        nxdomain_parent = StringField(default=None)
 
         records = ListField(LazyReferenceField(DNSRecord), default=None)
         authority_records = ListField(LazyReferenceField(DNSRecord), default=None)
@@ -71,10 +94,13 @@ class DNSRequest(BaseScanningRequests):
             self.query_time_ms = answer_json.get('query_time', 0)
             self.query_num = answer_json.get('query_num', 0)
             self.dig_when_time = datetime.datetime.strptime(answer_json.get('when'), '%a %b %d %H:%M:%S %Z %Y') if 'when' in answer_json else None
+            # Negative answers: TTL of the SOA in the authority section
+            ttls = [record['ttl'] for record in answer_json.get('answer', [])] or [record['ttl'] for record in answer_json.get('authority', [])]
+            self.min_dns_ttl = min(ttls) if len(ttls) > 0 else None
             del answer_json['question']
 
             records = self._parse_records(answer_json.get('answer', []), ooi=ooi, scanner=scanner,
-                                    katti_meta_data=katti_meta_data, only_id=False)
+                                          katti_meta_data=katti_meta_data)
 
             if 'authority' in answer_json:
                 x = self._parse_records(answer_json.get('authority', []), ooi=ooi, scanner=scanner, katti_meta_data=katti_meta_data)
@@ -82,31 +108,42 @@ class DNSRequest(BaseScanningRequests):
             self.records = records
             self.status = answer_json['status']
             if len(evaluation_settings) > 0:
-                evaluation(dns_query=self, evaluations=evaluation_settings, records=records)
+                evaluation(dns_query=self, records=records,
+                           evaluations=get_compiled_evaluation(scanner.scanner_document.id, evaluation_settings))
 
             return self
 
-        def _parse_records(self, record_data, ooi, scanner, katti_meta_data, only_id: bool = True):
+        def _parse_records(self, record_data, ooi, scanner, katti_meta_data):
+            """The records are written with the next result buffer flush, the IDs follow from the record content.
+            Records written recently (scanner.recent_dns_records) only get katti_last and the meta data updated."""
             rdata_parser = RDataParser()
             records = []
+            parsed_records = []
             for next_answer in record_data:
-                # dns_response = DNSResult(**answer_json)
                 rr_type = next_answer['type']
                 next_answer['name'] = next_answer['name'].rstrip('.')
                 parsed_record = rdata_parser.do_it(record_type=rr_type, rdata=next_answer['data'])
                 parsed_record.update({'dns_ttl': next_answer['ttl'], 'record_type': rr_type, 'ooi': ooi})
-                help = copy.deepcopy(parsed_record)
-                if 'ip_number' in help:
-                    del help['ip_number']
-                new_record = DNSRecord.get_result_from_db(scanner_obj=scanner,
-                                                          ooi=ooi,
-                                                          filter={'hash_answer_string': hashlib.md5(
-                                                              json.dumps(help).encode()).hexdigest()},
-                                                          with_scanner_id=False,
-                                                          katti_meta_data=katti_meta_data,
-                                                          set_on_insert_dict=parsed_record,
-                                                          only_id=only_id)
-                records.append(new_record)
+                hash_answer_string = hashlib.md5(json.dumps({key: value for key, value in parsed_record.items()
+                                                             if key != 'ip_number'}).encode()).hexdigest()
+                parsed_record['hash_answer_string'] = hash_answer_string
+                records.append(DNSRecord(id=DNSRecord.id_from_hash(hash_answer_string), **parsed_record))
+                parsed_records.append(parsed_record)
+            if len(records) == 0:
+                return records
+            recent = scanner.recent_dns_records.recent([record.id for record in records])
+            bulk_ops = []
+            for record, parsed_record in zip(records, parsed_records):
+                if record.id in recent:
+                    scanner.recent_dns_records.touch(record.id, katti_meta_data)
+                    continue
+                update = BaseScanningResults._build_update_dict(scanner, None, ooi,
+                                                                set_on_insert_dict=parsed_record,
+                                                                with_scanner_id=False,
+                                                                katti_meta_data=katti_meta_data)
+                bulk_ops.append(UpdateOne({'_id': record.id}, update, upsert=True))
+                scanner.recent_dns_records.add_written(record.id)
+            scanner.add_bulk_ops(DNSRecord._get_collection_name(), bulk_ops)
             return records
 
     dig_dns_type = StringField()
@@ -132,32 +169,18 @@ class DNSRequest(BaseScanningRequests):
                 I['queries'][-1]['authority_records'] = list(DNSRecord.objects(id__in=[record.id for record in self.queries[-1].authority_records]).as_pymongo())
 
 
-def evaluation(dns_query: DNSRequest.DNSQuery, evaluations: list[Evaluation], records: list[DNSRecord]):
-    record_evalution = {'quad9': False,
-                        'A': [],
-                        'AAAA': [],
-                        'ptr_stuff': None}
+def evaluation(dns_query: DNSRequest.DNSQuery, evaluations: CompiledEvaluation, records: list[DNSRecord]):
     dns_query.evaluation = []
-    for evaluation in evaluations:
-        match evaluation.type:
-            case 'quad9':
-                record_evalution['quad9'] = True
-            case 'a_record':
-                record_evalution['A'].append(evaluation)
-            case 'aaaa_record':
-                record_evalution['AAAA'].append(evaluation)
-            case 'ptr_stuff':
-                record_evalution['ptr_stuff'] = evaluation
-    if record_evalution['quad9']:
+    if evaluations.quad9:
         quad9_auth_check(dns_query)
     for record in records:
         match record.record_type:
             case 'A' | 'AAAA':
-                for evaluation in record_evalution.get(record.record_type, []):
-                    check_for_match(settings=evaluation.settings, record_type=record.record_type, dns_query=dns_query,
+                for ip_reasons in evaluations.ip_reasons[record.record_type]:
+                    check_for_match(ip_reasons=ip_reasons, record_type=record.record_type, dns_query=dns_query,
                                     ooi=record.ip_str)
-            case 'PTR' if record_evalution['ptr_stuff']:
-                check_ptr_stuff(settings=record_evalution['ptr_stuff'], dns_query=dns_query, record=record)
+            case 'PTR' if evaluations.ptr_hints:
+                check_ptr_stuff(ptr_hints=evaluations.ptr_hints, dns_query=dns_query, record=record)
 
 def quad9_auth_check(dns_query: DNSRequest.DNSQuery):
     if dns_query.status == 'NXDOMAIN':
@@ -167,21 +190,19 @@ def quad9_auth_check(dns_query: DNSRequest.DNSQuery):
     dns_query.evaluation.append({'match': False})
 
 
-def check_for_match(ooi, settings, dns_query: DNSRequest.DNSQuery, record_type):
-    for setting in settings:
-        if ooi == setting[0]:
-            dns_query.evaluation.append(
-                {'record_type': record_type, 'match': True, 'reason': setting[1]})
-            return
+def check_for_match(ooi, ip_reasons: dict, dns_query: DNSRequest.DNSQuery, record_type):
+    if ooi in ip_reasons:
+        dns_query.evaluation.append(
+            {'record_type': record_type, 'match': True, 'reason': ip_reasons[ooi]})
+        return
     dns_query.evaluation.append({'record_type': record_type, 'match': False})
 
 
-def check_ptr_stuff(settings, dns_query: DNSRequest.DNSQuery, record):
-    target = record.target
-    for hint in settings.settings:
-        if any(x in target for x in hint.get('hints', [])):
-            dns_query.evaluation.append(
-                {'record_type': 'PTR', 'match': hint.get('hint_type', 'not specified')})
-            return
+def check_ptr_stuff(ptr_hints: PTRHintMatcher, dns_query: DNSRequest.DNSQuery, record):
+    hint_type = ptr_hints.match(record.target)
+    if hint_type is not None:
+        dns_query.evaluation.append(
+            {'record_type': 'PTR', 'match': hint_type})
+        return
     dns_query.evaluation.append(
         {'record_type': 'PTR', 'match': 'undetermined'})
@@ -28,6 +28,7 @@ class FarsightQuerryResult(BaseScanningResults):
 
 
 class FarsightRequest(BaseScanningRequests):
+    meta = {'indexes': [{'fields': ['ooi', 'url', '-id']}]}
     farsight_querry_results = ListField(LazyReferenceField(FarsightQuerryResult))
     result_counter = IntField(default=0, min_value=0)
     url = URLField()
@@ -31,7 +31,8 @@ class GSBFindings(BaseScanningResults):
 
 
 class GSBRequest(BaseScanningRequests):
-    meta = {'collection': 'gsb_request'}
+    meta = {'collection': 'gsb_request',
+            'indexes': [{'fields': ['ooi', '-id']}]}
     finding_counter = IntField(default=0, min_value=0)
     findings = LazyReferenceField(GSBFindings)
 
@@ -35,7 +35,8 @@ class MaxMindResultASN(MaxMindResult):
 
 
 class MaxMindOfflineRequest(BaseScanningRequests):
-    meta = {'collection': 'max_mind_requests'}
+    meta = {'collection': 'max_mind_requests',
+            'indexes': [{'fields': ['ooi', '-id']}]}
     db_type = StringField()
     errors = ListField(default=None)
     asn = LazyReferenceField(MaxMindResultASN)
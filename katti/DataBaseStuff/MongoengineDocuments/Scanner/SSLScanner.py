@@ -66,13 +66,15 @@ class Certificatenfo(AbstractDynamicalDocument):
 
 
 class SSLScanResult(BaseScanningRequests):
-    meta = {'collection': 'ssl_scan_results'}
+    meta = {'collection': 'ssl_scan_results',
+            'indexes': [{'fields': ['ooi', 'port', 'scan_commands', '-id']}]}
     tls_ssl_scan_results = EmbeddedDocumentListField(TLSResult, default=[])
     certificate_info = LazyReferenceField(Certificatenfo)
     invalid_server_strings = DynamicField()
     sslyze_version = StringField()
     connectivity_error = BooleanField(default=False)
     validation_error = BooleanField(default=None)
+    scan_timeout = BooleanField(default=None)
     port = IntField()
     scan_commands = ListField()
 
@@ -116,3 +118,10 @@ class SSLScannerDB(BaseScannerDocument):
                                                'tls_compression',
                                                'certificate_info',
                                                'tls_1_3_early_data'])
+    # The OOIs of a task are queued into one sslyze Scanner, see SslyzeBatch.
+    max_concurrent_oois = IntField(default=50, min_value=1)
+    per_server_concurrent_connections_limit = IntField(default=5, min_value=1)
+    concurrent_server_scans_limit = IntField(default=20, min_value=1)
+    batch_window_ms = IntField(default=200, min_value=0)
+    # Seconds a worker waits for the result of its OOI, including the time queued behind other batches.
+    scan_timeout = IntField(default=10 * 60, min_value=1)
@@ -96,7 +96,8 @@ class G2Score(BasePDNSEntry):
 
 class PDNSRequest(BaseScanningRequests):
     meta = {'allow_inheritance': True,
-            'collection': 'telekom_pdns_api_requests'}
+            'collection': 'telekom_pdns_api_requests',
+            'indexes': [{'fields': ['ooi', 'endpoint', '-id']}]}
 
     endpoint = StringField(required=True)
     results = ListField(LazyReferenceField(BasePDNSEntry))
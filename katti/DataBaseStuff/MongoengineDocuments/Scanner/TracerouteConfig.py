@@ -4,11 +4,18 @@ from katti.DataBaseStuff.MongoengineDocuments.Scanner.BaseMongoEngineDocument im
 
 
 class TracerouteConfig(BaseScannerDocument):
-    pass
+    # Concurrent traceroute processes per task.
+    max_concurrent_oois = IntField(default=32, min_value=1)
+    # traceroute -w: seconds to wait for a probe response, -m: max TTL
+    probe_wait = IntField(default=3, min_value=1)
+    max_hops = IntField(default=30, min_value=1)
+    # The process is killed after deadline seconds, the hops seen so far are kept.
+    deadline = IntField(default=120, min_value=1)
 
 
 class TracerouteAnswer(BaseScanningRequests):
-    meta = {'collection': 'traceroute_requests'}
+    meta = {'collection': 'traceroute_requests',
+            'indexes': [{'fields': ['ooi', '-id']}]}
     hops = ListField()
     hops_counter = IntField(min_value=0, default=0)
 
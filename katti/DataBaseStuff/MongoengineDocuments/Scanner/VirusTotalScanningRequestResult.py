@@ -24,7 +24,8 @@ class VirusTotalUniversalDomainResult(BaseVirusTotal):
     pass
 
 class VirusTotalScanningRequest(BaseScanningRequests):
-    meta = {'allow_inheritance': True, 'collection': 'virustotal_requests'}
+    meta = {'allow_inheritance': True, 'collection': 'virustotal_requests',
+            'indexes': [{'fields': ['ooi', 'api_endpoint', '-id']}]}
     api_endpoint = StringField(required=True)
     result = LazyReferenceField(BaseVirusTotal)
     own_api_key = StringField(default=None)
@@ -24,7 +24,8 @@ class WhoisResult(BaseScanningResults):
 
 
 class WhoisRequestDB(BaseScanningRequests):
-    meta = {'collection': 'whois_request'}
+    meta = {'collection': 'whois_request',
+            'indexes': [{'fields': ['ooi', '-id']}]}
     result = LazyReferenceField(WhoisResult, default=None)
     error = StringField()
 
@@ -256,6 +256,8 @@ class SinkDBExecutionInformation(BaseScannerExecutionInformation):
 
 
 class PTRRecordExecutionInformation(BaseScannerExecutionInformation):
+    # The oois are CIDRs (input type 'cidrs'), their addresses are created while scanning.
+    cidr_sweep = BooleanField(default=False)
 
     def get_kwargs(self) -> dict:
         return {}
@@ -264,6 +266,9 @@ class PTRRecordExecutionInformation(BaseScannerExecutionInformation):
         self.scanner_id = PTRConfig.get_default_scanner_id()
 
     def get_celery_task_object(self):
+        if self.cidr_sweep:
+            from katti.CeleryApps.ScanningTasks import ptr_sweep_scan
+            return ptr_sweep_scan
         from katti.CeleryApps.ScanningTasks import ptr_scan
         return ptr_scan
 
@@ -1,17 +1,22 @@
-from mongoengine import ObjectIdField, IntField, EmbeddedDocumentListField, EmbeddedDocument, StringField, DynamicField
+from mongoengine import ObjectIdField, IntField, StringField, DictField, DateTimeField
+from katti.DataBaseStuff.MongoengineDocuments.BaseDocuments import AbstractNormalDocument
 from katti.DataBaseStuff.MongoengineDocuments.StatisticDocuments.TaskBaseStatistics import BaseTaskStatistics
 
 
 class ScannerTaskStats(BaseTaskStatistics):
-    class SingleScannerStats(EmbeddedDocument):
-        duration_micro_secs = IntField(required=True)
-        ooi = DynamicField(required=True)
-
-
-    single_scan_ooi_stats = EmbeddedDocumentListField(SingleScannerStats)
+    # {phase: {'count': int, 'sum_micro_secs': int, 'buckets': {log2 bucket: count}}}, see LatencyHistogram
+    latency = DictField()
     scanner_task = StringField(required=True)
     ooi_count = IntField(min_value=0, default=0)
     ooi_left_over = IntField(min_value=0, default=0)
     scanner_id = ObjectIdField(required=True)
 
 
+class ScannerLatencyHistogram(AbstractNormalDocument):
+    """Phase histograms of all tasks of a scanner within one minute. Time series collection, created on setup."""
+    meta = {'collection': 'scanner_latency_histograms'}
+    time_series = {'timeField': 'minute', 'metaField': 'scanner_id', 'granularity': 'minutes'}
+
+    scanner_id = ObjectIdField(required=True)
+    minute = DateTimeField(required=True)
+    phases = DictField()
@@ -9,6 +9,8 @@ class API(EmbeddedDocument):
         endpoint_name = StringField(required=True)
         access = BooleanField(default=False, required=True)
         daily_rate = IntField(min_value=0, required=True, default=10000)
+        minute_rate = IntField(min_value=0, default=0)
+        second_rate = IntField(min_value=0, default=0)
         frontend_minute_rate = IntField(min_value=1, default=100)
 
     key = StringField(min_length=1, max_length=32, required=True)
@@ -13,5 +13,5 @@ def family_mapping_lower(family: str, redis_cache: RedisMongoCache = None):
     except Exception:
         new_family = family
     if redis_cache:
-        redis_cache.insert_value_pair(key=family, value=family.encode(), ttl=2*60)
+        redis_cache.insert_value_pair(key=family, value=new_family.encode(), ttl=2*60)
     return new_family
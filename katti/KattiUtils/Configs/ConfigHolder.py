@@ -19,22 +19,25 @@ class ConfigHolder:
         from katti.RedisCacheLayer.RedisMongoCache import RedisMongoCache
         self._refresh_rate = BASE_CONFIG_REFRESH_RATE
         self.redis_cache = RedisMongoCache()
-        self.config: ConfigDatabase = self.redis_cache.get_mongoengine_cache(cache_key='katti_config',
-                                                                             mongoengine_cls=ConfigDatabase,
-                                                                             mongo_filter={'_cls': ConfigDatabase()._cls},
-                                                                             ttl=0)
+        self.config: ConfigDatabase = self.redis_cache.get_mongoengine_cache_l1(namespace='config',
+                                                                                cache_key='katti_config',
+                                                                                mongoengine_cls=ConfigDatabase,
+                                                                                mongo_filter={'_cls': ConfigDatabase()._cls},
+                                                                                ttl=0)
         if not self.config:
             self.config = ConfigDatabase()
             self.config.save()
+            self.redis_cache.invalidate_cached_document(namespace='config', cache_key='katti_config')
         self.last_refresh = datetime.datetime.utcnow()
         self._system_user: TimeLord | None = None
 
     def get_config_value(self, key):
         if (datetime.datetime.utcnow() - self.last_refresh).total_seconds() > self._refresh_rate:
-            self.config = self.redis_cache.get_mongoengine_cache(cache_key='katti_config',
-                                                                 mongoengine_cls=ConfigDatabase,
-                                                                 mongo_filter={'_cls': ConfigDatabase()._cls},
-                                                                 ttl=0)
+            self.config = self.redis_cache.get_mongoengine_cache_l1(namespace='config',
+                                                                    cache_key='katti_config',
+                                                                    mongoengine_cls=ConfigDatabase,
+                                                                    mongo_filter={'_cls': ConfigDatabase()._cls},
+                                                                    ttl=0)
             self.last_refresh = datetime.datetime.utcnow()
             self._system_user = None
 
@@ -1,5 +1,12 @@
 import os
-from katti.KattiUtils.Configs.ConfigHolder import get_config_holder
+
+
+def get_config_holder(*args, **kwargs):
+    # Imported on first use, the config values are only read inside the lambdas below. So importing a constant from
+    # here doesn't pull in the ConfigHolder and its database documents.
+    from katti.KattiUtils.Configs.ConfigHolder import get_config_holder as config_holder
+    return config_holder(*args, **kwargs)
+
 
 LONG_TERM_TASK_RESTART = lambda: get_config_holder().get_config_value('long_term_task_restart')
 CRAWLING_REQUEST_CACHE_TIME = lambda: get_config_holder().get_config_value('crawling_request_cache_time')
@@ -22,7 +29,14 @@ MAIL_HOST = lambda: get_config_holder('mail_host')
 
 SCANNING_TASKS_COUNTDOWN_DEFAULT = 10
 DEFAULT_SYSTEM_QUEUE_PRIO = 5
+STALE_REFRESH_QUEUE_PRIO = 0
+STALE_REFRESH_DEDUP_TTL = 10*60
+QUOTA_MAX_INLINE_WAIT = 2
+RATE_LIMIT_RETRY_AFTER_DEFAULT = 60
+SSLYZE_MAX_PARALLEL_BATCHES = 4
+LATENCY_HISTOGRAM_TTL = 24*60*60
+RECENT_DNS_RECORD_TTL = 10*60
 CRAWLER_DEFAULT_QUEUE = 'crawler'
 CRAWLER_DNS_PRE_CHECK_QUEUE = 'fast_lane'
-TASK_EXECUTION_INPUT_TYPES: list[str] = ['ipv6', 'ips', 'ipv4', 'domains', 'urls', 'hash', 'object_ids', 'NaN']
+TASK_EXECUTION_INPUT_TYPES: list[str] = ['ipv6', 'ips', 'ipv4', 'cidrs', 'domains', 'urls', 'hash', 'object_ids', 'NaN']
 KATTI_I_AM_HOME_FLAG = os.path.expanduser('~/katti_home')
@@ -37,6 +37,11 @@ class Redis:
     port: int
     password: str
     host: str
+    cache_codec: str = 'bson'  # bson | msgpack
+    cache_compression: str = 'auto'  # auto (zstd, zlib as fallback) | zlib | none
+    cache_compression_threshold: int = 1024
+    # Only while pickled cache entries of older versions are still in Redis.
+    cache_allow_pickle: bool = False
 
 
 @dataclass(config=PydanticConfig)
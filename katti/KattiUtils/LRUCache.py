@@ -1,9 +1,14 @@
-from collections import MutableMapping, OrderedDict
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
 
 """
 The following Code is base on: https://stackoverflow.com/questions/2437617/how-to-limit-the-size-of-a-dictionary
 """
 
+_MISSING = object()
+
 class LRUCache(MutableMapping):
     def __init__(self, maxlen, items=None):
         self._maxlen = maxlen
@@ -35,4 +40,62 @@ class LRUCache(MutableMapping):
             return self.d.__iter__()
 
     def __len__(self):
-            return len(self.d)
\ No newline at end of file
+            return len(self.d)
+
+
+class TTLLRUCache(LRUCache):
+    """LRUCache with a TTL per entry and hit/miss counters. Thread safe, the L1 invalidation listener runs in its
+    own thread."""
+
+    def __init__(self, maxlen, ttl: float, items=None):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        super().__init__(maxlen, items)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self.d.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self.d[key]
+                self.misses += 1
+                return default
+            self.d.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            super().__setitem__(key, (time.monotonic() + self.ttl, value))
+
+    def __delitem__(self, key):
+        with self._lock:
+            super().__delitem__(key)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self.d))
+
+    def __len__(self):
+        with self._lock:
+            return len(self.d)
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self.d.clear()
+            else:
+                self.d.pop(key, None)
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self.d), 'maxlen': self.maxlen, 'ttl': self.ttl}
@@ -0,0 +1,96 @@
+import contextlib
+import threading
+import time
+from collections import defaultdict
+
+
+def bucket_for_micro_secs(duration_micro_secs: int) -> int:
+    """Log2 bucket: bucket b holds durations in [2^(b-1), 2^b) micro seconds, bucket 0 everything below 1us."""
+    return max(int(duration_micro_secs), 0).bit_length()
+
+
+class LatencyHistogram:
+    """Log2 histograms of durations per phase. Small enough to be kept per task and summed up in Redis."""
+
+    def __init__(self):
+        self.buckets: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.counts: dict[str, int] = defaultdict(int)
+        self.sums_micro_secs: dict[str, int] = defaultdict(int)
+        # Async workers record from their threads too.
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return sum(self.counts.values())
+
+    def record(self, phase: str, seconds: float):
+        micro_secs = int(seconds * 1_000_000)
+        with self._lock:
+            self.buckets[phase][bucket_for_micro_secs(micro_secs)] += 1
+            self.counts[phase] += 1
+            self.sums_micro_secs[phase] += micro_secs
+
+    def clear(self):
+        self.buckets.clear()
+        self.counts.clear()
+        self.sums_micro_secs.clear()
+
+    def to_son(self) -> dict:
+        return {phase: {'count': self.counts[phase],
+                        'sum_micro_secs': self.sums_micro_secs[phase],
+                        'buckets': {str(bucket): count for bucket, count in sorted(buckets.items())}}
+                for phase, buckets in self.buckets.items()}
+
+    def add_to_pipeline(self, pipe, key: str):
+        """HINCRBY of all counters into one hash, fields: <phase>:<bucket>, <phase>:count, <phase>:sum_micro_secs"""
+        for phase, buckets in self.buckets.items():
+            for bucket, count in buckets.items():
+                pipe.hincrby(key, f'{phase}:{bucket}', count)
+            pipe.hincrby(key, f'{phase}:count', self.counts[phase])
+            pipe.hincrby(key, f'{phase}:sum_micro_secs', self.sums_micro_secs[phase])
+
+    @staticmethod
+    def son_from_redis_hash(raw_hash: dict) -> dict:
+        phases = {}
+        for field, value in raw_hash.items():
+            phase, metric = (field.decode() if isinstance(field, bytes) else field).rsplit(':', 1)
+            x = phases.setdefault(phase, {'count': 0, 'sum_micro_secs': 0, 'buckets': {}})
+            if metric.isdigit():
+                x['buckets'][metric] = int(value)
+            else:
+                x[metric] = int(value)
+        return phases
+
+
+def percentile_from_buckets(buckets: dict, percentile: float) -> float | None:
+    """Upper bound in seconds of the bucket that contains the percentile (0-1)."""
+    total = sum(buckets.values())
+    if total == 0:
+        return None
+    seen = 0
+    for bucket, count in sorted(buckets.items(), key=lambda x: int(x[0])):
+        seen += count
+        if seen >= percentile * total:
+            return (1 << int(bucket)) / 1_000_000
+    return None
+
+
+class PhaseTimer:
+    """Measures phases into a histogram. Nested phases are subtracted from the outer one, so every phase only
+    counts its own time. One timer per worker, the histogram may be shared."""
+
+    def __init__(self, histogram: LatencyHistogram):
+        self.histogram = histogram
+        self._stack: list[float] = []
+
+    @contextlib.contextmanager
+    def measure(self, phase: str):
+        start = time.perf_counter()
+        self._stack.append(0.0)
+        try:
+            yield
+        finally:
+            nested = self._stack.pop()
+            duration = time.perf_counter() - start
+            if self._stack:
+                self._stack[-1] += duration
+            self.histogram.record(phase, duration - nested)
@@ -0,0 +1,122 @@
+import datetime
+import pickle
+import struct
+import zlib
+import bson
+from bson import ObjectId, SON
+from bson.codec_options import CodecOptions
+from katti.KattiUtils.Exceptions.RedisCacheExceptions import CacheFailure
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Header: format version, codec id, compression id. Entries without header are pickles from older versions,
+# every pickle protocol >= 2 starts with 0x80.
+FORMAT_VERSION = 1
+PICKLE_PROTOCOL_MARKER = 0x80
+# Marks a lookup that found nothing in Mongo, never produced by encode().
+NEGATIVE_ENTRY = b'\x00'
+
+CODEC_BSON = 1
+CODEC_MSGPACK = 2
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_ZSTD = 2
+
+MSGPACK_EXT_OBJECT_ID = 1
+MSGPACK_EXT_DATETIME = 2
+
+BSON_CODEC_OPTIONS = CodecOptions(document_class=SON)
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, ObjectId):
+        return msgpack.ExtType(MSGPACK_EXT_OBJECT_ID, obj.binary)
+    if isinstance(obj, datetime.datetime):
+        # Same precision as BSON: milliseconds, naive UTC.
+        if obj.tzinfo:
+            obj = obj.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+        return msgpack.ExtType(MSGPACK_EXT_DATETIME, struct.pack('>q', (obj - EPOCH) // datetime.timedelta(milliseconds=1)))
+    raise TypeError(f'Unknown type {type(obj)}')
+
+
+def _msgpack_ext_hook(code, data):
+    if code == MSGPACK_EXT_OBJECT_ID:
+        return ObjectId(data)
+    if code == MSGPACK_EXT_DATETIME:
+        return EPOCH + datetime.timedelta(milliseconds=struct.unpack('>q', data)[0])
+    return msgpack.ExtType(code, data)
+
+
+class CacheCodec:
+    """Encodes mongo documents for Redis: BSON (default) or msgpack, compressed with zstd (zlib if zstandard is missing)
+    when the payload is larger than compression_threshold. Pickled entries of older versions are only decoded with
+    allow_pickle, otherwise they count as misses (see decodable)."""
+
+    def __init__(self, codec: str = 'bson', compression: str = 'auto', compression_threshold: int = 1024,
+                 allow_pickle: bool = False):
+        match codec:
+            case 'msgpack' if msgpack:
+                self._codec_id = CODEC_MSGPACK
+            case _:
+                self._codec_id = CODEC_BSON
+        match compression:
+            case 'none':
+                self._compression_id = COMPRESSION_NONE
+            case 'zlib':
+                self._compression_id = COMPRESSION_ZLIB
+            case _:
+                self._compression_id = COMPRESSION_ZSTD if zstandard else COMPRESSION_ZLIB
+        self.compression_threshold = compression_threshold
+        self.allow_pickle = allow_pickle
+        self._zstd_compressor = zstandard.ZstdCompressor(level=3) if zstandard else None
+        self._zstd_decompressor = zstandard.ZstdDecompressor() if zstandard else None
+
+    def encode(self, doc) -> bytes:
+        codec_id = self._codec_id
+        if codec_id == CODEC_MSGPACK:
+            try:
+                payload = msgpack.packb(doc, default=_msgpack_default, use_bin_type=True)
+            except TypeError:
+                codec_id = CODEC_BSON
+        if codec_id == CODEC_BSON:
+            payload = bson.encode(doc)
+        compression_id = COMPRESSION_NONE
+        if len(payload) > self.compression_threshold:
+            compression_id = self._compression_id
+            if compression_id == COMPRESSION_ZSTD:
+                payload = self._zstd_compressor.compress(payload)
+            elif compression_id == COMPRESSION_ZLIB:
+                payload = zlib.compress(payload)
+        return bytes((FORMAT_VERSION, codec_id, compression_id)) + payload
+
+    def decodable(self, value: bytes) -> bool:
+        return self.allow_pickle or not value[0] == PICKLE_PROTOCOL_MARKER
+
+    def decode(self, value: bytes):
+        if value[0] == PICKLE_PROTOCOL_MARKER:
+            if not self.allow_pickle:
+                raise CacheFailure('Pickled cache entries are not allowed.')
+            return pickle.loads(value)
+        if not value[0] == FORMAT_VERSION:
+            raise CacheFailure(f'Unknown cache format version {value[0]}')
+        codec_id, compression_id, payload = value[1], value[2], value[3:]
+        if compression_id == COMPRESSION_ZSTD:
+            if not self._zstd_decompressor:
+                raise CacheFailure('zstandard is not installed.')
+            payload = self._zstd_decompressor.decompress(payload)
+        elif compression_id == COMPRESSION_ZLIB:
+            payload = zlib.decompress(payload)
+        if codec_id == CODEC_MSGPACK:
+            if not msgpack:
+                raise CacheFailure('msgpack is not installed.')
+            return msgpack.unpackb(payload, ext_hook=_msgpack_ext_hook, raw=False, strict_map_key=False)
+        return bson.decode(payload, codec_options=BSON_CODEC_OPTIONS)
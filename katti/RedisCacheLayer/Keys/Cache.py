@@ -0,0 +1,9 @@
+cache_written_stats_key = 'cache_written_stats'
+
+cache_written_field = lambda prefix, metric: f'{prefix}:{metric}'
+
+cache_negative_hits_key = 'cache_negative_hits'
+
+l1_invalidation_channel = 'l1_invalidation'
+
+scanner_document_cache_key = lambda scanner_id: f'scanner_document{scanner_id}'
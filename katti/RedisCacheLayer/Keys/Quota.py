@@ -0,0 +1,3 @@
+token_bucket_key = lambda owner, window: f'token_bucket{owner}{window}'
+
+pacing_key = lambda owner: f'pacing{owner}'
@@ -0,0 +1,20 @@
+result_ready_channel = lambda cache_key: f'result_ready{cache_key}'
+
+stale_refresh_key = lambda cache_key: f'stale_refresh{cache_key}'
+
+RESULT_READY = b'1'
+RESULT_RELEASED = b'0'
+
+latency_histogram_member = lambda scanner_id, minute: f'{scanner_id}:{minute}'
+
+latency_histogram_key = lambda member: f'latency_histogram{member}'
+
+latency_histogram_index_key = 'latency_histograms'
+
+name_server_stats_key = lambda window: f'name_server_stats{window}'
+
+dns_chain_answer_key = lambda scanner_id, name, record_type, dnssec: f'dns_chain_answer{scanner_id}{name}{record_type}{dnssec}'
+
+dns_nxdomain_key = lambda scanner_id, name: f'dns_nxdomain{scanner_id}{name}'
+
+recent_dns_record_key = lambda record_id: f'recent_dns_record{record_id}'
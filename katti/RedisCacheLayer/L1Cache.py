@@ -0,0 +1,60 @@
+import threading
+from katti.KattiUtils.LRUCache import TTLLRUCache
+from katti.RedisCacheLayer.Keys.Cache import l1_invalidation_channel
+
+"""
+In-process cache in front of RedisMongoCache for lookups that hardly ever change. Every worker process has its own
+namespaces. Invalidations are broadcast over Redis pub/sub to all processes.
+"""
+
+L1_NAMESPACE_SETTINGS = {'time_lord': {'maxlen': 1024, 'ttl': 5 * 60},
+                         'scanner_document': {'maxlen': 256, 'ttl': 5 * 60},
+                         'config': {'maxlen': 8, 'ttl': 60},
+                         'malware_family': {'maxlen': 4096, 'ttl': 10 * 60}}
+L1_DEFAULT_SETTINGS = {'maxlen': 1024, 'ttl': 60}
+
+L1_NAMESPACES: dict[str, TTLLRUCache] = {}
+_LISTENER = None
+_LISTENER_LOCK = threading.Lock()
+
+
+def get_l1_namespace(namespace: str) -> TTLLRUCache:
+    if namespace not in L1_NAMESPACES:
+        L1_NAMESPACES[namespace] = TTLLRUCache(**L1_NAMESPACE_SETTINGS.get(namespace, L1_DEFAULT_SETTINGS))
+        _start_invalidation_listener()
+    return L1_NAMESPACES[namespace]
+
+
+def get_l1_stats() -> dict:
+    return {namespace: cache.stats for namespace, cache in L1_NAMESPACES.items()}
+
+
+def invalidate_l1_local(namespace: str, key: str | None = None):
+    if namespace in L1_NAMESPACES:
+        L1_NAMESPACES[namespace].invalidate(key)
+
+
+def broadcast_l1_invalidation(redis_connection, namespace: str, key: str | None = None):
+    invalidate_l1_local(namespace, key)
+    redis_connection.publish(l1_invalidation_channel, f'{namespace}|{key if key else ""}')
+
+
+def _handle_invalidation(message):
+    namespace, key = message['data'].decode().split('|', 1)
+    invalidate_l1_local(namespace, key if key else None)
+
+
+def _start_invalidation_listener():
+    """Lazy, so the thread is started in the (forked) worker process that uses the cache."""
+    global _LISTENER
+    with _LISTENER_LOCK:
+        if _LISTENER and _LISTENER.is_alive():
+            return
+        from katti.RedisCacheLayer.RedisMongoCache import set_up_connection
+        try:
+            pubsub = set_up_connection().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{l1_invalidation_channel: _handle_invalidation})
+            _LISTENER = pubsub.run_in_thread(sleep_time=1, daemon=True)
+        except Exception:
+            # Without listener the TTL bounds the staleness.
+            _LISTENER = None
@@ -1,3 +1,4 @@
+import concurrent.futures
 import datetime
 import pickle
 from types import NoneType
@@ -9,8 +10,20 @@ from katti.KattiUtils.Configs.ConfigurationClass import DatabaseConfigs
 from bson import ObjectId
 from katti.KattiUtils.Exceptions.RedisCacheExceptions import CacheFailure
 from katti.KattiUtils.Configs.pydanticStuff import PydanticConfig
+from katti.RedisCacheLayer.Codecs import CacheCodec, NEGATIVE_ENTRY
+from katti.RedisCacheLayer.L1Cache import get_l1_namespace, broadcast_l1_invalidation
+from katti.RedisCacheLayer.Keys.Cache import cache_written_stats_key, cache_written_field, cache_negative_hits_key
 
 REDIS_CONNECTION: redis.Redis | None = None
+CACHE_CODEC: CacheCodec | None = None
+
+NEGATIVE_CACHE_TTL = 30
+NEGATIVE_HITS_FLUSH_SIZE = 100
+# Mongo queries saved by negative entries, per key prefix; pushed to Redis in batches.
+NEGATIVE_HITS: dict[str, int] = {}
+# Newest document per cache miss, one limit(1) query each, run in parallel.
+CACHE_MANY_MAX_PARALLEL_QUERIES = 8
+QUERY_EXECUTOR: concurrent.futures.ThreadPoolExecutor | None = None
 
 
 @dataclass(config=PydanticConfig)
@@ -32,6 +45,19 @@ def set_up_connection(manual: ManualConnectionSettings | None = None) -> redis.R
     return REDIS_CONNECTION
 
 
+def get_cache_codec() -> CacheCodec:
+    global CACHE_CODEC
+    if not CACHE_CODEC:
+        config = DatabaseConfigs.get_config()
+        if config:
+            CACHE_CODEC = CacheCodec(codec=config.redis.cache_codec, compression=config.redis.cache_compression,
+                                     compression_threshold=config.redis.cache_compression_threshold,
+                                     allow_pickle=config.redis.cache_allow_pickle)
+        else:
+            CACHE_CODEC = CacheCodec()
+    return CACHE_CODEC
+
+
 def disconnect_redis():
     global REDIS_CONNECTION
     if REDIS_CONNECTION:
@@ -40,10 +66,19 @@ def disconnect_redis():
         except:
             pass
 
+def get_query_executor() -> concurrent.futures.ThreadPoolExecutor:
+    global QUERY_EXECUTOR
+    if not QUERY_EXECUTOR:
+        QUERY_EXECUTOR = concurrent.futures.ThreadPoolExecutor(max_workers=CACHE_MANY_MAX_PARALLEL_QUERIES,
+                                                               thread_name_prefix='cache_many')
+    return QUERY_EXECUTOR
+
+
 class RedisMongoCache:
     def __init__(self, manual_con_data: ManualConnectionSettings = None):
         self._connection = set_up_connection(manual=manual_con_data)
         self._redis_lock = None
+        self._codec = get_cache_codec()
 
     @property
     def redis_connection(self):
@@ -78,19 +113,73 @@ class RedisMongoCache:
         return self._connection.setnx(key, value)
 
 
-    def get_mongoengine_cache(self, cache_key: str, mongoengine_cls, mongo_filter=None, ttl=10*60, as_son=False):
+    def _set_encoded(self, pipe, cache_key, doc, prefix: str, ttl=0):
+        value = self._codec.encode(doc)
+        pipe.set(cache_key, value, ex=ttl if ttl > 0 else None)
+        pipe.hincrby(cache_written_stats_key, cache_written_field(prefix, 'bytes'), len(value))
+        pipe.hincrby(cache_written_stats_key, cache_written_field(prefix, 'count'), 1)
+
+    def _set_negative(self, pipe, cache_key, negative_ttl=NEGATIVE_CACHE_TTL):
+        # NX: never replace a result that was written in the meantime.
+        pipe.set(cache_key, NEGATIVE_ENTRY, ex=negative_ttl, nx=True)
+
+    def _count_negative_hits(self, prefix: str, hits: int = 1):
+        NEGATIVE_HITS[prefix] = NEGATIVE_HITS.get(prefix, 0) + hits
+        if sum(NEGATIVE_HITS.values()) >= NEGATIVE_HITS_FLUSH_SIZE:
+            self.flush_negative_hits()
+
+    def flush_negative_hits(self):
+        if len(NEGATIVE_HITS) == 0:
+            return
+        pipe = self._connection.pipeline(transaction=False)
+        for prefix, hits in NEGATIVE_HITS.items():
+            pipe.hincrby(cache_negative_hits_key, prefix, hits)
+        NEGATIVE_HITS.clear()
+        pipe.execute()
+
+    def get_negative_hit_stats(self) -> dict:
+        """Mongo queries saved by negative entries per key prefix (collection name), local counts included."""
+        stats = {prefix.decode(): int(hits) for prefix, hits in self._connection.hgetall(cache_negative_hits_key).items()}
+        for prefix, hits in NEGATIVE_HITS.items():
+            stats[prefix] = stats.get(prefix, 0) + hits
+        return stats
+
+    def get_cache_written_stats(self) -> dict:
+        """Bytes and entries written per key prefix (collection name): {prefix: {'bytes': int, 'count': int}}.
+        Counters only grow, expired and evicted entries are not subtracted, so this is the write volume and not the
+        memory in use."""
+        stats = {}
+        for field, value in self._connection.hgetall(cache_written_stats_key).items():
+            prefix, metric = field.decode().rsplit(':', 1)
+            stats.setdefault(prefix, {})[metric] = int(value)
+        return stats
+
+    def get_mongoengine_cache(self, cache_key: str, mongoengine_cls, mongo_filter=None, ttl=10*60, as_son=False,
+                              negative_ttl=NEGATIVE_CACHE_TTL):
         try:
             object_as_dict = self.get_value(key=cache_key)
+            if object_as_dict and not self._codec.decodable(object_as_dict):
+                # Pickled entry of an older version: read from Mongo, the new entry replaces it.
+                object_as_dict = None
+            if object_as_dict == NEGATIVE_ENTRY:
+                if not isinstance(mongo_filter, NoneType):
+                    self._count_negative_hits(mongoengine_cls._get_collection_name())
+                return None
             if object_as_dict and not as_son:
-                x = mongoengine_cls._from_son(pickle.loads(object_as_dict))
+                x = mongoengine_cls._from_son(self._codec.decode(object_as_dict))
                 return x
             elif object_as_dict:
-                return pickle.loads(object_as_dict)
+                return self._codec.decode(object_as_dict)
             if not isinstance(mongo_filter, NoneType):
                 x = list(mongoengine_cls.objects(**mongo_filter).limit(1).order_by('-id').as_pymongo())
+                pipe = self._connection.pipeline(transaction=False)
                 if len(x) == 0:
+                    if negative_ttl > 0:
+                        self._set_negative(pipe, cache_key, negative_ttl)
+                        pipe.execute()
                     return None
-                self.insert_value_pair(key=cache_key, value=pickle.dumps(x[0]), ttl=ttl)
+                self._set_encoded(pipe, cache_key, x[0], prefix=mongoengine_cls._get_collection_name(), ttl=ttl)
+                pipe.execute()
                 return mongoengine_cls._from_son(x[0]) if not as_son else x[0]
             else:
                 return None
@@ -98,8 +187,83 @@ class RedisMongoCache:
             raise CacheFailure(e)
 
 
+    def get_mongoengine_cache_l1(self, namespace: str, cache_key: str, mongoengine_cls, mongo_filter=None, ttl=10*60,
+                                 as_son=False):
+        """get_mongoengine_cache with an in-process cache in front. Only found documents are kept in L1."""
+        l1 = get_l1_namespace(namespace)
+        son = l1.get(cache_key)
+        if son is None:
+            son = self.get_mongoengine_cache(cache_key=cache_key, mongoengine_cls=mongoengine_cls,
+                                             mongo_filter=mongo_filter, ttl=ttl, as_son=True)
+            if son is None:
+                return None
+            l1[cache_key] = son
+        return son if as_son else mongoengine_cls._from_son(son)
+
+    def invalidate_cached_document(self, namespace: str, cache_key: str):
+        """Call it after the document has changed: drops the Redis entry and the L1 entries of all workers."""
+        self._connection.delete(cache_key)
+        broadcast_l1_invalidation(self._connection, namespace=namespace, key=cache_key)
+
+    def get_mongoengine_cache_many(self, cache_keys_filters: dict[str, dict], mongoengine_cls, ttl=10*60,
+                                   negative_ttl=NEGATIVE_CACHE_TTL) -> dict:
+        """Bulk version of get_mongoengine_cache: one MGET for all keys and parallel limit(1) queries for the misses.
+        Returns {cache_key: SON | None}."""
+        if len(cache_keys_filters) == 0:
+            return {}
+        try:
+            cache_keys = list(cache_keys_filters.keys())
+            results = {}
+            misses = {}
+            negative_hits = 0
+            for cache_key, value in zip(cache_keys, self._connection.mget(cache_keys)):
+                if value == NEGATIVE_ENTRY:
+                    results[cache_key] = None
+                    negative_hits += 1
+                elif value and self._codec.decodable(value):
+                    results[cache_key] = self._codec.decode(value)
+                else:
+                    misses[cache_key] = cache_keys_filters[cache_key]
+            if negative_hits > 0:
+                self._count_negative_hits(mongoengine_cls._get_collection_name(), negative_hits)
+            if len(misses) == 0:
+                return results
+            docs = get_query_executor().map(lambda mongo_filter: self._newest_doc(mongoengine_cls, mongo_filter),
+                                            misses.values())
+            pipe = self._connection.pipeline(transaction=False)
+            for cache_key, doc in zip(misses.keys(), docs):
+                results[cache_key] = doc
+                if doc:
+                    self._set_encoded(pipe, cache_key, doc, prefix=mongoengine_cls._get_collection_name(), ttl=ttl)
+                elif negative_ttl > 0:
+                    self._set_negative(pipe, cache_key, negative_ttl)
+            pipe.execute()
+            return results
+        except Exception as e:
+            raise CacheFailure(e)
+
+    @staticmethod
+    def _newest_doc(mongoengine_cls, mongo_filter: dict) -> dict | None:
+        return next(iter(mongoengine_cls.objects(**mongo_filter).order_by('-id').limit(1).as_pymongo()), None)
+
     def set_mongoengine_object(self, mongoengine_object, cache_key, ttl=180):
-        self.insert_value_pair(key=cache_key, value=pickle.dumps(mongoengine_object.to_mongo()), ttl=ttl)
+        self.set_mongoengine_objects([(mongoengine_object, cache_key, ttl)])
+
+    def set_mongoengine_objects(self, objects_keys_ttls: list[tuple], publish: list[tuple] | None = None):
+        """Sets (mongoengine_object, cache_key, ttl) tuples and publishes (channel, message) tuples afterwards,
+        with one pipeline round trip."""
+        if len(objects_keys_ttls) == 0 and not publish:
+            return
+        pipe = self.redis_connection.pipeline(transaction=False)
+        for mongoengine_object, cache_key, ttl in objects_keys_ttls:
+            self._set_encoded(pipe, cache_key, mongoengine_object.to_mongo(),
+                              prefix=mongoengine_object._get_collection_name(), ttl=ttl)
+        for channel, message in publish if publish else []:
+            pipe.publish(channel, message)
+        pipe.execute()
+
+    def publish(self, channel: str, message):
+        self._connection.publish(channel, message)
 
     def save_mongoengine_object_and_set_cache(self, mongoengine_obj, cache_key, ttl=0):
         mongoengine_obj.save()
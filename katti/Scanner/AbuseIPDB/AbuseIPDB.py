@@ -1,8 +1,8 @@
+import datetime
 import hashlib
 import ipaddress
 import json
 import typing
-import requests
 from bson import ObjectId
 
 from katti.DataBaseStuff.MongoengineDocuments.ScannerExecutionInformation import BaseScannerExecutionInformation, \
@@ -86,29 +86,33 @@ class AbuseIPDBScanner(BaseScanner):
     def scanner_has_quota() -> bool:
         return True
 
-    def _do_your_scanning_job(self):
-        response = requests.get(f'{self.scanner_document.url}',
-                                params={'ipAddress': str(self.next_ooi_obj.ooi),
-                                        'verbose': True,
-                                        'maxAgeInDays': self.scanning_request.max_age_days},
-                                headers={
-                                    'Key': self.scanner_document.api_key,
-                                    'Accept': 'application/json'}
-                                )
-        match response.status_code:
+    async def _do_your_scanning_job(self):
+        async with self.http_session.get(f'{self.scanner_document.url}',
+                                         params={'ipAddress': str(self.next_ooi_obj.ooi),
+                                                 'verbose': 'True',
+                                                 'maxAgeInDays': self.scanning_request.max_age_days},
+                                         headers={
+                                             'Key': self.scanner_document.api_key,
+                                             'Accept': 'application/json'}
+                                         ) as response:
+            content = await response.read()
+        match response.status:
             case 200:
-                self._produce_response(json.loads(response.content.decode())['data'])
+                with self.phase_timer.measure('parse'):
+                    self._produce_response(json.loads(content.decode())['data'])
                 self._update_remaining_quota(response.headers)
             case 429:
                 self.quota.set_remaining_quota(0)
                 raise DayBlockException()
             case _:
-                self.logger.error(f'Bad status code {response.status_code} {self.next_ooi_obj.ooi}')
-                self.scanning_result.errors = json.loads(response.content)
+                self.logger.error(f'Bad status code {response.status} {self.next_ooi_obj.ooi}')
+                self.scanning_result.errors = json.loads(content)
 
     def _update_remaining_quota(self, response_headers):
         if response_headers.get('X-RateLimit-Remaining'):
-            self.quota.set_remaining_quota(response_headers.get('X-RateLimit-Remaining'))
+            reset = response_headers.get('X-RateLimit-Reset')
+            self.quota.set_remaining_quota(response_headers.get('X-RateLimit-Remaining'),
+                                           window_end=datetime.datetime.fromtimestamp(int(reset), tz=datetime.timezone.utc) if reset and reset.isdigit() else None)
 
 
     def _produce_response(self, raw_json):
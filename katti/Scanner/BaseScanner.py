@@ -1,5 +1,8 @@
+import asyncio
+import copy
 import datetime
 import hashlib
+import inspect
 import logging
 import pickle
 import sys
@@ -9,6 +12,7 @@ import typing
 from abc import abstractmethod, ABC
 from dataclasses import InitVar
 from random import randint
+import aiohttp
 from celery import Task
 from katti.DataBaseStuff.MongoengineDocuments.ScannerExecutionInformation import BaseScannerExecutionInformation
 from katti.KattiUtils.Exceptions.CommonExtensions import ExtremeFailure
@@ -25,6 +29,14 @@ from katti.Scanner.QuotaMechanic import QuotaMechanic, MinuteBlockException, Day
 import katti.redis_lock as redis_lock
 from bson import ObjectId, SON
 from katti.RedisCacheLayer.RedisMongoCache import RedisMongoCache
+from katti.Scanner.ResultWriteBuffer import ResultWriteBuffer
+from katti.RedisCacheLayer.Keys.Scanner import result_ready_channel, RESULT_READY, RESULT_RELEASED, stale_refresh_key, \
+    latency_histogram_member, latency_histogram_key, latency_histogram_index_key
+from katti.KattiUtils.Configs.ConfigKeys import STALE_REFRESH_QUEUE_PRIO, STALE_REFRESH_DEDUP_TTL, QUOTA_MAX_INLINE_WAIT, \
+    LATENCY_HISTOGRAM_TTL
+from katti.KattiUtils.LatencyHistogram import LatencyHistogram, PhaseTimer
+from katti.RedisCacheLayer.Keys.Cache import scanner_document_cache_key
+from katti.KattiUtils.Exceptions.RedisCacheExceptions import CacheFailure
 from katti.DataBaseStuff.MongoengineDocuments.Scanner.BaseMongoEngineDocument import BaseScannerDocument, \
     BaseScanningRequests, ErrorParking
 
@@ -69,6 +81,7 @@ class BaseScanningRequestForScannerObject(ABC):
     ownership_as_son: SON = Field(default=None)
     meta_data_as_son: SON | None = Field(default=None)
     time_valid_response: int = Field(qe=0, default=3600)
+    stale_while_revalidate: int = Field(ge=0, default=0)
     offline: bool = False
     quota_exception_day_retry: bool = True
     max_day_retries: int = 7
@@ -134,6 +147,11 @@ class BaseScanningRequestForScannerObject(ABC):
     def force(self) -> bool:
         return True if self.time_valid_response <= 0 else False
 
+    def copy_for_oois(self, oois: list[OOI]):
+        x = copy.copy(self)
+        x.oois = oois
+        return x
+
     @field_validator('oois')
     def check_oois(cls, v):
         ooi_cls = cls.ooi_cls()
@@ -163,7 +181,14 @@ class BaseScanner(metaclass=ScannerRegistryBase):
 
         self.quota_exception_minute = False
         self.quota_exception_day = False
+        self._quota_wait_time: float | None = None
         self._time_valid_response = 0
+        self._prefetched_cache: dict = {}
+        self._result_buffer: ResultWriteBuffer | None = None
+        self.http_session: aiohttp.ClientSession | None = None
+        self.sub_scan_results = []
+        self.latency = LatencyHistogram()
+        self.phase_timer = PhaseTimer(self.latency)
         self._init()
 
     def _init(self):
@@ -213,6 +238,7 @@ class BaseScanner(metaclass=ScannerRegistryBase):
 
     @abstractmethod
     def _do_your_scanning_job(self):
+        """Can be declared async, then max_concurrent_oois OOIs of a task are scanned at once (use self.http_session)."""
         pass
 
     @staticmethod
@@ -246,7 +272,10 @@ class BaseScanner(metaclass=ScannerRegistryBase):
                 pass
             else:
                 raise NotUniqueError(f'Only one default scanner is allowed. {new_scanner_db.to_mongo()}')
-        return BaseScannerDocument.objects(__raw__={'_cls': new_scanner_db._cls, 'name': new_scanner_db.name}).modify(__raw__={'$set':as_son}, new=True, upsert=True)
+        scanner_db = BaseScannerDocument.objects(__raw__={'_cls': new_scanner_db._cls, 'name': new_scanner_db.name}).modify(__raw__={'$set':as_son}, new=True, upsert=True)
+        RedisMongoCache().invalidate_cached_document(namespace='scanner_document',
+                                                     cache_key=scanner_document_cache_key(scanner_db.id))
+        return scanner_db
 
 
     @property
@@ -257,6 +286,11 @@ class BaseScanner(metaclass=ScannerRegistryBase):
     def bulk_scanner(self) -> bool:
         return False
 
+    @property
+    def async_scanner(self) -> bool:
+        """Scanners with an async _do_your_scanning_job are executed concurrently on one event loop."""
+        return inspect.iscoroutinefunction(self._do_your_scanning_job)
+
     @property
     def additional_filter_fields(self) -> dict:
         return {}
@@ -275,6 +309,14 @@ class BaseScanner(metaclass=ScannerRegistryBase):
     def _redis_lock_name(self):
         return str(hashlib.md5(f'lock._{self._filter_dict}'.encode()).hexdigest())
 
+    @property
+    def _stale_while_revalidate(self) -> int:
+        if self.bulk_scanner or self.scanning_request.force:
+            return 0
+        if self.scanning_request.stale_while_revalidate > 0:
+            return self.scanning_request.stale_while_revalidate
+        return self.scanner_document.stale_while_revalidate if self.scanner_document else 0
+
     @property
     def get_last_valid_result_filter(self) -> dict:
         x = self._filter_dict
@@ -283,7 +325,7 @@ class BaseScanner(metaclass=ScannerRegistryBase):
         else:
             #TODO: Why not ttl?!?!?!?!
             x.update({'_id': {'$gte': ObjectId.from_datetime(
-                (datetime.datetime.utcnow() - datetime.timedelta(seconds=self.scanning_request.time_valid_response)))}})
+                (datetime.datetime.utcnow() - datetime.timedelta(seconds=self._max_time_valid + self._stale_while_revalidate)))}})
             return x
 
     @property
@@ -326,58 +368,186 @@ class BaseScanner(metaclass=ScannerRegistryBase):
         return str(ooi if ooi else self.next_ooi_obj.ooi)
 
     def set_up(self, scanner_id: ObjectId):
-        self.scanner_document = self.get_scanner_mongo_document_class().objects.get(id=scanner_id)
+        self.scanner_document = self.redis_cache.get_mongoengine_cache_l1(namespace='scanner_document',
+                                                                          cache_key=scanner_document_cache_key(scanner_id),
+                                                                          mongoengine_cls=self.get_scanner_mongo_document_class(),
+                                                                          mongo_filter={'id': scanner_id})
+        if not self.scanner_document:
+            raise DoesNotExist(f'No scanner document with id {scanner_id}')
+        self._result_buffer = ResultWriteBuffer(redis_cache=self.redis_cache, logger=self.logger,
+                                                max_size=self.scanner_document.result_buffer_size)
 
     def _set_up_quota(self):
-        if self.__class__.scanner_has_quota() and not self.quota:
-            self.quota = QuotaMechanic(cache_key=str(self.scanner_document.id))
+        rates = {'second': self.scanner_document.rate_per_second,
+                 'minute': self.scanner_document.rate_per_minute,
+                 'day': self.scanner_document.rate_per_day}
+        if (self.__class__.scanner_has_quota() or any(rates.values())) and not self.quota:
+            self.quota = QuotaMechanic(cache_key=str(self.scanner_document.id), rates=rates)
 
-    def scan(self, scanning_request, next_ooi: OOI):
+    def _set_scanning_request(self, scanning_request):
         self.scanning_request = scanning_request
         self._set_up_quota()
         if self.scanning_request.time_valid_response and self.scanning_request.time_valid_response > 0:
             self._time_valid_response = self.scanning_request.time_valid_response
+
+    def prepare_chunk(self, scanning_request):
+        """Called once per task before the first OOI is scanned."""
+        self._set_scanning_request(scanning_request)
+        self._prefetch_cache()
+
+    def _prefetch_cache(self):
+        """Resolves the cache lookups of all OOIs of the chunk with one MGET and one $or query."""
+        self._prefetched_cache = {}
+        if self.scanning_request.offline or self.scanning_request.force or self.bulk_scanner:
+            return
+        cache_keys_filters = {}
+        for ooi in self.scanning_request.oois:
+            self.next_ooi_obj = ooi
+            cache_keys_filters[self._redis_cache_key] = self.get_last_valid_result_filter
+        self.next_ooi_obj = None
+        try:
+            self._prefetched_cache = self.redis_cache.get_mongoengine_cache_many(cache_keys_filters=cache_keys_filters,
+                                                                                 mongoengine_cls=self.get_result_class())
+        except CacheFailure:
+            self.logger.error(f'Cache prefetch failed, fall back to single lookups.\n{traceback.format_exception(*sys.exc_info())}')
+
+    def spawn_worker(self):
+        """Copy for one concurrent OOI slot. It shares the scanner document, quota, cache and result buffer."""
+        worker = copy.copy(self)
+        worker.scanning_result = None
+        worker.next_ooi_obj = None
+        worker._redis_lock = None
+        worker.retry_args = {}
+        worker.phase_timer = PhaseTimer(self.latency)
+        return worker
+
+    def scan(self, scanning_request, next_ooi: OOI):
+        self._set_scanning_request(scanning_request)
         self.next_ooi_obj = next_ooi
         self.scanning_result = None
+        self.sub_scan_results = []
         try:
             if self.scanning_request.offline:
                 self.offline_mode()
             elif self.scanning_request.force or self.bulk_scanner:
                 self._process_scanning_request()
+            elif self._serve_from_cache():
+                self._update_tags()
             else:
-                self._get_redis_or_mongo_db_cache()
-                if self.scanning_result:
-                    if self._check_cache_not_too_old():
-                        self._update_tags()
-                    else:
-                        self._process_scanning_request()
-                else:
-                    self._process_scanning_request()
+                self._process_scanning_request()
         except (RetryException, LongTermRetryException):
             raise
         except Exception:
             self.logger.error(traceback.format_exception(*sys.exc_info()))
             raise
         finally:
-            if self._redis_lock:
-                try:
-                    self._redis_lock.release()
-                except Exception:
-                    pass
+            self._finish_scan()
+
+    async def async_scan(self, scanning_request, next_ooi: OOI):
+        self._set_scanning_request(scanning_request)
+        self.next_ooi_obj = next_ooi
+        self.scanning_result = None
+        self.sub_scan_results = []
+        try:
+            if self.scanning_request.offline:
+                offline = self.offline_mode()
+                if inspect.isawaitable(offline):
+                    await offline
+            elif self.scanning_request.force or self.bulk_scanner:
+                await self._process_scanning_request_async()
+            elif await asyncio.to_thread(self._serve_from_cache):
+                await asyncio.to_thread(self._update_tags)
+            else:
+                await self._process_scanning_request_async()
+        except (RetryException, LongTermRetryException):
+            raise
+        except Exception:
+            self.logger.error(traceback.format_exception(*sys.exc_info()))
+            raise
+        finally:
+            await asyncio.to_thread(self._finish_scan)
+
+    def _serve_from_cache(self) -> bool:
+        """True for a fresh cached result and for a stale one inside the stale_while_revalidate window. The latter
+        triggers a background refresh."""
+        with self.phase_timer.measure('cache_lookup'):
+            self._get_redis_or_mongo_db_cache()
+        if not self.scanning_result:
+            return False
+        if self._check_cache_not_too_old():
+            return True
+        if self._check_cache_not_too_old(extra_seconds=self._stale_while_revalidate):
+            self._enqueue_refresh()
+            return True
+        return False
+
+    def _enqueue_refresh(self):
+        if not self.redis_cache.redis_connection.set(stale_refresh_key(self._redis_cache_key), 1,
+                                                     ex=STALE_REFRESH_DEDUP_TTL, nx=True):
+            return
+        refresh_request = self.scanning_request.copy_for_oois([self.next_ooi_obj])
+        refresh_request.time_valid_response = 0
+        refresh_request.stale_while_revalidate = 0
+        refresh_request.backwards_propagation = None
+        refresh_request.long_term_retry_parent_task = None
+        try:
+            self.get_celery_config()[1].apply_async(args=(refresh_request,), priority=STALE_REFRESH_QUEUE_PRIO)
+        except Exception:
+            self.redis_cache.delete(stale_refresh_key(self._redis_cache_key))
+            self.logger.error(f'Stale refresh not possible.\n{traceback.format_exception(*sys.exc_info())}')
+
+    def _finish_scan(self):
+        if self._redis_lock:
             try:
-                self.finally_stuff()
+                self._redis_lock.release()
             except Exception:
                 pass
-            if self.scanning_result and self.scanning_request.backwards_propagation:
-                db = get_db('Katti')
-                for backward_propagation in self.scanning_request.backwards_propagation:
-                    db[backward_propagation.collection].update_many(
-                        {'_id': {'$in': self._get_backwards_propagation_id(backward_propagation)}},
-                        {'$push': {f'backpropagation.{backward_propagation.field_name}': self.scanning_result.id}})
+            else:
+                # No result was handed to the buffer, waiting workers scan themselves.
+                self.redis_cache.publish(result_ready_channel(self._redis_cache_key), RESULT_RELEASED)
+        try:
+            self.finally_stuff()
+        except Exception:
+            pass
+        if self.scanning_result and self.scanning_request.backwards_propagation:
+            for backward_propagation in self.scanning_request.backwards_propagation:
+                self._result_buffer.add_backpropagation(collection=backward_propagation.collection,
+                                                        ids=self._get_backwards_propagation_id(backward_propagation),
+                                                        field_name=backward_propagation.field_name,
+                                                        result_id=self.scanning_result.id)
 
     def finally_stuff(self):
         pass
 
+    def add_bulk_ops(self, collection: str, ops: list):
+        """Writes ops together with the next result buffer flush, immediately if there is no buffer."""
+        if len(ops) == 0:
+            return
+        if self._result_buffer is not None:
+            self._result_buffer.add_bulk_ops(collection, ops)
+        else:
+            get_db('Katti')[collection].bulk_write(ops, ordered=False)
+
+    def flush_result_buffer(self):
+        """Called at the end of a task, also on retry and soft time limit."""
+        if self._result_buffer is not None:
+            with self.phase_timer.measure('db_write'):
+                self._result_buffer.flush()
+
+    def push_latency_histogram(self) -> dict:
+        """Adds the phase histograms of the task to the per minute aggregate of the scanner in Redis,
+        returns them as SON for the task statistics."""
+        son = self.latency.to_son()
+        if len(self.latency) > 0:
+            member = latency_histogram_member(self.scanner_document.id, int(time.time()) // 60 * 60)
+            pipe = self.redis_cache.redis_connection.pipeline(transaction=False)
+            self.latency.add_to_pipeline(pipe, latency_histogram_key(member))
+            pipe.expire(latency_histogram_key(member), LATENCY_HISTOGRAM_TTL)
+            pipe.sadd(latency_histogram_index_key, member)
+            pipe.execute()
+        self.latency.clear()
+        return son
+
     def _build_scanning_result(self):
         self.scanning_result = self.get_result_class().build_new_request(meta_data=self.meta_data_as_son,
                                                                        id=ObjectId(),
@@ -386,58 +556,116 @@ class BaseScanner(metaclass=ScannerRegistryBase):
                                                                        ownership=self.scanning_request.get_ownership_obj,
                                                                        **self.kwargs_for_building_scanning_request)
 
+    def _acquire_ooi_lock(self) -> bool:
+        if self.bulk_scanner:
+            return True
+        self._redis_lock = redis_lock.Lock(self.redis_cache.redis_connection, name=self._redis_lock_name,
+                                           expire=self.scanner_document.max_wait_time_for_cache)
+        return self._redis_lock.acquire(blocking=False)
+
     def _process_scanning_request(self):
         self._quota_exception = False
         self._api_error_exception = False
+        self._quota_wait_time = None
         try:
             self._build_scanning_result()
             self._check_quota()
-            self._redis_lock = redis_lock.Lock(self.redis_cache.redis_connection, name=self._redis_lock_name,
-                                               expire=self.scanner_document.max_wait_time_for_cache) if not self.bulk_scanner else None
-            if self.bulk_scanner or self._redis_lock.acquire():
-                self._do_your_scanning_job()
-            elif not self._wait_for_valid_result():
-                self._do_your_scanning_job()
-        except (QMinute, MinuteBlockException) as e:
-            self.logger.debug(f'Quota block: {e}')
-            self.quota_exception_minute = True
-            self.scanning_result.quota_exception = f'{e}'
-        except (QDay, DayBlockException) as e:
-            self.quota_exception_day = True
-            self.logger.debug(f'Quota block: {e}')
-            self.scanning_result.quota_exception = f'{e}'
-        except APIErrorException as e:
-            self.scanning_result.api_error = e.text
-            self._api_error_exception = True
+            if self._acquire_ooi_lock() or not self._wait_for_valid_result():
+                self._pace_api_call()
+                with self.phase_timer.measure('external'):
+                    self._do_your_scanning_job()
+        except (QMinute, MinuteBlockException, QDay, DayBlockException, APIErrorException) as e:
+            self._handle_scanning_block(e)
+        finally:
+            with self.phase_timer.measure('db_write'):
+                self._save_new_scanning_result()
+
+    async def _process_scanning_request_async(self):
+        self._quota_exception = False
+        self._api_error_exception = False
+        self._quota_wait_time = None
+        cancelled = False
+        try:
+            self._build_scanning_result()
+            await self._check_quota_async()
+            if await asyncio.to_thread(self._acquire_ooi_lock) or not await asyncio.to_thread(self._wait_for_valid_result):
+                await self._pace_api_call_async()
+                with self.phase_timer.measure('external'):
+                    await self._do_your_scanning_job()
+        except (QMinute, MinuteBlockException, QDay, DayBlockException, APIErrorException) as e:
+            self._handle_scanning_block(e)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
         finally:
-            self._save_new_scanning_result()
+            if not cancelled:
+                with self.phase_timer.measure('db_write'):
+                    await asyncio.to_thread(self._save_new_scanning_result)
+
+    def _handle_scanning_block(self, e: Exception):
+        match e:
+            case QMinute() | MinuteBlockException():
+                self.logger.debug(f'Quota block: {e}')
+                self.quota_exception_minute = True
+                self._quota_wait_time = e.wait_time
+                self.scanning_result.quota_exception = f'{e}'
+            case QDay() | DayBlockException():
+                self.quota_exception_day = True
+                self._quota_wait_time = e.wait_time
+                self.logger.debug(f'Quota block: {e}')
+                self.scanning_result.quota_exception = f'{e}'
+            case APIErrorException():
+                self.scanning_result.api_error = e.text
+                self._api_error_exception = True
+
+    def _result_time_valid(self, scanning_result) -> int | None:
+        """Freshness in seconds if it depends on the result itself (e.g. DNS TTLs), None: time_valid_response."""
+        return None
+
+    @property
+    def _max_time_valid(self) -> int:
+        """Upper bound of _result_time_valid, the age window of the DB lookup."""
+        return self.scanning_request.time_valid_response
 
-    def _check_cache_not_too_old(self, ):
-        if not self.scanning_result or not (datetime.datetime.utcnow() - self.scanning_result.katti_create).total_seconds() < self._time_valid_response:
+    def _check_cache_not_too_old(self, extra_seconds: int = 0):
+        if not self.scanning_result:
+            return False
+        time_valid = self._result_time_valid(self.scanning_result)
+        time_valid = self._time_valid_response if time_valid is None else time_valid
+        if not (datetime.datetime.utcnow() - self.scanning_result.katti_create).total_seconds() < time_valid + extra_seconds:
             return False
         return True
 
     def _get_redis_or_mongo_db_cache(self):
+        if self._redis_cache_key in self._prefetched_cache:
+            cache = self._prefetched_cache.pop(self._redis_cache_key)
+            self.scanning_result = self.get_result_class()._from_son(cache) if cache else None
+            return
         self.scanning_result = self.redis_cache.get_mongoengine_cache(mongoengine_cls=self.get_result_class(),
                                                                       cache_key=self._redis_cache_key,
                                                                       mongo_filter=self.get_last_valid_result_filter)
 
-    def _save_scanning_result_to_redis(self):
-        self.redis_cache.set_mongoengine_object(cache_key=self._redis_cache_key,
-                                                mongoengine_object=self.scanning_result,
-                                                ttl=self.scanner_document.time_valid_response)
-
     def _save_new_scanning_result(self):
         if self.scanning_result and not (self.quota_exception_minute or self.quota_exception_day or self._api_error_exception):
-            self.scanning_result.save()
-            if not self.bulk_scanner:
-                self._save_scanning_result_to_redis()
+            if self.bulk_scanner:
+                self._result_buffer.add_result(self.scanning_result)
+            else:
+                # The buffer caches and publishes the result and releases the lock right away, Mongo follows with the flush.
+                time_valid = self._result_time_valid(self.scanning_result)
+                self._result_buffer.add_result(self.scanning_result,
+                                               cache_key=self._redis_cache_key,
+                                               ttl=(self.scanner_document.time_valid_response if time_valid is None else time_valid) + self.scanner_document.stale_while_revalidate,
+                                               lock=self._redis_lock)
+                self._redis_lock = None
 
         elif self.scanning_result and self.quota_exception_day:
             if self.scanning_request.quota_exception_day_retry:
-                time_now = datetime.datetime.utcnow()
-                x = (time_now + datetime.timedelta(days=1)).replace(hour=3, minute=30)
-                wait_time = (x - time_now).total_seconds()
+                if self._quota_wait_time:
+                    wait_time = self._quota_wait_time
+                else:
+                    time_now = datetime.datetime.utcnow()
+                    x = (time_now + datetime.timedelta(days=1)).replace(hour=3, minute=30)
+                    wait_time = (x - time_now).total_seconds()
                 self.retry_args.update({'countdown': wait_time})
                 raise LongTermRetryException()
             self._error_save_result()
@@ -445,7 +673,7 @@ class BaseScanner(metaclass=ScannerRegistryBase):
 
         elif self.scanning_result and self.quota_exception_minute:
             if self.scanning_request.quota_exception_minute_retry:
-                self.retry_args.update({'countdown': randint(90, 300)})
+                self.retry_args.update({'countdown': self._quota_wait_time if self._quota_wait_time else randint(90, 300)})
                 raise RetryException()
             self._error_save_result()
           #  raise MinuteBlockException()
@@ -465,12 +693,35 @@ class BaseScanner(metaclass=ScannerRegistryBase):
         ErrorParking._get_collection().insert_one(x)
 
     def _wait_for_valid_result(self):
-        start_wait_time = datetime.datetime.now()
-        while (datetime.datetime.now() - start_wait_time).seconds < self.scanner_document.max_wait_time_for_cache:
+        new_scanning_result = self.scanning_result
+        with self.phase_timer.measure('lock_wait'):
+            if self._wait_for_published_result():
+                return True
+        self.scanning_result = new_scanning_result
+        return False
+
+    def _wait_for_published_result(self):
+        """Blocks on the result channel of the OOI until the lock holder has written its result or gave up."""
+        pubsub = self.redis_cache.redis_connection.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(result_ready_channel(self._redis_cache_key))
+        try:
+            # The result may have been published before the subscription was active.
             self._get_redis_or_mongo_db_cache()
             if self.scanning_result and self._check_cache_not_too_old():
                 return True
-            time.sleep(0.33)
+            deadline = time.monotonic() + self.scanner_document.max_wait_time_for_cache
+            while (timeout := deadline - time.monotonic()) > 0:
+                message = pubsub.get_message(timeout=timeout)
+                if not message:
+                    continue
+                if message['data'] == RESULT_READY:
+                    self.scanning_result = self.redis_cache.get_mongoengine_cache(mongoengine_cls=self.get_result_class(),
+                                                                                  cache_key=self._redis_cache_key)
+                    return bool(self.scanning_result) and self._check_cache_not_too_old()
+                self.logger.debug('Lock holder has no result.')
+                return False
+        finally:
+            pubsub.close()
         self.logger.debug('I have wait to long for the result.')
         return False
 
@@ -478,11 +729,52 @@ class BaseScanner(metaclass=ScannerRegistryBase):
         if self.meta_data_as_son:
             self.scanning_result.update_exiting_request_in_db(self.meta_data_as_son)
 
+    def _can_wait_for_quota(self, e: MinuteBlockException) -> bool:
+        return bool(e.wait_time) and e.wait_time <= QUOTA_MAX_INLINE_WAIT
+
     def _check_quota(self):
+        """Short waits of the second and minute buckets are slept here, longer ones end in a retry."""
+        with self.phase_timer.measure('quota'):
+            for check in (self._check_user_quota, self._check_scanner_quota):
+                while True:
+                    try:
+                        check()
+                        break
+                    except MinuteBlockException as e:
+                        if not self._can_wait_for_quota(e):
+                            raise
+                        time.sleep(e.wait_time)
+
+    async def _check_quota_async(self):
+        """The quota checks are Redis (and on first use Mongo) round trips, they run in a thread."""
+        with self.phase_timer.measure('quota'):
+            for check in (self._check_user_quota, self._check_scanner_quota):
+                while True:
+                    try:
+                        await asyncio.to_thread(check)
+                        break
+                    except MinuteBlockException as e:
+                        if not self._can_wait_for_quota(e):
+                            raise
+                        await asyncio.sleep(e.wait_time)
+
+    def _pace_api_call(self):
+        """Spreads the remaining quota reported by the provider over its window, see QuotaMechanic.pace."""
+        if self.quota:
+            with self.phase_timer.measure('quota'):
+                time.sleep(self.quota.pace(max_wait=QUOTA_MAX_INLINE_WAIT))
+
+    async def _pace_api_call_async(self):
+        if self.quota:
+            with self.phase_timer.measure('quota'):
+                await asyncio.sleep(await asyncio.to_thread(self.quota.pace, max_wait=QUOTA_MAX_INLINE_WAIT))
+
+    def _check_user_quota(self):
         if not self.scanning_request.api_request:
             #Quota check -> API!
             if not self.user_quota:
-                time_lord = self.redis_cache.get_mongoengine_cache(
+                time_lord = self.redis_cache.get_mongoengine_cache_l1(
+                    namespace='time_lord',
                     cache_key=str(self.scanning_request.ownership_as_son['owner']),
                     mongoengine_cls=TimeLord,
                     mongo_filter={'id': self.scanning_request.ownership_as_son['owner']},
@@ -494,8 +786,7 @@ class BaseScanner(metaclass=ScannerRegistryBase):
                 self.user_quota.set_endpoint(time_lord['api'].get('endpoints', []),
                                              endpoint_=self.__class__.get_scanner_type())
             self.user_quota.enough_quota(self.scanning_request.quota_amount)
-        if not self.quota:
-            return
-        else:
-            self.quota.check_day_block()
-            self.quota.check_minute_block()
+
+    def _check_scanner_quota(self):
+        if self.quota:
+            self.quota.take(self.scanning_request.quota_amount)
@@ -0,0 +1,66 @@
+import asyncio
+import copy
+import ipaddress
+import dns.resolver
+from katti.Scanner.DNS.Helpers import reverse_ip
+from katti.Scanner.DNS.ResolverBackends import DnsPythonBackend, DEFAULT_QUERY_TIMEOUT
+
+DEFAULT_MAX_IN_FLIGHT = 100
+
+
+class DNSBLEngine:
+    """Async DNSBL and PTR lookups against one resolver. All scanners of the process that use the resolver share the
+    engine: one in-flight limit and one running query per name and record type, which later callers join."""
+
+    def __init__(self, name_server: str, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+        self.name_server = name_server
+        self.max_in_flight = max_in_flight
+        self._backend = DnsPythonBackend()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._slots: asyncio.Semaphore | None = None
+        self._in_flight: dict[tuple[str, str], asyncio.Future] = {}
+
+    def _slot(self) -> asyncio.Semaphore:
+        # Semaphores and futures belong to the event loop of the task.
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+            self._in_flight = {}
+        return self._slots
+
+    async def _query(self, slot: asyncio.Semaphore, name: str, record_type: str, timeout: float) -> dict:
+        async with slot:
+            return await self._backend.query_async(name=name, record_type=record_type, name_server=self.name_server,
+                                                   timeout=timeout)
+
+    async def query(self, name: str, record_type: str, timeout: float = DEFAULT_QUERY_TIMEOUT) -> dict:
+        """Response as jc dig dict. Raises ResolverTimeout."""
+        slot = self._slot()
+        key = (name.lower(), record_type)
+        if not key in self._in_flight:
+            self._in_flight[key] = asyncio.ensure_future(self._query(slot, name, record_type, timeout))
+            self._in_flight[key].add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Callers modify the response (DNSQuery.build_response).
+        return copy.deepcopy(await asyncio.shield(self._in_flight[key]))
+
+    async def dnsbl(self, ip, zone: str, record_type: str = 'A') -> dict:
+        return await self.query(f'{reverse_ip(ip)}.{zone}', record_type)
+
+    async def ptr(self, ip) -> dict:
+        return await self.query(ipaddress.ip_address(str(ip)).reverse_pointer, 'PTR')
+
+
+_engines: dict[str, DNSBLEngine] = {}
+
+
+def get_dnsbl_engine(name_server: str | None, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT) -> DNSBLEngine:
+    """Engine of the process for the resolver, None: first name server of the system resolver. Scanners with
+    different limits for the same resolver share the highest one, it applies from the next event loop on."""
+    if not name_server:
+        name_server = dns.resolver.get_default_resolver().nameservers[0]
+    if not name_server in _engines:
+        _engines[name_server] = DNSBLEngine(name_server, max_in_flight)
+    engine = _engines[name_server]
+    engine.max_in_flight = max(engine.max_in_flight, max_in_flight)
+    return engine
@@ -1,6 +1,8 @@
+import asyncio
 import copy
-import subprocess
+import json
 import sys
+import time
 import traceback
 import typing
 from bson import ObjectId
@@ -8,14 +10,56 @@ from bson import ObjectId
 from katti.DataBaseStuff.MongoengineDocuments.ScannerExecutionInformation import BaseScannerExecutionInformation, \
     DNSExecutionInformation
 from katti.KattiUtils.Configs.pydanticStuff import PydanticConfig
-from katti.Scanner.Helpers import preexec_function
 from katti.KattiUtils.HelperFunctions import is_valid_domain
 from pydantic import Field, field_validator
 from pydantic.dataclasses import dataclass
-import katti.jc as jc
 from katti.DataBaseStuff.MongoengineDocuments.Scanner.BaseMongoEngineDocument import BaseScannerDocument
 from katti.Scanner.BaseScanner import BaseScanner, BaseScanningRequestForScannerObject, OOI
-from katti.DataBaseStuff.MongoengineDocuments.Scanner.DNSServerConfig import DNSRequest, DNSConfig
+from katti.DataBaseStuff.MongoengineDocuments.Scanner.DNSServerConfig import DNSRequest, DNSConfig, DNSRecord
+from katti.Scanner.DNS.ResolverBackends import get_resolver_backend, ResolverTimeout
+from katti.Scanner.DNS.NameServerStats import NameServerStats, DEFAULT_HEDGE_DELAY
+from katti.Scanner.DNS.RecentRecords import RecentDNSRecords
+from katti.RedisCacheLayer.Keys.Scanner import dns_chain_answer_key, dns_nxdomain_key
+
+NXDOMAIN_CUT_DEFAULT_TTL = 60
+NXDOMAIN_CUT_MAX_TTL = 5 * 60
+
+
+def chain_answers(response_data: dict) -> dict[str, dict]:
+    """Responses for the targets of a CNAME chain, taken from the answer section: {target name: response}.
+    Only complete chains, i.e. ending with records of the queried type."""
+    question = response_data.get('question', {})
+    if question.get('type') in ('ANY', 'CNAME', None):
+        return {}
+    by_name = {}
+    for record in response_data.get('answer', []):
+        by_name.setdefault(record['name'].lower(), []).append(record)
+    chain = []
+    name = question['name'].lower()
+    while name in by_name and not name in (x[0] for x in chain):
+        chain.append((name, by_name[name]))
+        cname = next((record for record in by_name[name] if record['type'] == 'CNAME'), None)
+        if not cname:
+            break
+        name = cname['data'].lower()
+    if len(chain) < 2 or not any(record['type'] == question['type'] for record in chain[-1][1]):
+        return {}
+    responses = {}
+    for i in range(1, len(chain)):
+        answer = [dict(record) for _, records in chain[i:] for record in records]
+        responses[chain[i][0]] = dict(response_data, question=dict(question, name=chain[i][0]), answer=answer,
+                                      answer_num=len(answer), query_time=0)
+    return responses
+
+
+def fqdn(name: str) -> str:
+    return f'{name.lower().rstrip(".")}.'
+
+
+def parent_names(name: str) -> list[str]:
+    """Parents of the name without the TLD, nearest first: a.b.example.com. -> [b.example.com., example.com.]"""
+    labels = fqdn(name).rstrip('.').split('.')
+    return [f'{".".join(labels[i:])}.' for i in range(1, len(labels) - 1)]
 
 
 @dataclass(config=PydanticConfig)
@@ -115,21 +159,203 @@ class DNSResolver(BaseScanner):
     def _dig_type(self):
         return self.next_ooi_obj.any_failed_dig_type if self.next_ooi_obj.any_failed_dig_type else self.scanning_request.dig_type
 
-    def _do_your_scanning_job(self):
+    def _init(self):
+        self._name_server_slots: dict[str, asyncio.Semaphore] = {}
+        self._name_server_stats = NameServerStats(self.redis_cache.redis_connection)
+        self._chain_answers: dict[str, tuple[float, dict]] = {}
+        self._nxdomains: dict[str, tuple[float, int]] = {}
+        self.recent_dns_records = RecentDNSRecords(self.redis_cache.redis_connection)
+
+    def flush_result_buffer(self):
+        self.add_bulk_ops(DNSRecord._get_collection_name(), self.recent_dns_records.touch_ops())
+        try:
+            super().flush_result_buffer()
+        except Exception:
+            self.recent_dns_records.mark_written(flushed=False)
+            raise
+        self.recent_dns_records.mark_written()
+
+    def push_latency_histogram(self) -> dict:
+        self._name_server_stats.push()
+        return super().push_latency_histogram()
+
+    def prepare_chunk(self, scanning_request):
+        super().prepare_chunk(scanning_request)
+        # Semaphores belong to the event loop of the task.
+        self._name_server_slots = {}
+        self._chain_answers = {}
+        self._nxdomains = {}
+
+    def _find_nxdomain_parent(self) -> tuple[str, int] | tuple[None, None]:
+        """Nearest parent known as NXDOMAIN and its negative TTL, local entries first, then one MGET."""
+        parents = parent_names(str(self.next_ooi_obj.ooi))
+        now = time.monotonic()
+        for parent in parents:
+            if parent in self._nxdomains and self._nxdomains[parent][0] > now:
+                return parent, self._nxdomains[parent][1]
+        if len(parents) == 0:
+            return None, None
+        for parent, ttl in zip(parents, self.redis_cache.redis_connection.mget([dns_nxdomain_key(self.scanner_document.id, parent) for parent in parents])):
+            if ttl:
+                self._nxdomains[parent] = (now + int(ttl), int(ttl))
+                return parent, int(ttl)
+        return None, None
+
+    def _set_nxdomain(self, query: DNSRequest.DNSQuery):
+        ttl = min(query.min_dns_ttl if query.min_dns_ttl is not None else NXDOMAIN_CUT_DEFAULT_TTL, NXDOMAIN_CUT_MAX_TTL)
+        if ttl <= 0:
+            return
+        name = fqdn(str(self.next_ooi_obj.ooi))
+        self._nxdomains[name] = (time.monotonic() + ttl, ttl)
+        self.redis_cache.insert_value_pair(dns_nxdomain_key(self.scanner_document.id, name), ttl, ttl=ttl)
+
+    def _answer_from_nxdomain_cut(self) -> bool:
+        parent, ttl = self._find_nxdomain_parent()
+        if not parent:
+            return False
+        self.scanning_result.queries.append(DNSRequest.DNSQuery(status='NXDOMAIN', answer_source='nxdomain_cut',
+                                                                nxdomain_parent=parent.rstrip('.'), min_dns_ttl=ttl,
+                                                                answer_num=0))
+        return True
+
+    def _clamp_ttl(self, ttl: int) -> int:
+        return min(max(ttl, self.scanner_document.ttl_cache_floor), self.scanner_document.ttl_cache_ceiling)
+
+    def _result_time_valid(self, scanning_result) -> int | None:
+        if not self.scanner_document.ttl_cache or len(scanning_result.queries) == 0 or scanning_result.queries[-1].min_dns_ttl is None:
+            return None
+        return self._clamp_ttl(scanning_result.queries[-1].min_dns_ttl)
+
+    @property
+    def _max_time_valid(self) -> int:
+        if self.scanner_document.ttl_cache:
+            return self.scanner_document.ttl_cache_ceiling
+        return super()._max_time_valid
+
+    def _get_chain_answer(self) -> dict | None:
+        key = dns_chain_answer_key(self.scanner_document.id, f'{str(self.next_ooi_obj.ooi).lower().rstrip(".")}.',
+                                   self._dig_type, self.scanning_request.with_dnssec)
+        if key in self._chain_answers and self._chain_answers[key][0] > time.monotonic():
+            return copy.deepcopy(self._chain_answers[key][1])
+        value = self.redis_cache.get_value(key)
+        return json.loads(value) if value else None
+
+    def _set_chain_answers(self, response_data: dict):
+        """Stores the answers for the CNAME targets, later lookups of them in the chunk or within their TTL
+        need no name server."""
+        chain = chain_answers(response_data)
+        if len(chain) == 0:
+            return
+        pipe = self.redis_cache.redis_connection.pipeline(transaction=False)
+        for name, answer in chain.items():
+            ttl = self._clamp_ttl(min(record['ttl'] for record in answer['answer']))
+            if ttl <= 0:
+                continue
+            key = dns_chain_answer_key(self.scanner_document.id, name, self._dig_type, self.scanning_request.with_dnssec)
+            self._chain_answers[key] = (time.monotonic() + ttl, answer)
+            pipe.set(key, json.dumps(answer), ex=ttl)
+        pipe.execute()
+
+    def _answer_from_chain(self) -> bool:
+        response_data = self._get_chain_answer()
+        if not response_data:
+            return False
+        query = DNSRequest.DNSQuery().build_response(response_data,
+                                                     scanner=self,
+                                                     evaluation_settings=self.scanner_document.evaluation,
+                                                     ooi=self.next_ooi_obj.ooi,
+                                                     katti_meta_data=self.meta_data_as_son)
+        query.answer_source = 'cname_chain'
+        query.nameserver_ip = response_data.get('server', '').split('#')[0]
+        self.scanning_result.queries.append(query)
+        return True
+
+    def _name_server_slot(self, name_server: str) -> asyncio.Semaphore:
+        if name_server not in self._name_server_slots:
+            self._name_server_slots[name_server] = asyncio.Semaphore(self.scanner_document.max_in_flight_per_name_server)
+        return self._name_server_slots[name_server]
+
+    async def _query_name_server(self, resolver_backend, name_server: str, cd_flag: bool) -> dict:
+        async with self._name_server_slot(name_server):
+            return await resolver_backend.query_async(name=f'{self.next_ooi_obj.ooi}', record_type=self._dig_type,
+                                                      name_server=name_server,
+                                                      dnssec=self.scanning_request.with_dnssec, cd_flag=cd_flag)
+
+    async def _timed_query(self, resolver_backend, name_server: str, cd_flag: bool) -> dict:
+        start = time.perf_counter()
+        try:
+            response_data = await self._query_name_server(resolver_backend, name_server, cd_flag)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            self._name_server_stats.record_failure(name_server)
+            raise
+        if response_data.get('status', '') == 'SERVFAIL':
+            self._name_server_stats.record_failure(name_server)
+        else:
+            self._name_server_stats.record(name_server, time.perf_counter() - start)
+        return response_data
+
+    def _hedge_delay(self, name_server: str) -> float:
+        if self.scanner_document.hedge_delay_ms > 0:
+            return self.scanner_document.hedge_delay_ms / 1000
+        p95 = self._name_server_stats.p95(name_server)
+        return p95 if p95 else DEFAULT_HEDGE_DELAY
+
+    async def _hedged_query(self, resolver_backend, name_server: str, name_servers: list[str], cd_flag: bool) -> tuple[str, dict]:
+        """Returns (name server, response). With hedge_queries the next name server of the list gets the same query
+        if the first one has not answered after its hedge delay, the first answer without SERVFAIL wins."""
+        primary = asyncio.create_task(self._timed_query(resolver_backend, name_server, cd_flag))
+        if not self.scanner_document.hedge_queries or len(name_servers) == 0:
+            return name_server, await primary
+        done, _ = await asyncio.wait({primary}, timeout=self._hedge_delay(name_server))
+        if done:
+            return name_server, primary.result()
+        hedge_name_server = name_servers.pop(0)
+        pending = {primary: name_server,
+                   asyncio.create_task(self._timed_query(resolver_backend, hedge_name_server, cd_flag)): hedge_name_server}
+        first_failed = None
+        try:
+            while len(pending) > 0:
+                done, _ = await asyncio.wait(pending.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    task_name_server = pending.pop(task)
+                    if not task.exception() and not task.result().get('status', '') == 'SERVFAIL':
+                        return task_name_server, task.result()
+                    if not first_failed:
+                        first_failed = (task_name_server, task)
+        finally:
+            for task in pending:
+                task.cancel()
+        return first_failed[0], first_failed[1].result()
+
+    async def _scan_backup_records(self):
+        """ANY was not answered: the backup record types are scanned in parallel as own requests."""
+        workers = [self.spawn_worker() for _ in self._backup_records]
+        await asyncio.gather(*(worker.async_scan(self.scanning_request,
+                                                 next_ooi=DomainForDNS(raw_ooi=self.next_ooi_obj.ooi,
+                                                                       any_failed_origin_id=self.scanning_result.id,
+                                                                       any_failed_dig_type=record_type))
+                               for worker, record_type in zip(workers, self._backup_records)))
+        self.sub_scan_results.extend(worker.scanning_result for worker in workers if worker.scanning_result)
+
+    async def _do_your_scanning_job(self):
         self._backup_records = self.scanner_document.any_backup_records
         #raise RetryException()
-        name_servers = copy.deepcopy(self.scanner_document.name_server_ips)
+        if self.scanner_document.nxdomain_cut and self._answer_from_nxdomain_cut():
+            return
+        if self.scanner_document.ttl_cache and not self._dig_type == 'ANY' and self._answer_from_chain():
+            return
+        resolver_backend = get_resolver_backend(self.scanner_document.resolver_backend)
+        name_servers = self._name_server_stats.order(copy.deepcopy(self.scanner_document.name_server_ips))
         next_name_server = name_servers.pop(0)
         servfail = 0
-        if self.scanning_request.with_dnssec:
-            cmd_list = ['dig', '+dnssec', f'@{next_name_server}', f'{self.next_ooi_obj.ooi}', self._dig_type]
-        else:
-            cmd_list = ['dig', f'@{next_name_server}', f'{self.next_ooi_obj.ooi}', self._dig_type]
+        cd_flag = False
         while True:
             try:
-                cmd_output = subprocess.check_output(cmd_list, text=True, timeout=15, preexec_fn=preexec_function)
-                data = jc.parse('dig', cmd_output)
-            except subprocess.TimeoutExpired:
+                next_name_server, response_data = await self._hedged_query(resolver_backend, next_name_server,
+                                                                           name_servers, cd_flag)
+            except ResolverTimeout:
                 self.logger.info(f'Timeout: {self.next_ooi_obj.ooi}')
                 query = DNSRequest.DNSQuery(status='TIMEOUT')
                 #raise RetryException()
@@ -138,13 +364,14 @@ class DNSResolver(BaseScanner):
                 query = DNSRequest.DNSQuery(status='DIGFAIL')
             else:
                 try:
-                    response_data = data[0]
                     if response_data.get('status', '') == 'SERVFAIL':
                         servfail += 1
                         query = DNSRequest.DNSQuery(status='SERVFAIL')
                         if self.scanning_request.with_dnssec:
-                            cmd_list.append('+cdflag')
+                            cd_flag = True
                     else:
+                        if self.scanner_document.ttl_cache and response_data.get('status', '') == 'NOERROR':
+                            self._set_chain_answers(response_data)
                         query = DNSRequest.DNSQuery().build_response(response_data,
                                                                      scanner=self,
                                                                      evaluation_settings=self.scanner_document.evaluation,
@@ -167,10 +394,7 @@ class DNSResolver(BaseScanner):
 
                 case 'SERVFAIL' if servfail > 1 and self.scanning_request.dig_type == 'ANY'\
                                    and not self.scanning_request.ignore_fail and not self.next_ooi_obj.any_failed_origin_id:
-                    for record_type in self._backup_records:
-                        self.scanning_request.oois.append(DomainForDNS(raw_ooi=self.next_ooi_obj.ooi,
-                                                                       any_failed_origin_id=self.scanning_result.id,
-                                                                       any_failed_dig_type=record_type))
+                    await self._scan_backup_records()
                     break
 
                 case 'SERVFAIL' if servfail > 1:
@@ -180,20 +404,19 @@ class DNSResolver(BaseScanner):
                 case 'SERVFAIL':
                     pass
 
-                case 'NOERROR' if self.scanning_request.dig_type == 'ANY' and len(query.records) == 1 and query.records[0].fetch().record_type == 'HINFO' and not self.next_ooi_obj.any_failed_origin_id :
-                    for record_type in self._backup_records:
-                        self.scanning_request.oois.append(DomainForDNS(raw_ooi=self.next_ooi_obj.ooi,
-                                                                       any_failed_origin_id=self.scanning_result.id,
-                                                                       any_failed_dig_type=record_type))
+                # RFC 8482 reply. The type comes from the response, the record itself is only written with the flush.
+                case 'NOERROR' if self.scanning_request.dig_type == 'ANY' and len(response_data.get('answer', [])) == 1 and response_data['answer'][0]['type'] == 'HINFO' and not self.next_ooi_obj.any_failed_origin_id :
+                    await self._scan_backup_records()
                     break
 
+                case 'NXDOMAIN' if self.scanner_document.nxdomain_cut and not query.records:
+                    # With answer records the NXDOMAIN belongs to the end of a CNAME chain, not to the OOI.
+                    self._set_nxdomain(query)
+                    break
                 case 'NXDOMAIN' | 'NOERROR' | 'NOTIMP' | 'REFUSED':
                     break
             next_name_server = name_servers.pop(0) if len(name_servers) > 0 else None
             if next_name_server:
-                if self.scanning_request.with_dnssec:
-                    cmd_list = ['dig', '+dnssec', f'@{next_name_server}', f'{self.next_ooi_obj.ooi}', self._dig_type]
-                else:
-                    cmd_list = ['dig', f'@{next_name_server}', f'{self.next_ooi_obj.ooi}', self._dig_type]
+                cd_flag = False
             else:
                 break
@@ -0,0 +1,110 @@
+import hashlib
+from collections import deque
+import bson
+
+
+class AhoCorasick:
+    """Substring search for many patterns in one pass over the text. Every pattern has a value, the search returns
+    the lowest value of all patterns found in the text."""
+
+    def __init__(self, patterns: dict[str, int]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[int | None] = [None]
+        for pattern, value in patterns.items():
+            node = 0
+            for char in pattern:
+                if not char in self._goto[node]:
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(None)
+                    self._goto[node][char] = len(self._goto) - 1
+                node = self._goto[node][char]
+            self._out[node] = value if self._out[node] is None else min(self._out[node], value)
+        self._build_fail_links()
+
+    def _build_fail_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and not char in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                fail_out = self._out[self._fail[child]]
+                if fail_out is not None and (self._out[child] is None or fail_out < self._out[child]):
+                    self._out[child] = fail_out
+                queue.append(child)
+
+    def lowest_value(self, text: str) -> int | None:
+        node = 0
+        # The empty pattern matches every text.
+        lowest = self._out[0]
+        for char in text:
+            while node and not char in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            value = self._out[node]
+            if value is not None and (lowest is None or value < lowest):
+                lowest = value
+                if lowest == 0:
+                    break
+        return lowest
+
+
+class PTRHintMatcher:
+    """The hint groups of a ptr_stuff evaluation, the first group (in order) with a hint in the target wins."""
+
+    def __init__(self, hint_groups: list[dict]):
+        self._hint_types = [hint_group.get('hint_type', 'not specified') for hint_group in hint_groups]
+        patterns = {}
+        for index, hint_group in enumerate(hint_groups):
+            for hint in hint_group.get('hints', []):
+                patterns.setdefault(hint, index)
+        self._automaton = AhoCorasick(patterns)
+
+    def match(self, target: str) -> str | None:
+        index = self._automaton.lowest_value(target)
+        return None if index is None else self._hint_types[index]
+
+
+class CompiledEvaluation:
+    """Evaluation settings of a scanner document prepared for lookups: {ip: reason} per a_record/aaaa_record
+    evaluation and an Aho-Corasick automaton for the PTR hints."""
+
+    def __init__(self, evaluations: list):
+        self.quad9 = False
+        self.ip_reasons: dict[str, list[dict[str, str]]] = {'A': [], 'AAAA': []}
+        self.ptr_hints: PTRHintMatcher | None = None
+        for evaluation in evaluations:
+            match evaluation.type:
+                case 'quad9':
+                    self.quad9 = True
+                case 'a_record' | 'aaaa_record':
+                    ip_reasons = {}
+                    for setting in evaluation.settings:
+                        ip_reasons.setdefault(setting[0], setting[1])
+                    self.ip_reasons['A' if evaluation.type == 'a_record' else 'AAAA'].append(ip_reasons)
+                case 'ptr_stuff':
+                    self.ptr_hints = PTRHintMatcher(evaluation.settings)
+
+
+def _fingerprint(evaluations: list) -> str:
+    return hashlib.md5(bson.encode({'evaluations': [evaluation.to_mongo() for evaluation in evaluations]})).hexdigest()
+
+
+# scanner document id -> (evaluation list, fingerprint, compiled)
+_compiled_evaluations: dict = {}
+
+
+def get_compiled_evaluation(scanner_document_id, evaluations: list) -> CompiledEvaluation:
+    """Compiled once per scanner document and recompiled when its evaluation settings change. For the list object
+    seen last the lookup is free, a new list (e.g. the document was reloaded) costs one fingerprint."""
+    cached = _compiled_evaluations.get(scanner_document_id)
+    if cached and cached[0] is evaluations:
+        return cached[2]
+    fingerprint = _fingerprint(evaluations)
+    compiled = cached[2] if cached and cached[1] == fingerprint else CompiledEvaluation(evaluations)
+    _compiled_evaluations[scanner_document_id] = (evaluations, fingerprint, compiled)
+    return compiled
@@ -0,0 +1,95 @@
+import time
+from collections import defaultdict
+from katti.KattiUtils.LatencyHistogram import LatencyHistogram, percentile_from_buckets
+from katti.RedisCacheLayer.Keys.Scanner import name_server_stats_key
+
+# Stats cover the current and the previous window.
+NAME_SERVER_STATS_WINDOW = 10 * 60
+NAME_SERVER_STATS_PUSH_INTERVAL = 10
+NAME_SERVER_MIN_SAMPLES = 20
+# Demoted: more failures than this rate or a p95 above SLOW_FACTOR times the best p95 of the list.
+NAME_SERVER_MAX_FAILURE_RATE = 0.2
+NAME_SERVER_SLOW_FACTOR = 3
+DEFAULT_HEDGE_DELAY = 0.5
+
+
+class NameServerStats:
+    """Latency histograms and failure counters per name server, shared by all workers through Redis.
+    Observations are pushed and the snapshot is refreshed at most every push_interval seconds."""
+
+    def __init__(self, redis_connection, push_interval: int = NAME_SERVER_STATS_PUSH_INTERVAL):
+        self._redis = redis_connection
+        self._push_interval = push_interval
+        self._latency = LatencyHistogram()
+        self._failures: dict[str, int] = defaultdict(int)
+        self._last_push = time.monotonic()
+        self._snapshot: dict[str, dict] = {}
+        self._snapshot_time = 0.0
+
+    def record(self, name_server: str, seconds: float):
+        self._latency.record(name_server, seconds)
+        self._push_if_due()
+
+    def record_failure(self, name_server: str):
+        self._failures[name_server] += 1
+        self._push_if_due()
+
+    def _push_if_due(self):
+        if time.monotonic() - self._last_push >= self._push_interval:
+            self.push()
+
+    def push(self):
+        self._last_push = time.monotonic()
+        if len(self._latency) == 0 and len(self._failures) == 0:
+            return
+        key = name_server_stats_key(int(time.time()) // NAME_SERVER_STATS_WINDOW)
+        pipe = self._redis.pipeline(transaction=False)
+        self._latency.add_to_pipeline(pipe, key)
+        for name_server, failures in self._failures.items():
+            pipe.hincrby(key, f'{name_server}:failures', failures)
+        pipe.expire(key, 2 * NAME_SERVER_STATS_WINDOW + 60)
+        pipe.execute()
+        self._latency.clear()
+        self._failures.clear()
+
+    def snapshot(self) -> dict[str, dict]:
+        """{name server: {'count': int, 'failures': int, 'p95': seconds | None}} over the last two windows."""
+        if time.monotonic() - self._snapshot_time < self._push_interval:
+            return self._snapshot
+        window = int(time.time()) // NAME_SERVER_STATS_WINDOW
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.hgetall(name_server_stats_key(window))
+        pipe.hgetall(name_server_stats_key(window - 1))
+        snapshot = {}
+        for raw_hash in pipe.execute():
+            for name_server, stats in LatencyHistogram.son_from_redis_hash(raw_hash).items():
+                x = snapshot.setdefault(name_server, {'count': 0, 'failures': 0, 'buckets': defaultdict(int)})
+                x['count'] += stats.get('count', 0)
+                x['failures'] += stats.get('failures', 0)
+                for bucket, count in stats['buckets'].items():
+                    x['buckets'][bucket] += count
+        for stats in snapshot.values():
+            stats['p95'] = percentile_from_buckets(stats.pop('buckets'), 0.95)
+        self._snapshot = snapshot
+        self._snapshot_time = time.monotonic()
+        return snapshot
+
+    def p95(self, name_server: str) -> float | None:
+        stats = self.snapshot().get(name_server)
+        if not stats or stats['count'] < NAME_SERVER_MIN_SAMPLES:
+            return None
+        return stats['p95']
+
+    def _is_demoted(self, name_server: str, best_p95: float | None) -> bool:
+        stats = self.snapshot().get(name_server)
+        if not stats or stats['count'] + stats['failures'] < NAME_SERVER_MIN_SAMPLES:
+            return False
+        if stats['failures'] / (stats['count'] + stats['failures']) > NAME_SERVER_MAX_FAILURE_RATE:
+            return True
+        return bool(best_p95 and stats['p95'] and stats['p95'] > NAME_SERVER_SLOW_FACTOR * best_p95)
+
+    def order(self, name_servers: list[str]) -> list[str]:
+        """Configured order, demoted name servers moved to the end."""
+        known_p95 = [p95 for p95 in (self.p95(name_server) for name_server in name_servers) if p95]
+        best_p95 = min(known_p95) if known_p95 else None
+        return sorted(name_servers, key=lambda name_server: self._is_demoted(name_server, best_p95))
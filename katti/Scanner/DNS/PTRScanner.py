@@ -1,21 +1,27 @@
 import ipaddress
-import subprocess
 import sys
 import traceback
 import typing
+from bson import ObjectId
+from netaddr import IPNetwork
+from pydantic import Field
 from pydantic.dataclasses import dataclass
 from katti.DataBaseStuff.MongoengineDocuments.Scanner.BaseMongoEngineDocument import BaseScanningRequests, \
     BaseScannerDocument
 from katti.DataBaseStuff.MongoengineDocuments.Scanner.DNSBL import PTRConfig
-from katti.DataBaseStuff.MongoengineDocuments.Scanner.DNSServerConfig import DNSRequest, Evaluation
+from katti.DataBaseStuff.MongoengineDocuments.Scanner.DNSServerConfig import DNSRequest, Evaluation, DNSRecord
 from katti.DataBaseStuff.MongoengineDocuments.ScannerExecutionInformation import BaseScannerExecutionInformation, \
     PTRRecordExecutionInformation
 from katti.KattiUtils.Configs.pydanticStuff import PydanticConfig
 from katti.KattiUtils.Exceptions.ScannerExceptions import NoIPv4
 from katti.KattiUtils.HelperFunctions import is_valid_ipv4, is_ip_addr_valid
-from katti.Scanner.BaseScanner import OOI, BaseScanningRequestForScannerObject, BaseScanner
+from katti.DataBaseStuff.MongoengineDocuments.UserManagement.Tag import MetaData, Ownership
+from katti.Scanner.BaseScanner import OOI, BaseScanningRequestForScannerObject, BaseScanner, Backpropagation
+from katti.cidrize.cidrize import cidrize
 from katti.Scanner.DNS.DNSResolver import DomainsForDNSResolverRequest
-from katti.Scanner.DNS.Helpers import execute_dig_cmd_with_reverse
+from katti.Scanner.DNS.DNSBLEngine import get_dnsbl_engine
+from katti.Scanner.DNS.ResolverBackends import ResolverTimeout
+from katti.Scanner.DNS.RecentRecords import RecentDNSRecords
 
 
 @dataclass(config=PydanticConfig)
@@ -55,6 +61,69 @@ class IPsForPTR(BaseScanningRequestForScannerObject):
                 return False
 
 
+MAX_CIDR_SWEEP_ADDRESSES = 1 << 16
+
+
+@dataclass(config=PydanticConfig)
+class CIDRsForPTR(IPsForPTR):
+    """Sweep over whole ranges. The addresses of the CIDRs are created one by one when the scanner asks for the
+    next OOI, the explicit oois (e.g. left overs of a retry) come first. cidr_position survives retries."""
+    cidrs: list[str] = Field(default_factory=list)
+    cidr_position: int = 0
+
+    @classmethod
+    def build_request(cls, raw_oois: list[typing.Any], ownership: Ownership, meta_data: MetaData | None, time_valid_response: int, scanner_id: ObjectId,
+                      backwards_propagation: list[Backpropagation] | None = None,
+                      offline_mode: bool = False, **kwargs):
+        return cls(ownership_obj=ownership, meta_data_obj=meta_data,
+                   time_valid_response=time_valid_response, offline=offline_mode,
+                   scanner_id=scanner_id, backwards_propagation=backwards_propagation,
+                   oois=[], cidrs=cls.build_cidrs(raw_oois), **kwargs)
+
+    @staticmethod
+    def build_cidrs(raw_cidrs: list[typing.Any]) -> list[str]:
+        """Everything katti.cidrize understands: CIDRs, ranges, globs, brackets."""
+        cidrs = []
+        for raw_cidr in raw_cidrs:
+            cidrs.extend(str(network) for network in cidrize(str(raw_cidr)))
+        if len(cidrs) == 0:
+            raise NoIPv4()
+        if sum(IPNetwork(cidr).size for cidr in cidrs) > MAX_CIDR_SWEEP_ADDRESSES:
+            raise ValueError(f'More than {MAX_CIDR_SWEEP_ADDRESSES} addresses, split the ranges.')
+        return cidrs
+
+    @staticmethod
+    def can_handle_ooi_type(ooi_type: str) -> bool:
+        return ooi_type == 'cidrs'
+
+    @property
+    def address_count(self) -> int:
+        return sum(IPNetwork(cidr).size for cidr in self.cidrs)
+
+    @property
+    def next_ooi_obj(self):
+        if len(self.oois) > 0:
+            return self.oois.pop(0)
+        position = self.cidr_position
+        for cidr in self.cidrs:
+            network = IPNetwork(cidr)
+            if position < network.size:
+                self.cidr_position += 1
+                return IPForPTR(raw_ooi=ipaddress.ip_address(str(network[position])))
+            position -= network.size
+        return None
+
+    @property
+    def ooi_count(self) -> int:
+        return len(self.oois) + self.address_count - self.cidr_position
+
+    def copy_for_oois(self, oois: list[OOI]):
+        x = super().copy_for_oois(oois)
+        x.cidrs = []
+        x.cidr_position = 0
+        return x
+
+
 class PTRScanner(BaseScanner):
     scanner_document: PTRConfig
     scanning_request: IPsForPTR
@@ -92,13 +161,31 @@ class PTRScanner(BaseScanner):
     def get_scanner_mongo_document_class():
         return PTRConfig
 
-    def _do_your_scanning_job(self):
+    def _init(self):
+        self.recent_dns_records = RecentDNSRecords(self.redis_cache.redis_connection)
+        self._ptr_evaluation: list[Evaluation] = []
+
+    def set_up(self, scanner_id: ObjectId):
+        super().set_up(scanner_id)
+        # One list per scanner document, so the compiled hints are looked up without a fingerprint.
+        self._ptr_evaluation = [Evaluation(type='ptr_stuff',
+                                           settings=[{'hints': self.scanner_document.static_hints, 'hint_type': 'static'},
+                                                     {'hints': self.scanner_document.dynamic_hints, 'hint_type': 'dynamic'}])]
+
+    def flush_result_buffer(self):
+        self.add_bulk_ops(DNSRecord._get_collection_name(), self.recent_dns_records.touch_ops())
+        try:
+            super().flush_result_buffer()
+        except Exception:
+            self.recent_dns_records.mark_written(flushed=False)
+            raise
+        self.recent_dns_records.mark_written()
+
+    async def _do_your_scanning_job(self):
         try:
-            data = execute_dig_cmd_with_reverse(
-                request_str=f'{self.next_ooi_obj.ooi}',
-                record_type='PTR',
-                name_server=self.scanner_document.dns_resolver_ip)
-        except subprocess.TimeoutExpired:
+            response_data = await get_dnsbl_engine(self.scanner_document.dns_resolver_ip,
+                                                   self.scanner_document.max_in_flight).ptr(self.next_ooi_obj.ooi)
+        except ResolverTimeout:
             self.logger.exception(f'Timeout: {self.next_ooi_obj.ooi}')
             self.scanning_result.error_reason = 'TIMEOUT'
         except Exception:
@@ -106,15 +193,12 @@ class PTRScanner(BaseScanner):
             self.scanning_result.error_reason = 'DIGFAIL'
         else:
             try:
-                response_data = data[0]
                 if response_data.get('status', '') == 'SERVFAIL':
                     query = DNSRequest.DNSQuery(status='SERVFAIL')
                 else:
                     query = DNSRequest.DNSQuery().build_response(response_data,
                                                                  scanner=self,
-                                                                 evaluation_settings=[Evaluation(type='ptr_stuff',
-                                                                                                 settings=[{'hints': self.scanner_document.static_hints, 'hint_type': 'static'},
-                                                                                                           {'hints': self.scanner_document.dynamic_hints, 'hint_type': 'dynamic'}])],
+                                                                 evaluation_settings=self._ptr_evaluation,
                                                                  ooi=self.next_ooi_obj.ooi,
                                                                  katti_meta_data=self.meta_data_as_son)
             except Exception:
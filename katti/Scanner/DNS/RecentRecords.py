@@ -0,0 +1,68 @@
+import datetime
+import time
+import bson
+from bson import ObjectId, SON
+from pymongo import UpdateMany
+from katti.KattiUtils.Configs.ConfigKeys import RECENT_DNS_RECORD_TTL
+from katti.RedisCacheLayer.Keys.Scanner import recent_dns_record_key
+
+MAX_LOCAL_RECORDS = 100_000
+
+
+class RecentDNSRecords:
+    """DNS records written within the last ttl seconds, worker local and in Redis. Records are only marked after the
+    flush that wrote them, so a hit always references an existing document. For hits the katti_last and
+    katti_meta_data updates are coalesced into one UpdateMany per meta data and written with the next flush."""
+
+    def __init__(self, redis_connection, ttl: int = RECENT_DNS_RECORD_TTL):
+        self._redis = redis_connection
+        self._ttl = ttl
+        self._local: dict[ObjectId, float] = {}
+        self._written: set[ObjectId] = set()
+        # bson of the meta data -> (meta data, record ids)
+        self._touched: dict[bytes, tuple[SON | None, set[ObjectId]]] = {}
+
+    def recent(self, record_ids: list[ObjectId]) -> set[ObjectId]:
+        now = time.monotonic()
+        recent = {record_id for record_id in record_ids if self._local.get(record_id, 0) > now}
+        missing = [record_id for record_id in record_ids if record_id not in recent]
+        if len(missing) > 0:
+            for record_id, hit in zip(missing, self._redis.mget([recent_dns_record_key(record_id) for record_id in missing])):
+                if hit:
+                    self._local[record_id] = now + self._ttl
+                    recent.add(record_id)
+        return recent
+
+    def touch(self, record_id: ObjectId, katti_meta_data: SON | None):
+        meta_data_key = bson.encode(katti_meta_data) if katti_meta_data else b''
+        self._touched.setdefault(meta_data_key, (katti_meta_data, set()))[1].add(record_id)
+
+    def add_written(self, record_id: ObjectId):
+        self._written.add(record_id)
+
+    def touch_ops(self) -> list[UpdateMany]:
+        touched, self._touched = self._touched, {}
+        now = datetime.datetime.utcnow()
+        ops = []
+        for katti_meta_data, record_ids in touched.values():
+            update = {'$set': {'katti_last': now}}
+            if katti_meta_data:
+                update['$addToSet'] = {'katti_meta_data': katti_meta_data}
+            ops.append(UpdateMany({'_id': {'$in': list(record_ids)}}, update))
+        return ops
+
+    def mark_written(self, flushed: bool = True):
+        """Call after the flush of the upserts, records of a failed flush are not marked."""
+        written, self._written = self._written, set()
+        if len(written) == 0 or not flushed:
+            return
+        now = time.monotonic()
+        if len(self._local) + len(written) > MAX_LOCAL_RECORDS:
+            self._local = {record_id: expires for record_id, expires in self._local.items() if expires > now}
+            if len(self._local) + len(written) > MAX_LOCAL_RECORDS:
+                self._local = {}
+        pipe = self._redis.pipeline(transaction=False)
+        for record_id in written:
+            self._local[record_id] = now + self._ttl
+            pipe.set(recent_dns_record_key(record_id), 1, ex=self._ttl)
+        pipe.execute()
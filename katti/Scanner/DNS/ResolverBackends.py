@@ -0,0 +1,156 @@
+import asyncio
+import datetime
+import subprocess
+import time
+import dns.asyncquery
+import dns.edns
+import dns.exception
+import dns.flags
+import dns.message
+import dns.opcode
+import dns.query
+import dns.rcode
+import dns.rdataclass
+import dns.rdatatype
+import katti.jc as jc
+from katti.Scanner.Helpers import preexec_function
+
+DEFAULT_QUERY_TIMEOUT = 15
+DNS_PORT = 53
+EDNS_PAYLOAD = 1232
+
+
+class ResolverTimeout(Exception):
+    pass
+
+
+class ResolverBackend:
+    """Sends one query and returns the response as the dict of jc's dig parser, which DNSQuery.build_response consumes."""
+    name = ''
+
+    def query(self, name: str, record_type: str, name_server: str, dnssec: bool = False, cd_flag: bool = False,
+              timeout: float = DEFAULT_QUERY_TIMEOUT, port: int = DNS_PORT) -> dict:
+        raise NotImplementedError()
+
+    async def query_async(self, name: str, record_type: str, name_server: str, dnssec: bool = False,
+                          cd_flag: bool = False, timeout: float = DEFAULT_QUERY_TIMEOUT, port: int = DNS_PORT) -> dict:
+        raise NotImplementedError()
+
+
+class DigBackend(ResolverBackend):
+    name = 'dig'
+
+    @staticmethod
+    def build_cmd(name: str, record_type: str, name_server: str, dnssec: bool = False, cd_flag: bool = False,
+                  port: int = DNS_PORT) -> list[str]:
+        cmd_list = ['dig', '+dnssec'] if dnssec else ['dig']
+        cmd_list.extend([f'@{name_server}', name, record_type])
+        if cd_flag:
+            cmd_list.append('+cdflag')
+        if port != DNS_PORT:
+            cmd_list.extend(['-p', str(port)])
+        return cmd_list
+
+    def query(self, name: str, record_type: str, name_server: str, dnssec: bool = False, cd_flag: bool = False,
+              timeout: float = DEFAULT_QUERY_TIMEOUT, port: int = DNS_PORT) -> dict:
+        try:
+            cmd_output = subprocess.check_output(self.build_cmd(name, record_type, name_server, dnssec, cd_flag, port),
+                                                 text=True, timeout=timeout, preexec_fn=preexec_function)
+        except subprocess.TimeoutExpired:
+            raise ResolverTimeout()
+        return jc.parse('dig', cmd_output)[0]
+
+    async def query_async(self, name: str, record_type: str, name_server: str, dnssec: bool = False,
+                          cd_flag: bool = False, timeout: float = DEFAULT_QUERY_TIMEOUT, port: int = DNS_PORT) -> dict:
+        process = await asyncio.create_subprocess_exec(*self.build_cmd(name, record_type, name_server, dnssec, cd_flag, port),
+                                                       stdout=asyncio.subprocess.PIPE, preexec_fn=preexec_function)
+        try:
+            cmd_output, _ = await asyncio.wait_for(process.communicate(), timeout=timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise ResolverTimeout()
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, 'dig', cmd_output)
+        return jc.parse('dig', cmd_output.decode())[0]
+
+
+def _rrsets_to_dig(rrsets) -> list[dict]:
+    return [{'name': rrset.name.to_text(),
+             'class': dns.rdataclass.to_text(rrset.rdclass),
+             'type': dns.rdatatype.to_text(rrset.rdtype),
+             'ttl': rrset.ttl,
+             'data': rdata.to_text()} for rrset in rrsets for rdata in rrset]
+
+
+def message_to_dig(response: dns.message.Message, name_server: str, query_time_ms: int, port: int = DNS_PORT) -> dict:
+    """Same structure as jc.parse('dig', ...)[0] for the response."""
+    question = response.question[0]
+    x = {'id': response.id,
+         'opcode': dns.opcode.to_text(response.opcode()),
+         'status': dns.rcode.to_text(response.rcode()),
+         'flags': dns.flags.to_text(response.flags).lower().split(),
+         'query_num': len(response.question),
+         'answer_num': sum(len(rrset) for rrset in response.answer),
+         'authority_num': sum(len(rrset) for rrset in response.authority),
+         # dig counts the OPT pseudo record
+         'additional_num': sum(len(rrset) for rrset in response.additional) + (1 if response.edns >= 0 else 0),
+         'question': {'name': question.name.to_text(),
+                      'class': dns.rdataclass.to_text(question.rdclass),
+                      'type': dns.rdatatype.to_text(question.rdtype)},
+         'query_time': query_time_ms,
+         'server': f'{name_server}#{port}({name_server})',
+         'when': datetime.datetime.utcnow().strftime('%a %b %d %H:%M:%S UTC %Y')}
+    if response.edns >= 0:
+        x['opt_pseudosection'] = {'edns': {'version': response.edns,
+                                           'flags': dns.flags.edns_to_text(response.ednsflags).lower().split(),
+                                           'udp': response.payload}}
+        for option in response.options:
+            if option.otype == dns.edns.COOKIE:
+                x['opt_pseudosection']['cookie'] = option.to_wire().hex()
+    if len(response.answer) > 0:
+        x['answer'] = _rrsets_to_dig(response.answer)
+    if len(response.authority) > 0:
+        x['authority'] = _rrsets_to_dig(response.authority)
+    if len(response.additional) > 0:
+        x['additional'] = _rrsets_to_dig(response.additional)
+    return x
+
+
+class DnsPythonBackend(ResolverBackend):
+    """In-process queries, UDP with TCP fallback for truncated answers. Query flags are the ones of dig."""
+    name = 'dnspython'
+
+    @staticmethod
+    def build_query(name: str, record_type: str, dnssec: bool = False, cd_flag: bool = False) -> dns.message.Message:
+        query = dns.message.make_query(name, record_type, use_edns=0, payload=EDNS_PAYLOAD, want_dnssec=dnssec)
+        if cd_flag:
+            query.flags |= dns.flags.CD
+        return query
+
+    def query(self, name: str, record_type: str, name_server: str, dnssec: bool = False, cd_flag: bool = False,
+              timeout: float = DEFAULT_QUERY_TIMEOUT, port: int = DNS_PORT) -> dict:
+        start = time.perf_counter()
+        try:
+            response, _ = dns.query.udp_with_fallback(self.build_query(name, record_type, dnssec, cd_flag), name_server,
+                                                      timeout=timeout, port=port)
+        except dns.exception.Timeout:
+            raise ResolverTimeout()
+        return message_to_dig(response, name_server, int((time.perf_counter() - start) * 1000), port)
+
+    async def query_async(self, name: str, record_type: str, name_server: str, dnssec: bool = False,
+                          cd_flag: bool = False, timeout: float = DEFAULT_QUERY_TIMEOUT, port: int = DNS_PORT) -> dict:
+        start = time.perf_counter()
+        try:
+            response, _ = await dns.asyncquery.udp_with_fallback(self.build_query(name, record_type, dnssec, cd_flag),
+                                                                 name_server, timeout=timeout, port=port)
+        except dns.exception.Timeout:
+            raise ResolverTimeout()
+        return message_to_dig(response, name_server, int((time.perf_counter() - start) * 1000), port)
+
+
+RESOLVER_BACKENDS: dict[str, ResolverBackend] = {backend.name: backend for backend in (DigBackend(), DnsPythonBackend())}
+
+
+def get_resolver_backend(name: str) -> ResolverBackend:
+    return RESOLVER_BACKENDS.get(name, RESOLVER_BACKENDS['dig'])
@@ -0,0 +1,40 @@
+import os
+import statistics
+import sys
+import time
+from katti.Scanner.DNS.ResolverBackends import RESOLVER_BACKENDS, ResolverTimeout
+
+
+def benchmark_backends(domains: list[str], name_server: str, record_type: str = 'A', rounds: int = 1) -> dict:
+    """Per query wall time and CPU time (own process and children, i.e. dig) of every resolver backend."""
+    report = {}
+    for backend_name, backend in RESOLVER_BACKENDS.items():
+        wall_times = []
+        timeouts = 0
+        cpu_start = os.times()
+        for _ in range(rounds):
+            for domain in domains:
+                start = time.perf_counter()
+                try:
+                    backend.query(name=domain, record_type=record_type, name_server=name_server, timeout=5)
+                except ResolverTimeout:
+                    timeouts += 1
+                wall_times.append((time.perf_counter() - start) * 1000)
+        cpu_stop = os.times()
+        cpu_ms = sum(stop - start for start, stop in zip(cpu_start[:4], cpu_stop[:4])) * 1000
+        report[backend_name] = {'queries': len(wall_times),
+                                'timeouts': timeouts,
+                                'wall_ms_median': statistics.median(wall_times),
+                                'wall_ms_p95': statistics.quantiles(wall_times, n=20)[-1] if len(wall_times) > 1 else wall_times[0],
+                                'cpu_ms_per_query': cpu_ms / len(wall_times)}
+    return report
+
+
+if __name__ == '__main__':
+    # python -m katti.Scanner.DNS.ResolverBenchmark <name server> <domain file> [record type] [rounds]
+    with open(sys.argv[2]) as domain_file:
+        benchmark_domains = [line.strip() for line in domain_file if line.strip()]
+    for name, result in benchmark_backends(benchmark_domains, name_server=sys.argv[1],
+                                           record_type=sys.argv[3] if len(sys.argv) > 3 else 'A',
+                                           rounds=int(sys.argv[4]) if len(sys.argv) > 4 else 1).items():
+        print(f'{name}: {result}')
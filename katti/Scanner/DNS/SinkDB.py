@@ -1,5 +1,4 @@
 import ipaddress
-import subprocess
 import sys
 import traceback
 import typing
@@ -14,7 +13,8 @@ from katti.KattiUtils.Configs.pydanticStuff import PydanticConfig
 from katti.KattiUtils.Exceptions.ScannerExceptions import NoIPv4
 from katti.KattiUtils.HelperFunctions import is_valid_ipv4
 from katti.Scanner.BaseScanner import BaseScanner, BaseScanningRequestForScannerObject, OOI
-from katti.Scanner.DNS.Helpers import execute_dig_cmd, reverse_ip
+from katti.Scanner.DNS.DNSBLEngine import get_dnsbl_engine
+from katti.Scanner.DNS.ResolverBackends import ResolverTimeout
 
 
 @dataclass(config=PydanticConfig)
@@ -86,14 +86,14 @@ class SinkDB(BaseScanner):
     def get_scanner_mongo_document_class():
         return SinkDB_DB
 
-    def _do_your_scanning_job(self):
+    async def _do_your_scanning_job(self):
         # raise RetryException()
         try:
-            data = execute_dig_cmd(
-                request_str=f'{reverse_ip(self.next_ooi_obj.ooi)}.{self.scanner_document.api_key}.{self.scanner_document.name_server_name}',
-                record_type='TXT',
-                name_server=self.scanner_document.dns_resolver_ip)
-        except subprocess.TimeoutExpired:
+            self._response_data = await get_dnsbl_engine(self.scanner_document.dns_resolver_ip,
+                                                         self.scanner_document.max_in_flight).dnsbl(
+                ip=self.next_ooi_obj.ooi, zone=f'{self.scanner_document.api_key}.{self.scanner_document.name_server_name}',
+                record_type='TXT')
+        except ResolverTimeout:
             self.logger.exception(f'Timeout: {self.next_ooi_obj.ooi}')
             self.scanning_result.error_reason = 'TIMEOUT'
         except Exception:
@@ -101,7 +101,6 @@ class SinkDB(BaseScanner):
             self.scanning_result.error_reason = 'DIGFAIL'
         else:
             try:
-                self._response_data = data[0]
                 match self._response_data.get('status', ''):
                     case 'SERVFAIL':
                         self.scanning_result.error_reason = 'No valid API key.'
@@ -1,5 +1,4 @@
 import ipaddress
-import subprocess
 import sys
 import traceback
 import typing
@@ -13,7 +12,8 @@ from katti.KattiUtils.Configs.pydanticStuff import PydanticConfig
 from katti.KattiUtils.Exceptions.ScannerExceptions import NoIPv4
 from katti.KattiUtils.HelperFunctions import is_valid_ipv4
 from katti.Scanner.BaseScanner import OOI, BaseScanningRequestForScannerObject, BaseScanner
-from katti.Scanner.DNS.Helpers import execute_dig_cmd, reverse_ip
+from katti.Scanner.DNS.DNSBLEngine import get_dnsbl_engine
+from katti.Scanner.DNS.ResolverBackends import ResolverTimeout
 
 
 @dataclass(config=PydanticConfig)
@@ -85,13 +85,12 @@ class SpamHaus(BaseScanner):
     def get_scanner_mongo_document_class():
         return SpamHausDB
 
-    def _do_your_scanning_job(self):
+    async def _do_your_scanning_job(self):
         try:
-            data = execute_dig_cmd(
-                request_str=f'{reverse_ip(self.next_ooi_obj.ooi)}.{self.scanner_document.name_server_name}',
-                record_type='A',
-                name_server=self.scanner_document.dns_resolver_ip)
-        except subprocess.TimeoutExpired:
+            self._response_data = await get_dnsbl_engine(self.scanner_document.dns_resolver_ip,
+                                                         self.scanner_document.max_in_flight).dnsbl(
+                ip=self.next_ooi_obj.ooi, zone=self.scanner_document.name_server_name, record_type='A')
+        except ResolverTimeout:
             self.logger.exception(f'Timeout: {self.next_ooi_obj.ooi}')
             self.scanning_result.error_reason = 'TIMEOUT'
         except Exception:
@@ -99,7 +98,6 @@ class SpamHaus(BaseScanner):
             self.scanning_result.error_reason = 'DIGFAIL'
         else:
             try:
-                self._response_data = data[0]
                 match self._response_data.get('status', ''):
                     case 'NXDOMAIN':
                         self.scanning_result.error_reason = 'No matching DB entry'
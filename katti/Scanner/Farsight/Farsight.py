@@ -4,7 +4,6 @@ import sys
 import traceback
 import typing
 from typing import Type, Literal
-import requests
 
 from katti.DataBaseStuff.MongoengineDocuments.ScannerExecutionInformation import BaseScannerExecutionInformation, \
     FarsightExecutionInformation
@@ -16,7 +15,8 @@ from katti.DataBaseStuff.MongoengineDocuments.Scanner.BaseMongoEngineDocument im
     BaseScannerDocument
 from katti.Scanner.BaseScanner import BaseScanner, BaseScanningRequestForScannerObject, OOI
 from katti.DataBaseStuff.MongoengineDocuments.Scanner.FarsightDocument import FarsightDocument, FarsightQuerryResult, FarsightRequest
-from katti.Scanner.QuotaMechanic import DayBlockException
+from katti.Scanner.QuotaMechanic import MinuteBlockException
+from katti.KattiUtils.Configs.ConfigKeys import RATE_LIMIT_RETRY_AFTER_DEFAULT
 
 FARSIGHT_FIRST_PART_OF_URL = 'https://api.dnsdb.info/dnsdb/v2/lookup/'
 
@@ -129,36 +129,45 @@ class Farsight(BaseScanner):
     def additional_filter_fields(self) -> dict:
         return {'url': self.scanning_request.get_url_for_ooi(self.next_ooi_obj)}
 
-    def _do_your_scanning_job(self):
+    async def _do_your_scanning_job(self):
         url = self.scanning_request.get_url_for_ooi(self.next_ooi_obj)
         self.scanning_result.url = url
         try:
-            farsight_response = requests.get(url, headers={'X-API-KEY': self.scanner_document.api_key})
+            async with self.http_session.get(url, headers={'X-API-KEY': self.scanner_document.api_key}) as farsight_response:
+                content = await farsight_response.read()
         except Exception:
             self.logger.exception(f'Farsight fail: {traceback.format_exception(*sys.exc_info())}')
             raise
         else:
-            match farsight_response.status_code:
+            match farsight_response.status:
                 case 200:
-                    for line in farsight_response.content.decode('utf-8').splitlines():
-                        json_line = json.loads(line)
-                        if 'cond' in json_line:
-                            continue
-                        result_json = json_line['obj']
-                        self.scanning_result.result_counter += 1
-                        self.scanning_result.farsight_querry_results.append(self._save_querry_result(result_json))
+                    with self.phase_timer.measure('parse'):
+                        for line in content.decode('utf-8').splitlines():
+                            json_line = json.loads(line)
+                            if 'cond' in json_line:
+                                continue
+                            result_json = json_line['obj']
+                            self.scanning_result.result_counter += 1
+                            self.scanning_result.farsight_querry_results.append(self._save_querry_result(result_json))
                 case 429:
-                    self.quota.set_remaining_quota(0)
-                    raise DayBlockException()
+                    # Rate limit, not the daily quota: retry after the provider's window instead of the next day.
+                    raise MinuteBlockException('Rate limit.', wait_time=self._retry_after(farsight_response.headers))
                 case _:
-                    raise Exception(f'Unknown bad status code {farsight_response.status_code}')
+                    raise Exception(f'Unknown bad status code {farsight_response.status}')
+
+    @staticmethod
+    def _retry_after(response_headers) -> float:
+        try:
+            return max(float(response_headers.get('Retry-After')), 0)
+        except (TypeError, ValueError):
+            return RATE_LIMIT_RETRY_AFTER_DEFAULT
 
     def _save_querry_result(self, result_json):
         rdata_parser = RDataParser()
         if len(result_json['rdata']) == 1:
             record_value = rdata_parser.do_it(record_type=result_json['rrtype'], rdata=result_json['rdata'][0])
         else:
-            record_value = [rdata_parser.do_it(rdata, result_json['rrtype']) for rdata in result_json['rdata']]
+            record_value = rdata_parser.parse_many(result_json['rdata'], result_json['rrtype'])
         if 'zone_time_first' in result_json:
             result_json.update({'time_first': result_json.pop('zone_time_first'),
                                 'time_last': result_json.pop('zone_time_last'),
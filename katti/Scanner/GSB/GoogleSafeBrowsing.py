@@ -3,7 +3,7 @@ import sys
 import traceback
 import typing
 from random import randint
-import requests
+import aiohttp
 from pydantic import AnyUrl
 from pydantic.dataclasses import dataclass
 from katti.DataBaseStuff.MongoengineDocuments.Scanner.BaseMongoEngineDocument import BaseScannerDocument
@@ -85,20 +85,21 @@ class GoogleSafeBrowsing(BaseScanner):
     def get_scanner_mongo_document_class():
         return GoogleSafeBrowserConfig
 
-    def _do_your_scanning_job(self):
+    async def _do_your_scanning_job(self):
         headers = {'content-type': 'application/json'}
         try:
-            response = requests.post(
-                url=f'http://{self.scanner_document.docker_ip}:{self.scanner_document.docker_port}/v4/threatMatches:find',
-                data=json.dumps(self._build_threat_info(self.next_ooi_obj.ooi)),
-                headers=headers,
-                timeout=10)
-        except requests.exceptions.ConnectionError:
+            async with self.http_session.post(
+                    url=f'http://{self.scanner_document.docker_ip}:{self.scanner_document.docker_port}/v4/threatMatches:find',
+                    data=json.dumps(self._build_threat_info(self.next_ooi_obj.ooi)),
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=10)) as response:
+                content = await response.read()
+        except aiohttp.ClientConnectionError:
             self.logger.error(f'ConnectionError, server down?')
             self.retry_args.update({'countdown': randint(30*60, 60*60)})
             raise RetryException()
         else:
-            self._produce_response(response.content)
+            self._produce_response(content)
 
     def _produce_response(self, response_content):
         self.logger.debug('Produce response')
@@ -1,9 +1,10 @@
+import asyncio
 import hashlib
 import ipaddress
 import json
 import typing
 from random import randint
-import requests
+import aiohttp
 from pydantic.dataclasses import dataclass
 from katti.DataBaseStuff.MongoengineDocuments.Scanner.BaseMongoEngineDocument import BaseScanningRequests, \
     BaseScannerDocument
@@ -83,46 +84,47 @@ class MaxMindOffline(BaseScanner):
     def with_scanner_id(self) -> bool:
         return False
 
-    def _do_your_scanning_job(self):
+    async def _do_your_scanning_job(self):
         #  match self.scanning_request.db_type:
         #      case 'all':
         #          self._do_request(endpoint='asn')
         #          self._do_request(endpoint='city')
         #      case 'city' | 'asn' | 'country':
         #          self._do_request(endpoint=self.scanning_request.db_type)
-        self._do_request(endpoint='asn')
-        self._do_request(endpoint='city')
+        await asyncio.gather(self._do_request(endpoint='asn'), self._do_request(endpoint='city'))
         self.scanning_result.db_type = 'all'  # self.scanning_request.db_type
 
-    def _do_request(self, endpoint):
+    async def _do_request(self, endpoint):
         try:
-            response = requests.post(
-                f'http://{self.scanner_document.docker_ip}:{self.scanner_document.docker_port}/{endpoint}',
-                data=json.dumps({'ips': [self.next_ooi_obj.ooi]}), timeout=10)
-        except requests.exceptions.ConnectionError:
+            async with self.http_session.post(
+                    f'http://{self.scanner_document.docker_ip}:{self.scanner_document.docker_port}/{endpoint}',
+                    data=json.dumps({'ips': [self.next_ooi_obj.ooi]}), timeout=aiohttp.ClientTimeout(total=10)) as response:
+                content = await response.read()
+        except aiohttp.ClientConnectionError:
             self.logger.error(f'ConnectionError, server down?')
             self.retry_args.update({'countdown': randint(30*60, 60*60)})
             raise RetryException()
-        match response.status_code:
+        match response.status:
             case 200:
                 match endpoint:
                     case 'asn':
-                        x = json.loads(response.content.decode())
+                        x = json.loads(content.decode())
                         for result in x:
                             if 'error' in result[1]:
                                 self.scanning_result.add_error({'ip': result[0], 'error': result[1].get('error')})
                                 continue
 
-                            self.scanning_result.asn = MaxMindResultASN.get_result_from_db(scanner_obj=self,
-                                                                                           filter=result[1],
-                                                                                           ooi=result[0], only_id=True)
+                            self.scanning_result.asn = await asyncio.to_thread(MaxMindResultASN.get_result_from_db,
+                                                                               scanner_obj=self, filter=result[1],
+                                                                               ooi=result[0], only_id=True)
                     case 'city' | 'country':
-                        x = json.loads(response.content.decode())
+                        x = json.loads(content.decode())
                         for result in x:
                             if 'error' in result[1]:
                                 self.scanning_result.add_error({'ip': result[0], 'error': result[1].get('error')})
                                 continue
-                            self.scanning_result.city_country = MaxMindResultCountryCity.get_result_from_db(
+                            self.scanning_result.city_country = await asyncio.to_thread(
+                                MaxMindResultCountryCity.get_result_from_db,
                                 filter={'ooi': result[0],
                                         'hash_str': hashlib.md5(json.dumps(result[1]).encode()).hexdigest()},
                                 update={'$setOnInsert': result[1]},
@@ -131,8 +133,8 @@ class MaxMindOffline(BaseScanner):
                                 ooi=None,
                                 only_id=True)
             case _:
-                self.logger.error(f'Bad status code {response.status_code}')
-                raise Exception('Bad status code {response.status_code}')
+                self.logger.error(f'Bad status code {response.status}')
+                raise Exception('Bad status code {response.status}')
 
-    def offline_mode(self):
-        self._do_your_scanning_job()
+    async def offline_mode(self):
+        await self._do_your_scanning_job()
@@ -1,18 +1,25 @@
 import datetime
-import time
 from typing import Union
 from bson import ObjectId
 from katti.DataBaseStuff.MongoengineDocuments.UserManagement.TimeLord import API
 from katti.KattiUtils.HelperFunctions import get_today_as_datetime, i_am_at_home
 from katti.RedisCacheLayer.RedisMongoCache import set_up_connection, ManualConnectionSettings
+from katti.RedisCacheLayer.Keys.Quota import token_bucket_key, pacing_key
 
 
 class MinuteBlockException(Exception):
+    def __init__(self, *args, wait_time: float | None = None):
+        super().__init__(*args)
+        self.wait_time = wait_time
+
     def __str__(self) -> str:
         return 'MinuteBlock'
 
 
 class DayBlockException(Exception):
+    def __init__(self, *args, wait_time: float | None = None):
+        super().__init__(*args)
+        self.wait_time = wait_time
 
     def __str__(self) -> str:
         return 'DayBlock'
@@ -34,49 +41,187 @@ class BadEndpointArguments(Exception):
     pass
 
 
+BUCKET_WINDOWS = {'second': 1, 'minute': 60, 'day': 24 * 60 * 60}
+
+# KEYS: one hash per bucket, optionally followed by a usage counter. ARGV: amount, number of buckets,
+# counter ttl, counter limit (0: none), then capacity and window (ms) per bucket. Tokens refill continuously with
+# capacity/window. The counter is a calendar day quota: it blocks until UTC midnight once the limit is used up, the
+# first request of the day always passes. Returns {allowed, wait_ms, index of the blocking bucket, number of
+# buckets + 1 for the counter}.
+TOKEN_BUCKET_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local amount = tonumber(ARGV[1])
+local bucket_count = tonumber(ARGV[2])
+local counter_limit = tonumber(ARGV[4])
+if #KEYS > bucket_count and counter_limit > 0 then
+    local used = tonumber(redis.call('GET', KEYS[#KEYS])) or 0
+    if used > 0 and used + amount > counter_limit then
+        return {0, 86400000 - now % 86400000, bucket_count + 1}
+    end
+end
+local wait = 0
+local blocked = 0
+local tokens = {}
+for i = 1, bucket_count do
+    local capacity = tonumber(ARGV[3 + i * 2])
+    local window = tonumber(ARGV[4 + i * 2])
+    local bucket = redis.call('HMGET', KEYS[i], 'tokens', 'ts')
+    local current = tonumber(bucket[1]) or capacity
+    local ts = tonumber(bucket[2]) or now
+    current = math.min(capacity, current + (now - ts) * capacity / window)
+    tokens[i] = current
+    -- Requests larger than the bucket pass on a full bucket and leave a debt.
+    local needed = math.min(amount, capacity)
+    if current < needed then
+        local bucket_wait = math.ceil((needed - current) * window / capacity)
+        if bucket_wait > wait then
+            wait = bucket_wait
+            blocked = i
+        end
+    end
+end
+if blocked > 0 then
+    return {0, wait, blocked}
+end
+for i = 1, bucket_count do
+    redis.call('HSET', KEYS[i], 'tokens', tostring(tokens[i] - amount), 'ts', tostring(now))
+    redis.call('PEXPIRE', KEYS[i], tonumber(ARGV[4 + i * 2]))
+end
+if #KEYS > bucket_count then
+    redis.call('INCRBY', KEYS[#KEYS], amount)
+    redis.call('EXPIRE', KEYS[#KEYS], tonumber(ARGV[3]))
+end
+return {1, 0, 0}
+"""
+
+
+class TokenBuckets:
+    """Second, minute and day buckets of one owner, checked and taken with one script call.
+    A rate of 0 or None disables the bucket."""
+    _script = None
+
+    def __init__(self, redis_connection, owner: str, rates: dict[str, int | None]):
+        self._redis = redis_connection
+        self._windows = [window for window in BUCKET_WINDOWS if rates.get(window)]
+        self._keys = [token_bucket_key(owner, window) for window in self._windows]
+        self._args = []
+        for window in self._windows:
+            self._args.extend([rates[window], BUCKET_WINDOWS[window] * 1000])
+        if not TokenBuckets._script:
+            TokenBuckets._script = redis_connection.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def __len__(self):
+        return len(self._windows)
+
+    def take(self, amount: int = 1, counter_key: str | None = None, counter_ttl: int = 0,
+             counter_limit: int = 0) -> tuple[str | None, float]:
+        """Returns (None, 0) if the tokens were taken, otherwise the blocking window and the seconds to wait.
+        counter_key counts the usage of the calendar day, counter_limit > 0 turns it into a day quota."""
+        if len(self._windows) == 0 and not (counter_key and counter_limit):
+            if counter_key:
+                pipe = self._redis.pipeline(transaction=False)
+                pipe.incrby(counter_key, amount)
+                pipe.expire(counter_key, counter_ttl)
+                pipe.execute()
+            return None, 0
+        keys = self._keys + [counter_key] if counter_key else self._keys
+        allowed, wait_ms, blocked = TokenBuckets._script(keys=keys,
+                                                         args=[amount, len(self._windows), counter_ttl,
+                                                               counter_limit if counter_key else 0] + self._args,
+                                                         client=self._redis)
+        if allowed:
+            return None, 0
+        return self._windows[blocked - 1] if blocked <= len(self._windows) else 'day', wait_ms / 1000
+
+
+# KEYS[1]: pacing hash of a scanner (remaining, window_end, next_slot). ARGV[1]: max wait (ms) that reserves a slot.
+# The remaining quota reported by the provider is spread evenly over the rest of its window, shared by all workers.
+# Returns {quota left, wait_ms}.
+PACING_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local state = redis.call('HMGET', KEYS[1], 'remaining', 'window_end', 'next_slot')
+local remaining = tonumber(state[1])
+local window_end = tonumber(state[2])
+if not remaining or not window_end or window_end <= now then
+    return {1, 0}
+end
+if remaining <= 0 then
+    return {0, window_end - now}
+end
+local slot = math.max(now, tonumber(state[3]) or now)
+local wait = slot - now
+if wait > tonumber(ARGV[1]) then
+    return {1, wait}
+end
+local interval = math.floor((window_end - now) / remaining)
+redis.call('HSET', KEYS[1], 'remaining', tostring(remaining - 1), 'next_slot', tostring(slot + interval))
+return {1, wait}
+"""
+
+
+def raise_for_window(window: str | None, wait_time: float, *args):
+    match window:
+        case None:
+            return
+        case 'day':
+            raise QDay(*args, wait_time=wait_time)
+        case _:
+            raise QMinute(*args, wait_time=wait_time)
+
+
 class QuotaMechanic:
-    def __init__(self, cache_key, manual_con_data: ManualConnectionSettings = None):
+    _pacing_script = None
+
+    def __init__(self, cache_key, rates: dict[str, int | None] | None = None, manual_con_data: ManualConnectionSettings = None):
         self._redis = set_up_connection(manual=manual_con_data)
         self._cache_key: str = cache_key
+        self._buckets = TokenBuckets(self._redis, owner=f'quota_{cache_key}', rates=rates if rates else {})
+        if not QuotaMechanic._pacing_script:
+            QuotaMechanic._pacing_script = self._redis.register_script(PACING_SCRIPT)
 
-    def check_minute_block(self):
-        if not self._redis.get(f'quota_{datetime.datetime.utcnow().strftime("%m %d %Y %H:%M")}_{self._cache_key}'):
-            return True
-        else:
-            raise QMinute()
-
-    def check_day_block(self):
-        if not self._redis.get(f'quota_{get_today_as_datetime()}_{self._cache_key}'):
-            return True
-        else:
-            raise QDay()
-
-    def set_minute_block(self):
-        self._redis.set(name=f'quota_{datetime.datetime.utcnow().strftime("%m %d %Y %H:%M")}_{self._cache_key}',
-                        value=f'{datetime.datetime.utcnow().strftime("%m %d %Y %H:%M:%S")}',
-                        ex=60)
+    def take(self, amount: int = 1):
+        """Takes amount tokens from the scanner buckets, raises QMinute or QDay with the wait time otherwise."""
+        raise_for_window(*self._buckets.take(amount))
 
-    def set_day_block(self):
-        day_hours_left = (24 - datetime.datetime.utcnow().hour)
-        self._redis.set(name=f'quota_{datetime.datetime.utcnow().strftime("%m %d %Y")}_{self._cache_key}',
-                        value=f'{datetime.datetime.utcnow().strftime("%m %d %Y %H:%M:%S")}',
-                        ex=(day_hours_left + 2)*3600)
+    def pace(self, max_wait: float) -> float:
+        """Reserves the next free slot of the remaining provider quota and returns the seconds to wait for it.
+        Raises QMinute if the slot is further away than max_wait, QDay if the quota is used up."""
+        quota_left, wait_ms = QuotaMechanic._pacing_script(keys=[pacing_key(self._cache_key)], args=[int(max_wait * 1000)],
+                                                           client=self._redis)
+        if not quota_left:
+            raise QDay('Remaining quota.', wait_time=wait_ms / 1000)
+        if wait_ms > max_wait * 1000:
+            raise QMinute('Pacing.', wait_time=wait_ms / 1000)
+        return wait_ms / 1000
 
-    def set_remaining_quota(self, value):
-        day_hours_left = (24 - datetime.datetime.utcnow().hour)
-        self._redis.set(f'quota_left{get_today_as_datetime()}_{self._cache_key}', value=value,
-                        ex=(day_hours_left + 2)*3600)
+    def set_remaining_quota(self, value, window_end: datetime.datetime | None = None):
+        """Remaining provider quota until window_end (default: end of the UTC day), used by pace()."""
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            return
+        if not window_end:
+            window_end = datetime.datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + datetime.timedelta(days=1)
+        if not window_end.tzinfo:
+            window_end = window_end.replace(tzinfo=datetime.timezone.utc)
+        window_end_ms = int(window_end.timestamp() * 1000)
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.hset(pacing_key(self._cache_key), mapping={'remaining': value, 'window_end': window_end_ms})
+        pipe.pexpireat(pacing_key(self._cache_key), window_end_ms + 3600 * 1000)
+        pipe.execute()
 
 
-day_block_user_str = lambda time_lord_id, endpoint_name: f'{time_lord_id}{get_today_as_datetime()}{endpoint_name}day_block'
 day_quota_user_str = lambda time_lord_id, endpoint_name: f'{time_lord_id}{get_today_as_datetime()}{endpoint_name}quota'
 
 
 class QuotaUserAPI:
-    def __init__(self, time_lord_id: ObjectId, redis_connection=set_up_connection()):
-        self._redis = redis_connection
+    def __init__(self, time_lord_id: ObjectId, redis_connection=None):
+        self._redis = redis_connection if redis_connection else set_up_connection()
         self._time_lord_id = time_lord_id
         self._endpoint: API.Endpoint | None = None
+        self._buckets: TokenBuckets | None = None
         self._i_am_home = i_am_at_home()
 
     def inc_quota(self, endpoint_name: str, amount: int):
@@ -91,12 +236,17 @@ class QuotaUserAPI:
             if isinstance(endpoint, API.Endpoint):
                 if endpoint.endpoint_name == endpoint_:
                     self._endpoint = endpoint
-                    return
+                    break
             else:
                 if endpoint['endpoint_name'] == endpoint_:
                     self._endpoint = API.Endpoint(**endpoint)
-                    return
-        raise UserHasNoAccess(endpoint_)
+                    break
+        else:
+            raise UserHasNoAccess(endpoint_)
+        # The daily rate is a calendar day quota (usage counter), not a refilling bucket, see enough_quota.
+        self._buckets = TokenBuckets(self._redis, owner=f'{self._time_lord_id}{self._endpoint.endpoint_name}',
+                                     rates={'second': self._endpoint.second_rate,
+                                            'minute': self._endpoint.minute_rate})
 
     def enough_quota(self, amount: 1 = 1):
         if self._i_am_home:
@@ -105,27 +255,8 @@ class QuotaUserAPI:
             raise BadEndpointArguments()
         if not self._endpoint.access:
             raise UserHasNoAccess(self._endpoint.endpoint_name)
-        if self._endpoint.daily_rate == 0:
-            self.inc_quota(endpoint_name=self._endpoint.endpoint_name, amount=amount)
-            return
-        if self._redis.get(day_block_user_str(self._time_lord_id, self._endpoint.endpoint_name)):
-            raise QDay('User quota.')
-        else:
-            try:
-                current_quota = self._redis.get(day_quota_user_str(self._time_lord_id, self._endpoint.endpoint_name))
-                if isinstance(current_quota, bytes):
-                    current_quota = int(current_quota)
-                else:
-                    current_quota = 0
-                if not current_quota or (current_quota + amount <= self._endpoint.daily_rate):
-                    if self.inc_quota(self._endpoint.endpoint_name, amount) == self._endpoint.daily_rate:
-                        self._redis.set(day_block_user_str(self._time_lord_id, self._endpoint.endpoint_name), value=1, ex=(26 - datetime.datetime.utcnow().hour) * 3600)
-                    return
-                else:
-                    raise QDay('User quota.')
-            finally:
-                try:
-                    pass
-                 #   quota_lock.release()
-                except Exception:
-                    pass
+        raise_for_window(*self._buckets.take(amount,
+                                             counter_key=day_quota_user_str(self._time_lord_id, self._endpoint.endpoint_name),
+                                             counter_ttl=(26 - datetime.datetime.utcnow().hour) * 3600,
+                                             counter_limit=self._endpoint.daily_rate if self._endpoint.daily_rate else 0),
+                         'User quota.')
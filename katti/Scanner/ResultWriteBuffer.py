@@ -0,0 +1,148 @@
+import threading
+import time
+from collections import defaultdict
+from bson import ObjectId
+from mongoengine import get_db
+from pymongo import UpdateMany
+from pymongo.errors import BulkWriteError
+from katti.RedisCacheLayer.RedisMongoCache import RedisMongoCache
+from katti.RedisCacheLayer.Keys.Scanner import result_ready_channel, RESULT_READY, RESULT_RELEASED
+
+DUPLICATE_KEY_ERROR = 11000
+FLUSH_ATTEMPTS = 3
+FLUSH_RETRY_DELAY = 0.5
+
+
+class ResultWriteBuffer:
+    """Collects new scanning results of a task and writes them with one insert_many per collection and one bulk_write
+    per backpropagation collection. Bulk ops of sub documents (e.g. DNS records) are written before the results that
+    reference them. The Redis cache entry, the publish and the lock release happen per result in add_result, so
+    waiting workers never depend on the flush.
+    Every write is idempotent (pre assigned ids, upserts, $addToSet), so whatever a flush could not write is put back
+    into the buffer and retried. The stages are written independently, a failing collection does not block the others.
+    """
+
+    def __init__(self, redis_cache: RedisMongoCache, logger, max_size: int = 50):
+        self._redis_cache = redis_cache
+        self.logger = logger
+        self.max_size = max(max_size, 1)
+        self._results = []
+        self._backpropagation = defaultdict(list)
+        self._bulk_ops = defaultdict(list)
+        # Async workers add their results from threads.
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._results)
+
+    def add_result(self, scanning_result, cache_key: str | None = None, ttl: int = 0, lock=None):
+        published = False
+        try:
+            scanning_result.validate()
+            if scanning_result.id is None:
+                # Cached and backpropagated before the insert, so the id has to exist already.
+                scanning_result.id = ObjectId()
+            if cache_key:
+                self._redis_cache.set_mongoengine_objects([(scanning_result, cache_key, ttl)],
+                                                          publish=[(result_ready_channel(cache_key), RESULT_READY)])
+                published = True
+        finally:
+            if lock:
+                self._release_lock(lock)
+                if cache_key and not published:
+                    # Waiting workers must not block until max_wait_time, they scan themselves.
+                    self._publish_release(cache_key)
+        with self._lock:
+            self._results.append(scanning_result)
+            if len(self._results) >= self.max_size:
+                self.flush()
+
+    def add_backpropagation(self, collection: str, ids: list, field_name: str, result_id):
+        with self._lock:
+            self._backpropagation[collection].append(UpdateMany({'_id': {'$in': ids}},
+                                                                {'$addToSet': {f'backpropagation.{field_name}': result_id}}))
+
+    def add_bulk_ops(self, collection: str, ops: list):
+        with self._lock:
+            self._bulk_ops[collection].extend(ops)
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        for attempt in range(1, FLUSH_ATTEMPTS + 1):
+            errors = self._flush_once()
+            if not errors:
+                return
+            self.logger.warning(f'Flush attempt {attempt}/{FLUSH_ATTEMPTS} failed, {len(self._results)} results and '
+                                f'{sum(len(ops) for ops in self._bulk_ops.values())} bulk ops are kept: {errors}')
+            if attempt < FLUSH_ATTEMPTS:
+                time.sleep(FLUSH_RETRY_DELAY * attempt)
+        raise errors[0]
+
+    def _flush_once(self) -> list[Exception]:
+        results, self._results = self._results, []
+        backpropagation, self._backpropagation = self._backpropagation, defaultdict(list)
+        bulk_ops, self._bulk_ops = self._bulk_ops, defaultdict(list)
+        errors = []
+        for collection, ops in self._execute_bulk_ops(bulk_ops, errors).items():
+            self._bulk_ops[collection] = ops + self._bulk_ops[collection]
+        self._results = self._insert_results(results, errors) + self._results
+        for collection, ops in self._execute_bulk_ops(backpropagation, errors).items():
+            self._backpropagation[collection] = ops + self._backpropagation[collection]
+        return errors
+
+    def _insert_results(self, results, errors: list) -> list:
+        """Returns the results that could not be written."""
+        collections = defaultdict(list)
+        for result in results:
+            collections[result._get_collection_name()].append(result)
+        unwritten = []
+        for collection_name, docs in collections.items():
+            try:
+                docs[0]._get_collection().insert_many([doc.to_mongo() for doc in docs], ordered=False)
+            except BulkWriteError as e:
+                if any(error.get('code') != DUPLICATE_KEY_ERROR for error in e.details.get('writeErrors', [])):
+                    errors.append(e)
+                    unwritten.extend(docs)
+                    continue
+                self.logger.debug(f'Results already saved: {len(e.details["writeErrors"])}')
+            except Exception as e:
+                errors.append(e)
+                unwritten.extend(docs)
+                continue
+            for doc in docs:
+                doc._created = False
+                doc._clear_changed_fields()
+        return unwritten
+
+    @staticmethod
+    def _execute_bulk_ops(bulk_ops, errors: list) -> dict:
+        """Returns the ops of the collections that could not be written."""
+        unwritten = {}
+        if len(bulk_ops) == 0:
+            return unwritten
+        db = get_db('Katti')
+        for collection, ops in bulk_ops.items():
+            if len(ops) == 0:
+                continue
+            try:
+                db[collection].bulk_write(ops, ordered=False)
+            except Exception as e:
+                errors.append(e)
+                unwritten[collection] = ops
+        return unwritten
+
+    def _publish_release(self, cache_key: str):
+        try:
+            self._redis_cache.publish(result_ready_channel(cache_key), RESULT_RELEASED)
+        except Exception:
+            self.logger.error(f'Publishing the lock release of {cache_key} failed.')
+
+    @staticmethod
+    def _release_lock(lock):
+        try:
+            lock.release()
+        except Exception:
+            pass
@@ -1,3 +1,5 @@
+import asyncio
+import concurrent.futures
 import datetime
 import json
 import typing
@@ -13,13 +15,14 @@ from pydantic import Field, ValidationError, field_validator
 from pydantic.dataclasses import dataclass
 from sslyze.errors import ServerHostnameCouldNotBeResolved
 from sslyze import ServerScanRequest, ServerNetworkLocation, ScanCommand, Scanner, \
-    SslyzeOutputAsJson, ServerScanResultAsJson
+    SslyzeOutputAsJson, ServerScanResultAsJson, ServerScanResult
 from katti.DataBaseStuff.MongoengineDocuments.Scanner.SSLScanner import SSLScanResult, TLSResult, SSLScannerDB, \
     CipherSuiteEphemeralKey, CipherSuite, EphemeralKey, Certificatenfo
 from katti.DataBaseStuff.MongoengineDocuments.Scanner.BaseMongoEngineDocument import BaseScanningRequests, \
     BaseScannerDocument
 from katti.Scanner import SSL_SCANNER_ALLOWED_COMMANDS
 from katti.Scanner.BaseScanner import BaseScanner, BaseScanningRequestForScannerObject, OOI
+from katti.KattiUtils.Configs.ConfigKeys import SSLYZE_MAX_PARALLEL_BATCHES
 
 
 @dataclass(config=PydanticConfig)
@@ -78,6 +81,70 @@ def build_ciph_ep(result_list):
     return ciper_eph
 
 
+class SslyzeBatch:
+    """Queues the scan requests of all workers of a task into one sslyze Scanner. Requests submitted within
+    batch_window seconds of the first one share the Scanner, which runs in a thread of the batch's own executor, so
+    the hostname resolution in the default executor never queues behind a batch. Every result is handed to the
+    waiting worker as soon as sslyze yields it, scan raises TimeoutError if that takes longer than timeout seconds."""
+
+    def __init__(self, per_server_concurrent_connections_limit: int, concurrent_server_scans_limit: int,
+                 batch_window: float, timeout: float, max_parallel_batches: int = SSLYZE_MAX_PARALLEL_BATCHES):
+        self._per_server_concurrent_connections_limit = per_server_concurrent_connections_limit
+        self._concurrent_server_scans_limit = concurrent_server_scans_limit
+        self._batch_window = batch_window
+        self._timeout = timeout
+        self._pending: list[tuple[ServerScanRequest, asyncio.Future]] = []
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_parallel_batches,
+                                                               thread_name_prefix='sslyze_batch')
+
+    async def scan(self, scan_request: ServerScanRequest) -> ServerScanResult:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((scan_request, future))
+        if len(self._pending) == 1:
+            loop.call_later(self._batch_window, self._start_batch, loop)
+        return await asyncio.wait_for(future, timeout=self._timeout)
+
+    def close(self):
+        """Batches already running finish in the background, queued ones are dropped."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _start_batch(self, loop: asyncio.AbstractEventLoop):
+        batch, self._pending = self._pending, []
+        loop.run_in_executor(self._executor, self._run_batch, loop, batch)
+
+    def _run_batch(self, loop: asyncio.AbstractEventLoop, batch: list[tuple[ServerScanRequest, asyncio.Future]]):
+        futures = {scan_request.uuid: future for scan_request, future in batch}
+        try:
+            scanner = Scanner(per_server_concurrent_connections_limit=self._per_server_concurrent_connections_limit,
+                              concurrent_server_scans_limit=self._concurrent_server_scans_limit)
+            scanner.queue_scans([scan_request for scan_request, _ in batch])
+            for result in scanner.get_results():
+                if result.uuid in futures:
+                    self._resolve(loop, futures.pop(result.uuid), result=result)
+        except Exception as e:
+            for future in futures.values():
+                self._resolve(loop, future, exception=e)
+            return
+        for future in futures.values():
+            self._resolve(loop, future, exception=Exception('sslyze returned no result'))
+
+    @staticmethod
+    def _resolve(loop: asyncio.AbstractEventLoop, future: asyncio.Future, result=None, exception: Exception | None = None):
+        def resolve():
+            if future.done():
+                return
+            if exception:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+        try:
+            loop.call_soon_threadsafe(resolve)
+        except RuntimeError:
+            # Loop closed, the task is gone.
+            pass
+
+
 class SSLScanner(BaseScanner):
     _db_document: SSLScannerDB
     scanning_request: DomainsForSSLScanningRequest
@@ -119,25 +186,43 @@ class SSLScanner(BaseScanner):
     def kwargs_for_building_scanning_request(self) -> dict:
         return {'port': self.scanning_request.port, 'scan_commands': self.scanning_request.scan_commands_ordered}
 
-    def _do_your_scanning_job(self):
+    def _init(self):
+        self._sslyze_batch: SslyzeBatch | None = None
+
+    def prepare_chunk(self, scanning_request):
+        super().prepare_chunk(scanning_request)
+        if self._sslyze_batch:
+            self._sslyze_batch.close()
+        self._sslyze_batch = SslyzeBatch(per_server_concurrent_connections_limit=self.scanner_document.per_server_concurrent_connections_limit,
+                                         concurrent_server_scans_limit=self.scanner_document.concurrent_server_scans_limit,
+                                         batch_window=self.scanner_document.batch_window_ms / 1000,
+                                         timeout=self.scanner_document.scan_timeout)
+
+    def _build_scan_request(self) -> ServerScanRequest:
+        # Resolves the hostname.
+        location = ServerNetworkLocation(hostname=self.next_ooi_obj.ooi, port=self.scanning_request.port)
+        scan_commands = []
+        for scan_command_str in self.scanning_request.scan_commands_ordered:
+            scan_commands.append(ScanCommand(value=scan_command_str))
+        return ServerScanRequest(server_location=location, scan_commands=scan_commands)
+
+    async def _do_your_scanning_job(self):
         try:
-            location = ServerNetworkLocation(hostname=self.next_ooi_obj.ooi, port=self.scanning_request.port)
-            scan_commands = []
-            for scan_command_str in self.scanning_request.scan_commands_ordered:
-                scan_commands.append(ScanCommand(value=scan_command_str))
-            all_scan_requests = [
-                ServerScanRequest(server_location=location, scan_commands=scan_commands),
-            ]
+            scan_request = await asyncio.to_thread(self._build_scan_request)
         except ServerHostnameCouldNotBeResolved:
             self.scanning_result.hostname_could_not_resolved = True
         else:
             start = datetime.datetime.utcnow()
-            scanner = Scanner()
-            scanner.queue_scans(all_scan_requests)
+            try:
+                result = await self._sslyze_batch.scan(scan_request)
+            except asyncio.TimeoutError:
+                self.logger.info(f'sslyze timeout: {self.next_ooi_obj.ooi}')
+                self.scanning_result.scan_timeout = True
+                return
             stop = datetime.datetime.utcnow()
             try:
                 json_output = SslyzeOutputAsJson(
-                    server_scan_results=[ServerScanResultAsJson.from_orm(result) for result in scanner.get_results()],
+                    server_scan_results=[ServerScanResultAsJson.from_orm(result)],
                     date_scans_started=start,
                     date_scans_completed=stop,
                 )
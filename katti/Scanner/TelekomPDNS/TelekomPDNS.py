@@ -5,7 +5,7 @@ import traceback
 import typing
 from katti.DataBaseStuff.MongoengineDocuments.Common.Link import IP
 from mongoengine.fields import dateutil
-import requests
+import aiohttp
 from pydantic.dataclasses import dataclass
 from katti.DataBaseStuff.MongoengineDocuments.Scanner.BaseMongoEngineDocument import BaseScanningRequests, \
     BaseScannerDocument
@@ -14,7 +14,6 @@ from katti.DataBaseStuff.MongoengineDocuments.ScannerExecutionInformation import
 from katti.KattiUtils.Configs.pydanticStuff import PydanticConfig
 from katti.KattiUtils.Exceptions.CommonExtensions import ExtremeFailure
 from katti.Scanner.BaseScanner import BaseScanner, BaseScanningRequestForScannerObject, OOI
-from requests.auth import HTTPBasicAuth
 from katti.DataBaseStuff.MongoengineDocuments.Scanner.TelekomPDNS import PDNSEntry, PDNSRequest, TelekomPDNSScannerConfig, \
     AllSubDomains, DGAClassifier, G2Score
 from katti.Scanner.QuotaMechanic import DayBlockException
@@ -56,6 +55,10 @@ class TelekomPDNS(BaseScanner):
     scanner_document: TelekomPDNSScannerConfig
     scanning_request: TelekomPDNSRequest
 
+    @staticmethod
+    def scanner_has_quota() -> bool:
+        return True
+
     @classmethod
     def get_celery_config(cls) -> [BaseScanningRequestForScannerObject, callable]:
         from katti.CeleryApps.ScanningTasks import telekom_api
@@ -100,23 +103,24 @@ class TelekomPDNS(BaseScanner):
     def get_scanner_mongo_document_class():
         return TelekomPDNSScannerConfig
 
-    def _do_your_scanning_job(self):
+    async def _do_your_scanning_job(self):
         match self.scanning_request.endpoint:
             case 'dga_classifier':
                 v = 'v2'
             case _:
                 v = 'v1'
         try:
-            response = requests.get(
-                f'{self.scanner_document.url}/{v}/{self.scanning_request.endpoint}/{self.next_ooi_obj.ooi}?format=json',
-                auth=HTTPBasicAuth(self.scanner_document.user, self.scanner_document.api_key), )
+            async with self.http_session.get(
+                    f'{self.scanner_document.url}/{v}/{self.scanning_request.endpoint}/{self.next_ooi_obj.ooi}?format=json',
+                    auth=aiohttp.BasicAuth(self.scanner_document.user, self.scanner_document.api_key), ) as response:
+                content = await response.read()
         except Exception:
             self.logger.exception(f'Telekom PDNS fail: {traceback.format_exception(*sys.exc_info())}')
             raise
         else:
-            match response.status_code:
+            match response.status:
                 case 200:
-                    resp_json = json.loads(response.content)
+                    resp_json = json.loads(content)
                     self._set_and_get_quota(response.headers)
                     match self.scanning_request.endpoint:
                         case 'ip' | 'domain' | 'nxdomain':
@@ -180,20 +184,17 @@ class TelekomPDNS(BaseScanner):
                             self.scanning_result.results.append(new_g2_scroe)
                 case _:
                     self._check_quota_pdns(response.headers)
-                    self.logger.error(f'Bad status code: {response.status_code}')
-                    raise ExtremeFailure(f'Bad status code: {response.status_code}')
+                    self.logger.error(f'Bad status code: {response.status}')
+                    raise ExtremeFailure(f'Bad status code: {response.status}')
 
     def _check_quota_pdns(self, response_headers):
             quota = self._set_and_get_quota(response_headers)
-            if quota and quota == 0:
+            if quota is not None and str(quota).strip() == '0':
                 raise DayBlockException()
 
     def _set_and_get_quota(self, response_headers):
-        try:
-            quota = response_headers.get('X-RateLimit-Remaining-Day')
-            self.quota.set_remaining_quota(quota)
-        except Exception:
-            quota = None
+        quota = response_headers.get('X-RateLimit-Remaining-Day')
+        self.quota.set_remaining_quota(quota)
         return quota
 
     def _parse_response(self, resp_json, endpoint):
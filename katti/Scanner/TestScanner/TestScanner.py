@@ -13,7 +13,8 @@ class TestScannerDB(BaseScannerDocument):
 
 
 class TestRequestDB(BaseScanningRequests):
-    meta = {'collection': 'test_request'}
+    meta = {'collection': 'test_request',
+            'indexes': [{'fields': ['ooi', '-id']}]}
 
     def _update_sub_documents(self, new_meta_data_as_SON: SON):
         pass
@@ -1,3 +1,4 @@
+import asyncio
 import subprocess
 import typing
 import katti.jc as jc
@@ -81,18 +82,47 @@ class Traceroute(BaseScanner):
     def get_scanner_mongo_document_class():
         return TracerouteConfig
 
-    def _do_your_scanning_job(self):
+    def _build_cmd(self) -> list[str]:
+        return ['traceroute', '-I', '-w', str(self.scanner_document.probe_wait), '-m', str(self.scanner_document.max_hops),
+                f'{self.next_ooi_obj.ooi}']
+
+    async def _run_traceroute(self) -> tuple[str, bool]:
+        """Output and whether the deadline was hit. Runs without blocking the loop, so max_concurrent_oois
+        traceroutes of the chunk run at the same time."""
+        process = await asyncio.create_subprocess_exec(*self._build_cmd(), stdout=asyncio.subprocess.PIPE,
+                                                       preexec_fn=preexec_function)
+        output = []
+        try:
+            async with asyncio.timeout(self.scanner_document.deadline):
+                while line := await process.stdout.readline():
+                    output.append(line)
+        except TimeoutError:
+            process.kill()
+            await process.wait()
+            return b''.join(output).decode(errors='replace'), True
+        if await process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, 'traceroute', b''.join(output))
+        return b''.join(output).decode(errors='replace'), False
+
+    async def _do_your_scanning_job(self):
         try:
-            cmd_output = subprocess.check_output(['traceroute', '-I', f'{self.next_ooi_obj.ooi}'], preexec_fn=preexec_function,
-                                                 text=True)
+            cmd_output, deadline_exceeded = await self._run_traceroute()
         except Exception as e:
             self.scanning_result.traceroute_exc = f'{e}'
-        else:
-            result = jc.parse('traceroute', cmd_output)
-            hops = []
-            for hop in result['hops']:
-                if len(hop['probes']) > 0:
-                    hops.append(hop)
-            self.scanning_result.hops = hops
-            self.scanning_result.hops_counter = len(hops)
-            self.scanning_result.destination_ip = result['destination_ip']
+            return
+        if deadline_exceeded:
+            self.scanning_result.traceroute_exc = f'Deadline of {self.scanner_document.deadline}s exceeded'
+        try:
+            with self.phase_timer.measure('parse'):
+                result = jc.parse('traceroute', cmd_output)
+        except Exception as e:
+            if not deadline_exceeded:
+                self.scanning_result.traceroute_exc = f'{e}'
+            return
+        hops = []
+        for hop in result['hops']:
+            if len(hop['probes']) > 0:
+                hops.append(hop)
+        self.scanning_result.hops = hops
+        self.scanning_result.hops_counter = len(hops)
+        self.scanning_result.destination_ip = result['destination_ip']
@@ -115,18 +115,21 @@ class VirusTotal(BaseScanner):
     def additional_filter_fields(self) -> dict:
         return {'api_endpoint': self.scanning_request.endpoint}
 
-    def _do_your_scanning_job(self):
+    async def _do_your_scanning_job(self):
         self._vt_client = vt.Client(self.scanner_document.api_key)
-        self._get_vt_answer()
+        try:
+            await self._get_vt_answer()
+        finally:
+            await self._vt_client.close_async()
 
-    def _get_vt_answer(self):
+    async def _get_vt_answer(self):
         match self.scanning_request.endpoint:
             case 'urls':
                 ioc = vt.url_id(self.next_ooi_obj.ooi)
             case _:
                 ioc = self.next_ooi_obj.ooi
         try:
-            response = self._vt_client.get_json("/{}/{}".format(self.scanning_request.endpoint, ioc))['data'][
+            response = (await self._vt_client.get_json_async("/{}/{}".format(self.scanning_request.endpoint, ioc)))['data'][
                 'attributes']
             self._hash_answer_string = hashlib.md5(json.dumps(response).encode()).hexdigest()
             self._escape(response)
@@ -139,7 +142,7 @@ class VirusTotal(BaseScanner):
                 self._hash_answer_string = hashlib.md5(json.dumps({'response': 'NotFoundError', 'ooi': self.next_ooi_obj.ooi}).encode()).hexdigest()
                 self._build_result(response={'response': 'NotFoundError'})
             elif e.code == 'QuotaExceededError':
-                self._ups_quota_failure()
+                await self._ups_quota_failure()
             else:
                 self.logger.debug(f'VT Error {e}')
         except (ConnectionResetError, client_exceptions.ClientConnectorError):
@@ -213,9 +216,9 @@ class VirusTotal(BaseScanner):
                         'result': result} for partner, result in response.get('categories', {}).items()]
             response['categories'] = results
 
-    def _ups_quota_failure(self):
+    async def _ups_quota_failure(self):
         try:
-            vt_quota = self._vt_client.get_json("/{}/{}".format('users', self.scanner_document.api_key))['data']['attributes']['quotas']['api_requests_daily']
+            vt_quota = (await self._vt_client.get_json_async("/{}/{}".format('users', self.scanner_document.api_key)))['data']['attributes']['quotas']['api_requests_daily']
         except Exception:
             self.quota.set_remaining_quota(0)
             self.logger.error(traceback.format_exception(*sys.exc_info()))
@@ -1,5 +1,10 @@
 import secrets
+from katti.CeleryBeatMongo.models import PeriodicTask, Interval
 from katti.DataBaseStuff.ConnectDisconnect import context_manager_db
+from katti.DataBaseStuff.IndexManagement import ensure_result_indexes, explain_freshness_queries, \
+    ensure_time_series_collection, migrate_dns_record_ids
+from katti.DataBaseStuff.MongoengineDocuments.Scanner.DNSServerConfig import DNSRecord
+from katti.DataBaseStuff.MongoengineDocuments.StatisticDocuments.ScannerTaskStatistics import ScannerLatencyHistogram
 from katti.DataBaseStuff.MongoengineDocuments.UserManagement.TimeLord import TimeLord, API
 from katti.KattiUtils.Configs.Paths import KATTI_SCANNER_CONFIG
 from katti.KattiUtils.ConfigRead import ReadConfigWithSecrets
@@ -7,6 +12,7 @@ from katti.Scanner import load_all_scanner_cls
 from katti.Scanner.BaseScanner import BaseScanner, InitScanner_config
 from katti.Scanner.Helpers import get_all_endpoints
 from katti.KattiUtils.Configs.ConfigHolder import ConfigDatabaseObject
+from katti.RedisCacheLayer.RedisMongoCache import RedisMongoCache
 
 system_user = {'first_name': 'drwho',
                     'last_name': 'drwho',
@@ -22,6 +28,19 @@ def set_up_scanner():
         print(
             f'Updated scanner: {scanner["name"]} ID: {scanner_type_cls_mapping[scanner["scanner_type"]].add_final_scanner_to_system(InitScanner_config(**scanner)).id}')
 
+def set_up_indexes():
+    load_all_scanner_cls()
+    scanner_classes = [cls for cls_name, cls in BaseScanner.get_registry().items() if not cls_name == 'BaseScanner']
+    for collection_name in ensure_result_indexes(scanner_classes):
+        print(f'Indexes are ready: {collection_name}')
+    print(f'DNS records moved to content addressed IDs: {migrate_dns_record_ids()}')
+    DNSRecord.ensure_indexes()
+    ensure_time_series_collection(ScannerLatencyHistogram)
+    for query in explain_freshness_queries(scanner_classes):
+        if query['collscan']:
+            print(f'Unindexed query shape: {query["collection"]} {query["query_shape"]}')
+
+
 def set_up_system_user():
     new_system_user = TimeLord(**system_user)
     new_system_user.ensure_indexes()
@@ -31,10 +50,21 @@ def set_up_system_user():
         key=str(secrets.token_urlsafe( 30 * 3 // 4)))
     as_son = new_system_user.to_mongo()
     x = TimeLord.objects(first_name=new_system_user.first_name).modify(__raw__={'$set': as_son}, upsert=True,   new=True)
+    RedisMongoCache().invalidate_cached_document(namespace='time_lord', cache_key=str(x.id))
     print(f'System user is ready. The ID is: {x.id}')
     return x.id
 
 
+def set_up_periodic_tasks():
+    """System tasks of the beat scheduler. Existing tasks are kept, so changes made to them survive a new set up."""
+    for name, task, interval in [('flush_latency_histograms', 'katti.CeleryApps.Common.flush_latency_histograms',
+                                  Interval(every=1, period='minutes'))]:
+        if PeriodicTask.objects(name=name).first():
+            continue
+        PeriodicTask(name=name, task=task, interval=interval, run_immediately=True).save()
+        print(f'Periodic task is ready: {name}')
+
+
 def set_up_config_stuff():
     pass
 
@@ -46,3 +76,5 @@ if __name__ == '__main__':
         print(id)
         ConfigDatabaseObject(system_user_id=id).save()
         set_up_scanner()
+        set_up_indexes()
+        set_up_periodic_tasks()
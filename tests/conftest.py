@@ -0,0 +1,17 @@
+import pytest
+
+STUB_ZONE = {('www.example.test.', 'A'): ['192.0.2.1', '192.0.2.2'],
+             ('www.example.test.', 'AAAA'): ['2001:db8::1'],
+             ('example.test.', 'MX'): ['10 mail.example.test.'],
+             ('example.test.', 'TXT'): ['"v=spf1 -all"']}
+STUB_NXDOMAINS = ['nx.example.test.']
+
+
+@pytest.fixture
+def stub_dns_server():
+    pytest.importorskip('dns.message')
+    from dns_stub import StubDNSServer
+    server = StubDNSServer(zone=STUB_ZONE, nxdomains=STUB_NXDOMAINS)
+    server.start()
+    yield server
+    server.stop()
@@ -0,0 +1,55 @@
+import socket
+import threading
+import dns.flags
+import dns.message
+import dns.rcode
+import dns.rdatatype
+import dns.rrset
+
+STUB_TTL = 300
+STUB_SOA = 'ns.example.test. hostmaster.example.test. 1 3600 600 86400 60'
+
+
+class StubDNSServer(threading.Thread):
+    """Authoritative UDP name server on 127.0.0.1 for the tests. zone: {(name, record type): [rdata]},
+    nxdomains: names that do not exist, including everything below them. Received query names end up in queries."""
+
+    def __init__(self, zone: dict[tuple[str, str], list[str]], nxdomains: list[str] | None = None):
+        super().__init__(daemon=True)
+        self.zone = zone
+        self.nxdomains = nxdomains if nxdomains else []
+        self.queries: list[str] = []
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind(('127.0.0.1', 0))
+        self._socket.settimeout(0.1)
+        self.port = self._socket.getsockname()[1]
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.is_set():
+            try:
+                wire, address = self._socket.recvfrom(4096)
+            except socket.timeout:
+                continue
+            self._socket.sendto(self.answer(dns.message.from_wire(wire)).to_wire(), address)
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+        self._socket.close()
+
+    def answer(self, query: dns.message.Message) -> dns.message.Message:
+        response = dns.message.make_response(query)
+        response.flags |= dns.flags.AA | dns.flags.RA
+        question = query.question[0]
+        name = question.name.to_text()
+        self.queries.append(name)
+        if any(name == nxdomain or name.endswith(f'.{nxdomain}') for nxdomain in self.nxdomains):
+            response.set_rcode(dns.rcode.NXDOMAIN)
+            response.authority.append(dns.rrset.from_text('example.test.', STUB_TTL, 'IN', 'SOA', STUB_SOA))
+            return response
+        record_type = dns.rdatatype.to_text(question.rdtype)
+        if (name, record_type) in self.zone:
+            response.answer.append(dns.rrset.from_text_list(name, STUB_TTL, 'IN', record_type,
+                                                            self.zone[(name, record_type)]))
+        return response
@@ -0,0 +1,78 @@
+import time
+
+
+def _encode(value) -> bytes:
+    return value if isinstance(value, bytes) else str(value).encode()
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self._redis = redis
+        self._calls = []
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self._calls.append((name, args, kwargs))
+            return self
+        return call
+
+    def execute(self):
+        calls, self._calls = self._calls, []
+        return [getattr(self._redis, name)(*args, **kwargs) for name, args, kwargs in calls]
+
+
+class FakeRedis:
+    """In-memory stand-in for the few redis.Redis commands the scanner code under test uses. Values come back as
+    bytes like from redis-py."""
+
+    def __init__(self):
+        self._values: dict[str, bytes] = {}
+        self._hashes: dict[str, dict[bytes, bytes]] = {}
+        self._expires: dict[str, float] = {}
+
+    def _alive(self, key: str) -> bool:
+        if key in self._expires and self._expires[key] <= time.monotonic():
+            self.delete(key)
+        return key in self._values or key in self._hashes
+
+    def pipeline(self, transaction: bool = True):
+        return FakePipeline(self)
+
+    def get(self, key):
+        return self._values.get(key) if self._alive(key) else None
+
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+
+    def set(self, key, value, ex=None, px=None, nx=False):
+        if nx and self._alive(key):
+            return None
+        self._values[key] = _encode(value)
+        self._expires.pop(key, None)
+        if ex:
+            self.expire(key, ex)
+        elif px:
+            self.expire(key, px / 1000)
+        return True
+
+    def setnx(self, key, value):
+        return self.set(key, value, nx=True)
+
+    def delete(self, *keys):
+        deleted = 0
+        for key in keys:
+            deleted += int(self._values.pop(key, None) is not None or self._hashes.pop(key, None) is not None)
+            self._expires.pop(key, None)
+        return deleted
+
+    def expire(self, key, seconds):
+        self._expires[key] = time.monotonic() + seconds
+        return True
+
+    def hincrby(self, key, field, amount=1):
+        values = self._hashes.setdefault(key, {})
+        values[_encode(field)] = _encode(int(values.get(_encode(field), b'0')) + amount)
+        return int(values[_encode(field)])
+
+    def hgetall(self, key):
+        return dict(self._hashes.get(key, {})) if self._alive(key) else {}
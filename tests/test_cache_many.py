@@ -0,0 +1,74 @@
+import threading
+import pytest
+import katti.RedisCacheLayer.RedisMongoCache as redis_mongo_cache
+from katti.RedisCacheLayer.Codecs import CacheCodec, NEGATIVE_ENTRY
+from katti.RedisCacheLayer.RedisMongoCache import RedisMongoCache
+from fake_redis import FakeRedis
+
+# Newest first per ooi
+HISTORY = {'a': [{'_id': 3, 'ooi': 'a'}, {'_id': 1, 'ooi': 'a'}],
+           'b': [{'_id': 2, 'ooi': 'b'}]}
+
+
+class FakeQuerySet:
+    def __init__(self, documents, mongo_filter):
+        self._documents = documents
+        self.mongo_filter = mongo_filter
+        self.order = None
+        self.limit_count = None
+
+    def order_by(self, order):
+        self.order = order
+        return self
+
+    def limit(self, count):
+        self.limit_count = count
+        return self
+
+    def as_pymongo(self):
+        self._documents.threads.add(threading.current_thread().name)
+        return HISTORY.get(self.mongo_filter['ooi'], [])[:self.limit_count]
+
+
+class FakeDocuments:
+    """Records every query like mongoengine_cls.objects(**mongo_filter) would get it."""
+    queries: list[FakeQuerySet] = []
+    threads: set[str] = set()
+
+    @classmethod
+    def objects(cls, **mongo_filter):
+        query_set = FakeQuerySet(cls, mongo_filter)
+        cls.queries.append(query_set)
+        return query_set
+
+    @staticmethod
+    def _get_collection_name():
+        return 'fake_documents'
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    monkeypatch.setattr(redis_mongo_cache, 'REDIS_CONNECTION', FakeRedis())
+    monkeypatch.setattr(redis_mongo_cache, 'CACHE_CODEC', CacheCodec())
+    FakeDocuments.queries, FakeDocuments.threads = [], set()
+    return RedisMongoCache()
+
+
+def test_misses_get_the_newest_document_each(cache):
+    cache.redis_connection.set('key_c', CacheCodec().encode({'_id': 4, 'ooi': 'c'}))
+    results = cache.get_mongoengine_cache_many({'key_a': {'ooi': 'a'}, 'key_b': {'ooi': 'b'}, 'key_c': {'ooi': 'c'},
+                                                'key_x': {'ooi': 'x'}}, FakeDocuments)
+    assert results == {'key_a': {'_id': 3, 'ooi': 'a'}, 'key_b': {'_id': 2, 'ooi': 'b'},
+                       'key_c': {'_id': 4, 'ooi': 'c'}, 'key_x': None}
+    assert sorted(query.mongo_filter['ooi'] for query in FakeDocuments.queries) == ['a', 'b', 'x']
+    assert all(query.order == '-id' and query.limit_count == 1 for query in FakeDocuments.queries)
+    assert all(thread.startswith('cache_many') for thread in FakeDocuments.threads)
+
+
+def test_results_and_misses_are_cached(cache):
+    cache.get_mongoengine_cache_many({'key_a': {'ooi': 'a'}, 'key_x': {'ooi': 'x'}}, FakeDocuments)
+    assert cache.redis_connection.get('key_x') == NEGATIVE_ENTRY
+    FakeDocuments.queries = []
+    results = cache.get_mongoengine_cache_many({'key_a': {'ooi': 'a'}, 'key_x': {'ooi': 'x'}}, FakeDocuments)
+    assert results == {'key_a': {'_id': 3, 'ooi': 'a'}, 'key_x': None}
+    assert FakeDocuments.queries == []
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+import pytest
+from bson import ObjectId
+import katti.RedisCacheLayer.RedisMongoCache as redis_mongo_cache
+import katti.Scanner.DNS.DNSResolver as dns_resolver_module
+from katti.RedisCacheLayer.Codecs import CacheCodec
+from katti.DataBaseStuff.MongoengineDocuments.Scanner.DNSServerConfig import DNSConfig
+from katti.DataBaseStuff.MongoengineDocuments.UserManagement.Tag import Ownership
+from katti.Scanner.DNS.DNSResolver import DNSResolver, DomainForDNS, DomainsForDNSResolverRequest
+from katti.Scanner.DNS.ResolverBackends import DnsPythonBackend
+from katti.Scanner.ResultWriteBuffer import ResultWriteBuffer
+from fake_redis import FakeRedis
+
+
+class StubPortBackend(DnsPythonBackend):
+    def __init__(self, port: int):
+        self.port = port
+
+    async def query_async(self, *args, **kwargs):
+        return await super().query_async(*args, **kwargs, timeout=5, port=self.port)
+
+
+@pytest.fixture
+def new_resolver(monkeypatch, stub_dns_server):
+    monkeypatch.setattr(redis_mongo_cache, 'REDIS_CONNECTION', FakeRedis())
+    monkeypatch.setattr(redis_mongo_cache, 'CACHE_CODEC', CacheCodec())
+    monkeypatch.setattr(dns_resolver_module, 'get_resolver_backend', lambda name: StubPortBackend(stub_dns_server.port))
+    scanning_request = DomainsForDNSResolverRequest(scanner_id=ObjectId(), oois=[], dig_type='A',
+                                                    ownership_obj=Ownership(owner=ObjectId()))
+
+    def new_resolver(scanner_id: ObjectId) -> DNSResolver:
+        """A scanner with an empty local NXDOMAIN cache, the Redis connection is shared."""
+        scanner = DNSResolver(task=None, logger=logging.getLogger('test'))
+        scanner.scanner_document = DNSConfig(id=scanner_id, name=f'stub{scanner_id}', scanner_type='dns',
+                                             name_server_ips=['127.0.0.1'], allowed_record_types=['A'],
+                                             resolver_backend='dnspython', nxdomain_cut=True)
+        scanner._result_buffer = ResultWriteBuffer(redis_cache=scanner.redis_cache, logger=scanner.logger)
+        scanner.scanning_request = scanning_request
+        return scanner
+    return new_resolver
+
+
+def resolve(scanner: DNSResolver, domain: str):
+    scanner.next_ooi_obj = DomainForDNS(raw_ooi=domain)
+    scanner._build_scanning_result()
+    asyncio.run(scanner._do_your_scanning_job())
+    return scanner.scanning_result.queries[-1]
+
+
+def test_descendants_of_a_nxdomain_are_synthesized(new_resolver, stub_dns_server):
+    scanner_id = ObjectId()
+    query = resolve(new_resolver(scanner_id), 'nx.example.test')
+    assert query.status == 'NXDOMAIN'
+    assert query.answer_source is None
+    assert stub_dns_server.queries == ['nx.example.test.']
+
+    # Other scanner object, so the cut comes from Redis
+    query = resolve(new_resolver(scanner_id), 'a.b.nx.example.test')
+    assert query.status == 'NXDOMAIN'
+    assert query.answer_source == 'nxdomain_cut'
+    assert query.nxdomain_parent == 'nx.example.test'
+    assert query.min_dns_ttl > 0
+    assert stub_dns_server.queries == ['nx.example.test.']
+
+
+def test_cut_does_not_cover_siblings(new_resolver, stub_dns_server):
+    scanner = new_resolver(ObjectId())
+    resolve(scanner, 'nx.example.test')
+    query = resolve(scanner, 'www.example.test')
+    assert query.status == 'NOERROR'
+    assert query.answer_source is None
+    assert stub_dns_server.queries == ['nx.example.test.', 'www.example.test.']
+
+
+def test_cut_is_scoped_to_the_scanner(new_resolver, stub_dns_server):
+    resolve(new_resolver(ObjectId()), 'nx.example.test')
+    query = resolve(new_resolver(ObjectId()), 'a.nx.example.test')
+    assert query.status == 'NXDOMAIN'
+    assert query.answer_source is None
+    assert stub_dns_server.queries == ['nx.example.test.', 'a.nx.example.test.']
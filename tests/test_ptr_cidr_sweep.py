@@ -0,0 +1,42 @@
+import pickle
+from bson import ObjectId
+from katti.CeleryApps.Utilis import Input
+from katti.DataBaseStuff.MongoengineDocuments.UserManagement.Tag import Ownership
+from katti.Scanner.DNS.PTRScanner import CIDRsForPTR, IPForPTR
+
+
+def sweep_request(raw_cidrs: list) -> CIDRsForPTR:
+    return CIDRsForPTR.build_request(raw_oois=raw_cidrs, ownership=Ownership(owner=ObjectId()), meta_data=None,
+                                     time_valid_response=0, scanner_id=ObjectId())
+
+
+def test_cidrs_input_type():
+    oois = Input().add_new_ooi('192.0.2.0/30', 'cidrs').add_new_ooi('198.51.100.8/31', 'cidrs').get_oois('cidrs')
+    assert sorted(oois) == ['192.0.2.0/30', '198.51.100.8/31']
+
+
+def test_sweep_is_lazy():
+    request = sweep_request(['192.0.2.0/30', '198.51.100.8/31'])
+    assert request.oois == []
+    assert request.ooi_count == 6
+    assert request.next_ooi_obj.ooi == '192.0.2.0'
+    assert request.ooi_count == 5
+    assert request.cidr_position == 1
+
+
+def test_sweep_continues_after_a_retry():
+    request = sweep_request(['192.0.2.0/30', '198.51.100.8/31'])
+    scanned = [request.next_ooi_obj.ooi for _ in range(2)]
+    in_flight = request.next_ooi_obj
+    # handle_retry_exception puts the OOI in flight back, Celery pickles the request for the retry.
+    request.oois.append(in_flight)
+    request = pickle.loads(pickle.dumps(request))
+    assert request.cidr_position == 3
+    assert request.ooi_count == 4
+
+    while next_ooi_obj := request.next_ooi_obj:
+        assert isinstance(next_ooi_obj, IPForPTR)
+        scanned.append(next_ooi_obj.ooi)
+    assert scanned == ['192.0.2.0', '192.0.2.1', '192.0.2.2', '192.0.2.3', '198.51.100.8', '198.51.100.9']
+    assert request.ooi_count == 0
+    assert request.cidr_position == 6
@@ -0,0 +1,50 @@
+import asyncio
+import shutil
+import pytest
+
+from katti.Scanner.DNS.ResolverBackends import DigBackend, DnsPythonBackend
+
+# id, query_time, when, server and the OPT pseudo section (cookies) differ per query
+COMPARED_KEYS = ['status', 'opcode', 'flags', 'query_num', 'answer_num', 'authority_num', 'additional_num',
+                 'question', 'answer', 'authority']
+QUERIES = [('www.example.test.', 'A'),
+           ('www.example.test.', 'AAAA'),
+           ('example.test.', 'MX'),
+           ('example.test.', 'TXT'),
+           ('www.example.test.', 'MX'),
+           ('a.nx.example.test.', 'A')]
+
+
+def compared(response: dict) -> dict:
+    return {key: response.get(key) for key in COMPARED_KEYS}
+
+
+@pytest.mark.skipif(shutil.which('dig') is None, reason='dig is not installed')
+@pytest.mark.parametrize('name, record_type', QUERIES)
+def test_backends_return_the_same_dict(stub_dns_server, name, record_type):
+    dig = DigBackend().query(name, record_type, '127.0.0.1', timeout=5, port=stub_dns_server.port)
+    dnspython = DnsPythonBackend().query(name, record_type, '127.0.0.1', timeout=5, port=stub_dns_server.port)
+    assert compared(dnspython) == compared(dig)
+
+
+@pytest.mark.skipif(shutil.which('dig') is None, reason='dig is not installed')
+def test_async_backends_return_the_same_dict(stub_dns_server):
+    async def query_both():
+        return await asyncio.gather(
+            DigBackend().query_async('www.example.test.', 'A', '127.0.0.1', timeout=5, port=stub_dns_server.port),
+            DnsPythonBackend().query_async('www.example.test.', 'A', '127.0.0.1', timeout=5, port=stub_dns_server.port))
+
+    dig, dnspython = asyncio.run(query_both())
+    assert compared(dnspython) == compared(dig)
+
+
+def test_dnspython_backend_answers(stub_dns_server):
+    response = DnsPythonBackend().query('www.example.test.', 'A', '127.0.0.1', timeout=5, port=stub_dns_server.port)
+    assert response['status'] == 'NOERROR'
+    assert sorted(record['data'] for record in response['answer']) == ['192.0.2.1', '192.0.2.2']
+    assert response['server'] == f'127.0.0.1#{stub_dns_server.port}(127.0.0.1)'
+
+    response = DnsPythonBackend().query('a.nx.example.test.', 'A', '127.0.0.1', timeout=5, port=stub_dns_server.port)
+    assert response['status'] == 'NXDOMAIN'
+    assert 'answer' not in response
+    assert response['authority'][0]['type'] == 'SOA'
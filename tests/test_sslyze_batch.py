@@ -0,0 +1,77 @@
+import asyncio
+import socket
+import pytest
+from sslyze import ServerScanRequest, ServerNetworkLocation, ScanCommand, ServerScanStatusEnum, ScanCommandAttemptStatusEnum
+from katti.Scanner.SSLScanner.SSLScanner import SslyzeBatch
+from tls_stub import StubTLSServer, write_self_signed_certificate
+
+
+@pytest.fixture
+def certificate(tmp_path):
+    return write_self_signed_certificate(tmp_path)
+
+
+@pytest.fixture
+def tls_servers(certificate):
+    servers = [StubTLSServer(*certificate) for _ in range(2)]
+    for server in servers:
+        server.start()
+    yield servers
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def silent_server(certificate):
+    server = StubTLSServer(*certificate, handshake=False)
+    server.start()
+    yield server
+    server.stop()
+
+
+def scan_request(port: int) -> ServerScanRequest:
+    return ServerScanRequest(server_location=ServerNetworkLocation(hostname='localhost', port=port, ip_address='127.0.0.1'),
+                             scan_commands={ScanCommand.CERTIFICATE_INFO})
+
+
+def unused_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def run_batch(batch: SslyzeBatch, requests: list[ServerScanRequest]):
+    async def scan_all():
+        return await asyncio.gather(*(batch.scan(request) for request in requests), return_exceptions=True)
+    try:
+        return asyncio.run(scan_all())
+    finally:
+        batch.close()
+
+
+def test_every_worker_gets_its_own_result(tls_servers):
+    requests = [scan_request(server.port) for server in tls_servers]
+    results = run_batch(SslyzeBatch(per_server_concurrent_connections_limit=2, concurrent_server_scans_limit=2,
+                                    batch_window=0.05, timeout=120), requests)
+    assert [result.uuid for result in results] == [request.uuid for request in requests]
+    for result, server in zip(results, tls_servers):
+        assert result.scan_status == ServerScanStatusEnum.COMPLETED
+        assert result.server_location.port == server.port
+        certificate_info = result.scan_result.certificate_info
+        assert certificate_info.status == ScanCommandAttemptStatusEnum.COMPLETED
+        leaf = certificate_info.result.certificate_deployments[0].received_certificate_chain[0]
+        assert leaf.subject.rfc4514_string() == 'CN=localhost'
+
+
+def test_unreachable_server_does_not_fail_the_batch(tls_servers):
+    requests = [scan_request(tls_servers[0].port), scan_request(unused_port())]
+    results = run_batch(SslyzeBatch(per_server_concurrent_connections_limit=2, concurrent_server_scans_limit=2,
+                                    batch_window=0.05, timeout=120), requests)
+    assert results[0].scan_status == ServerScanStatusEnum.COMPLETED
+    assert results[1].scan_status == ServerScanStatusEnum.ERROR_NO_CONNECTIVITY
+
+
+def test_scan_wait_is_bounded(silent_server):
+    results = run_batch(SslyzeBatch(per_server_concurrent_connections_limit=1, concurrent_server_scans_limit=1,
+                                    batch_window=0, timeout=0.5), [scan_request(silent_server.port)])
+    assert isinstance(results[0], asyncio.TimeoutError)
@@ -0,0 +1,79 @@
+import datetime
+import socket
+import ssl
+import threading
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from cryptography.x509.oid import NameOID
+
+
+def write_self_signed_certificate(directory, common_name: str = 'localhost') -> tuple[str, str]:
+    """Writes key.pem and cert.pem for common_name into directory, returns their paths."""
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+    now = datetime.datetime.utcnow()
+    certificate = (x509.CertificateBuilder()
+                   .subject_name(name)
+                   .issuer_name(name)
+                   .public_key(key.public_key())
+                   .serial_number(x509.random_serial_number())
+                   .not_valid_before(now - datetime.timedelta(days=1))
+                   .not_valid_after(now + datetime.timedelta(days=1))
+                   .add_extension(x509.SubjectAlternativeName([x509.DNSName(common_name)]), critical=False)
+                   .sign(key, hashes.SHA256()))
+    key_path, cert_path = f'{directory}/key.pem', f'{directory}/cert.pem'
+    with open(key_path, 'wb') as key_file:
+        key_file.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.TraditionalOpenSSL,
+                                         serialization.NoEncryption()))
+    with open(cert_path, 'wb') as cert_file:
+        cert_file.write(certificate.public_bytes(serialization.Encoding.PEM))
+    return key_path, cert_path
+
+
+class StubTLSServer(threading.Thread):
+    """TLS server on 127.0.0.1, every connection gets its own thread. With handshake=False connections are accepted
+    but never answered, a scanner waiting for them runs into its timeouts."""
+
+    def __init__(self, key_path: str, cert_path: str, handshake: bool = True):
+        super().__init__(daemon=True)
+        self._context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        self._context.load_cert_chain(cert_path, key_path)
+        self._handshake = handshake
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind(('127.0.0.1', 0))
+        self._socket.listen(64)
+        self._socket.settimeout(0.1)
+        self.port = self._socket.getsockname()[1]
+        self._stopped = threading.Event()
+        self._connections: list[socket.socket] = []
+
+    def run(self):
+        while not self._stopped.is_set():
+            try:
+                connection, _ = self._socket.accept()
+            except socket.timeout:
+                continue
+            self._connections.append(connection)
+            if self._handshake:
+                threading.Thread(target=self._serve, args=(connection,), daemon=True).start()
+
+    def _serve(self, connection: socket.socket):
+        try:
+            connection.settimeout(5)
+            with self._context.wrap_socket(connection, server_side=True) as tls_connection:
+                while tls_connection.recv(4096):
+                    pass
+        except (ssl.SSLError, OSError):
+            pass
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+        self._socket.close()
+        for connection in self._connections:
+            try:
+                connection.close()
+            except OSError:
+                pass